@@ -0,0 +1,70 @@
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from .cache import get_area_version
+from .models import TimeSlot
+
+MAX_DAYS = 28
+
+_schedules = {}  # area_id -> (version, weekly schedule)
+_lock = threading.Lock()
+
+
+def service_time_zone():
+    """Time zone the slot start/end times are expressed in"""
+    return ZoneInfo(getattr(settings, 'AVAILABILITY_TIME_ZONE', settings.TIME_ZONE))
+
+
+def load_weekly_schedule(area_id):
+    """Active windows with room left per weekday (Monday first) for an area, in one query"""
+    weekly = [[] for _ in range(7)]
+    # Fully booked slots are left out; reservations bump the area version
+    # whenever a slot fills up or frees up (see reservations.py)
+    has_room = Q(capacity__isnull=True) | Q(reserved__lt=F('capacity'))
+    rows = TimeSlot.objects.filter(has_room, area_id=area_id, is_active=True).order_by(
+        'day_of_week', 'start_time'
+    ).values_list('day_of_week', 'start_time', 'end_time')
+    for day, start_time, end_time in rows:
+        weekly[day].append((start_time, end_time))
+    return tuple(tuple(windows) for windows in weekly)
+
+
+def get_weekly_schedule(area_id):
+    """
+    Per-process copy of an area's weekly schedule.
+
+    Validated against the area's cache version on every call, so a slot
+    change on any worker is picked up on the next request.
+    """
+    version = get_area_version(area_id)
+    cached = _schedules.get(area_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    weekly = load_weekly_schedule(area_id)
+    with _lock:
+        _schedules[area_id] = (version, weekly)
+    return weekly
+
+
+def expand_schedule(weekly, start_date, days, now=None, tz=None):
+    """Concrete timezone-aware slots for days starting at start_date, skipping ones already started"""
+    tz = tz or service_time_zone()
+    now = now or datetime.now(tz)
+    slots = []
+    for offset in range(days):
+        date = start_date + timedelta(days=offset)
+        for start_time, end_time in weekly[date.weekday()]:
+            start = datetime.combine(date, start_time, tzinfo=tz)
+            if start <= now:
+                continue
+            slots.append({
+                'date': date.isoformat(),
+                'day_of_week': date.weekday(),
+                'start': start.isoformat(),
+                'end': datetime.combine(date, end_time, tzinfo=tz).isoformat(),
+            })
+    return slots
@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.db.models.functions import Trim, Upper
+from django.template import Context, Template
+from django.utils import timezone
+
+from .models import AreaBroadcast, Postcode
+
+CHUNK_SIZE = 500
+FETCH_SIZE = 5000
+RESUMABLE = [AreaBroadcast.STATUS_PENDING, AreaBroadcast.STATUS_FAILED]
+
+
+def recipients(area_id, after_id=0):
+    """
+    (user_id, email) of active users whose postcode belongs to the area, by id.
+
+    One query: the users' postcodes are normalized like PostcodeSerializer
+    stores them and semi-joined against the area's postcodes.
+    """
+    return get_user_model().objects.annotate(
+        normalized_postcode=Upper(Trim('postcode'))
+    ).filter(
+        is_active=True,
+        pk__gt=after_id,
+        normalized_postcode__in=Postcode.objects.filter(area_id=area_id).values('postcode'),
+    ).order_by('pk').values_list('pk', 'email')
+
+
+def render_broadcast(broadcast):
+    """Render subject and body once; every recipient gets the same text"""
+    context = Context({'area': broadcast.area})
+    subject = Template(broadcast.subject).render(context)
+    body = Template(broadcast.body).render(context)
+    # Header injection guard: a subject must be a single line
+    return ' '.join(subject.split()), body
+
+
+def _send_chunk(broadcast, connection, subject, body, chunk):
+    messages = [
+        EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [email], connection=connection)
+        for _, email in chunk
+    ]
+    connection.send_messages(messages)
+    # Progress is committed per chunk, so a resumed run re-sends at most the chunk that failed
+    AreaBroadcast.objects.filter(pk=broadcast.pk).update(
+        sent_count=F('sent_count') + len(messages), last_user_id=chunk[-1][0]
+    )
+
+
+def run_broadcast(broadcast, chunk_size=CHUNK_SIZE, force=False):
+    """
+    Send (or resume) a broadcast and return it refreshed.
+
+    Claims the broadcast by moving it to running, so two runners never send
+    the same one; `force` also takes over a running broadcast whose worker
+    died. Recipients are streamed with iterator() after last_user_id and
+    sent chunk_size at a time over one connection with send_messages. On an
+    error the broadcast is marked failed with last_error and can be resumed.
+    """
+    statuses = RESUMABLE + [AreaBroadcast.STATUS_RUNNING] if force else RESUMABLE
+    claimed = AreaBroadcast.objects.filter(pk=broadcast.pk, status__in=statuses).update(
+        status=AreaBroadcast.STATUS_RUNNING, started_at=timezone.now(), last_error=''
+    )
+    broadcast.refresh_from_db()
+    if not claimed:
+        return broadcast
+
+    try:
+        subject, body = render_broadcast(broadcast)
+        with get_connection() as connection:
+            chunk = []
+            for row in recipients(broadcast.area_id, broadcast.last_user_id).iterator(chunk_size=FETCH_SIZE):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    _send_chunk(broadcast, connection, subject, body, chunk)
+                    chunk = []
+            if chunk:
+                _send_chunk(broadcast, connection, subject, body, chunk)
+    except Exception as e:
+        AreaBroadcast.objects.filter(pk=broadcast.pk).update(
+            status=AreaBroadcast.STATUS_FAILED, last_error=str(e)
+        )
+    else:
+        AreaBroadcast.objects.filter(pk=broadcast.pk).update(
+            status=AreaBroadcast.STATUS_COMPLETED, finished_at=timezone.now()
+        )
+
+    broadcast.refresh_from_db()
+    return broadcast
@@ -0,0 +1,38 @@
+from caching import bump_on_commit, get_cache, get_version
+
+AREA_DETAIL_CACHE_TIMEOUT = 60 * 60
+SLOT_MATRIX_CACHE_TIMEOUT = 60 * 60
+
+MATRIX_SCOPE = 'matrix'
+
+
+def area_scope(area_id):
+    return f'area:{area_id}'
+
+
+def get_area_version(area_id):
+    return get_version(area_scope(area_id))
+
+
+def bump_area_version_on_commit(*area_ids):
+    bump_on_commit(*[area_scope(area_id) for area_id in area_ids if area_id is not None])
+
+
+def bump_matrix_version_on_commit():
+    bump_on_commit(MATRIX_SCOPE)
+
+
+def get_cached_area_detail(area_id, version):
+    return get_cache().get(f'areas:detail:{area_id}:{version}')
+
+
+def set_cached_area_detail(area_id, version, data):
+    get_cache().set(f'areas:detail:{area_id}:{version}', data, AREA_DETAIL_CACHE_TIMEOUT)
+
+
+def get_cached_slot_matrix(version):
+    return get_cache().get(f'areas:matrix:{version}')
+
+
+def set_cached_slot_matrix(version, data):
+    get_cache().set(f'areas:matrix:{version}', data, SLOT_MATRIX_CACHE_TIMEOUT)
@@ -0,0 +1,74 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from areas.models import Area, Postcode
+from areas.postcode_index import postcode_index
+from areas.serializers import PostcodeSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare the in-memory postcode index with the list-and-filter approach. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--postcodes', type=int, default=100000, help='Number of postcodes to generate')
+        parser.add_argument('--areas', type=int, default=50, help='Number of areas to spread them over')
+        parser.add_argument('--lookups', type=int, default=10000, help='Number of index lookups to time')
+        parser.add_argument('--list-runs', type=int, default=3, help='Number of full list-and-filter runs to time')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            queries = self._seed(options['postcodes'], options['areas'])
+            self._run(queries, options['lookups'], options['list_runs'])
+            transaction.set_rollback(True)
+        postcode_index.invalidate()
+
+    def _seed(self, count, area_count):
+        areas = Area.objects.bulk_create([Area(name=f'__bench_area_{i}') for i in range(area_count)])
+        rng = random.Random(42)
+        seen = set()
+        while len(seen) < count:
+            outward = ''.join(rng.choices(string.ascii_uppercase, k=2)) + str(rng.randint(1, 99))
+            inward = str(rng.randint(0, 9)) + ''.join(rng.choices(string.ascii_uppercase, k=2))
+            seen.add(f'{outward} {inward}')
+        postcodes = sorted(seen)
+        Postcode.objects.bulk_create(
+            [Postcode(postcode=value, area=areas[i % area_count]) for i, value in enumerate(postcodes)],
+            batch_size=5000
+        )
+        self.stdout.write(f'Seeded {count} postcodes over {area_count} areas')
+        return postcodes
+
+    def _run(self, postcodes, lookups, list_runs):
+        rng = random.Random(7)
+        sample = [rng.choice(postcodes) for _ in range(lookups)]
+
+        # Baseline: what a client does today with GET /api/postcodes/
+        start = time.perf_counter()
+        for value in sample[:list_runs]:
+            data = PostcodeSerializer(Postcode.objects.all(), many=True).data
+            next((row for row in data if row['postcode'] == value), None)
+        baseline = (time.perf_counter() - start) / max(list_runs, 1)
+
+        start = time.perf_counter()
+        postcode_index.load()
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for value in sample:
+            postcode_index.get(value)
+        exact = (time.perf_counter() - start) / lookups
+
+        start = time.perf_counter()
+        for value in sample:
+            postcode_index.lookup(value[:3])
+        prefix = (time.perf_counter() - start) / lookups
+
+        self.stdout.write(f'list-and-filter:      {baseline * 1000:10.2f} ms/lookup')
+        self.stdout.write(f'index build:          {build * 1000:10.2f} ms (once per process)')
+        self.stdout.write(f'index exact lookup:   {exact * 1e6:10.2f} us/lookup')
+        self.stdout.write(f'index prefix lookup:  {prefix * 1e6:10.2f} us/lookup')
+        self.stdout.write(self.style.SUCCESS(f'speedup (exact): {baseline / exact:,.0f}x'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from areas.broadcasts import CHUNK_SIZE, run_broadcast
+from areas.models import AreaBroadcast
+
+
+class Command(BaseCommand):
+    help = "Send pending area broadcasts, or resume the given ones after a failure"
+
+    def add_arguments(self, parser):
+        parser.add_argument('broadcast_ids', nargs='*', type=int,
+                            help="Broadcasts to send or resume (default: every pending broadcast)")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                            help="Emails per send_messages call")
+        parser.add_argument('--force', action='store_true',
+                            help="Also take over broadcasts left running by a worker that died")
+
+    def handle(self, *args, **options):
+        if options['broadcast_ids']:
+            broadcasts = list(AreaBroadcast.objects.filter(pk__in=options['broadcast_ids']))
+            missing = sorted(set(options['broadcast_ids']) - {broadcast.pk for broadcast in broadcasts})
+            if missing:
+                raise CommandError(f"Unknown broadcast(s): {missing}.")
+        else:
+            broadcasts = list(AreaBroadcast.objects.filter(status=AreaBroadcast.STATUS_PENDING).order_by('id'))
+
+        for broadcast in broadcasts:
+            broadcast = run_broadcast(broadcast, options['chunk_size'], force=options['force'])
+            message = (
+                f"Broadcast {broadcast.pk}: {broadcast.status}, "
+                f"{broadcast.sent_count}/{broadcast.total_recipients} sent."
+            )
+            if broadcast.status == AreaBroadcast.STATUS_FAILED:
+                self.stderr.write(self.style.ERROR(f"{message} {broadcast.last_error}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(message))
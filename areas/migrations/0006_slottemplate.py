@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('areas', '0005_timeslot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('is_default', models.BooleanField(default=False, help_text='Applied to newly created areas')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Slot Template',
+                'verbose_name_plural': 'Slot Templates',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SlotTemplateWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_of_week', models.IntegerField(blank=True, choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')], null=True)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('is_active', models.BooleanField(default=False)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='windows', to='areas.slottemplate')),
+            ],
+            options={
+                'verbose_name': 'Slot Template Window',
+                'verbose_name_plural': 'Slot Template Windows',
+                'ordering': ['day_of_week', 'start_time'],
+            },
+        ),
+    ]
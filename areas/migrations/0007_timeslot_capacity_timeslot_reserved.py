@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('areas', '0006_slottemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timeslot',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, help_text='Maximum reservations; empty means unlimited', null=True),
+        ),
+        migrations.AddField(
+            model_name='timeslot',
+            name='reserved',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
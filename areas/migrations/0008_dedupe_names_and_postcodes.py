@@ -0,0 +1,68 @@
+from django.db import migrations
+
+
+def _unique_name(name, taken, max_length=255):
+    """'Name (2)', 'Name (3)', ... trimmed to fit, not case-insensitively in taken"""
+    n = 2
+    while True:
+        suffix = f' ({n})'
+        candidate = name[:max_length - len(suffix)] + suffix
+        if candidate.lower() not in taken:
+            return candidate
+        n += 1
+
+
+def _dedupe_names(model):
+    """Rename rows whose name differs from an earlier row only by case"""
+    rows = list(model.objects.order_by('pk').values_list('pk', 'name'))
+    taken = {name.lower() for _, name in rows}
+    seen = set()
+    for pk, name in rows:
+        key = name.lower()
+        if key in seen:
+            name = _unique_name(name, taken)
+            taken.add(name.lower())
+            model.objects.filter(pk=pk).update(name=name)
+        seen.add(key)
+
+
+def dedupe(apps, schema_editor):
+    _dedupe_names(apps.get_model('areas', 'Area'))
+    _dedupe_names(apps.get_model('areas', 'SlotTemplate'))
+
+    # Postcodes are stored normalized (trimmed, upper case); normalize any
+    # legacy rows. A later copy of a postcode in the same area carries no
+    # information and is dropped; copies that disagree on the area need a
+    # human decision, so the migration stops and lists them instead.
+    Postcode = apps.get_model('areas', 'Postcode')
+    groups = {}
+    for pk, postcode, area_id in Postcode.objects.order_by('pk').values_list('pk', 'postcode', 'area_id'):
+        groups.setdefault(postcode.strip().upper(), []).append((pk, postcode, area_id))
+
+    conflicts = [rows for rows in groups.values() if len({area_id for _, _, area_id in rows}) > 1]
+    if conflicts:
+        listing = '\n'.join(
+            f'  id={pk} postcode={postcode!r} area_id={area_id}' for rows in conflicts for pk, postcode, area_id in rows
+        )
+        raise RuntimeError(
+            'These postcodes only differ by case or spacing but belong to different areas. '
+            'Delete or fix the wrong rows, then run the migration again:\n' + listing
+        )
+
+    # Delete first, so normalizing a kept row cannot collide with a copy
+    duplicates = [pk for rows in groups.values() for pk, _, _ in rows[1:]]
+    Postcode.objects.filter(pk__in=duplicates).delete()
+    for normalized, rows in groups.items():
+        pk, postcode, _ = rows[0]
+        if normalized != postcode:
+            Postcode.objects.filter(pk=pk).update(postcode=normalized)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('areas', '0007_timeslot_capacity_timeslot_reserved'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:06
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('areas', '0008_dedupe_names_and_postcodes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='area',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='slottemplate',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='area',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='areas_area_name_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='slottemplate',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='areas_slottemplate_name_ci_unique'),
+        ),
+    ]
@@ -1,12 +1,17 @@
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
 
 class Area(models.Model):
-    name = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # delta sync
 
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='areas_area_name_ci_unique'),
+        ]
         verbose_name = 'Area'
         verbose_name_plural = 'Areas'
 
@@ -29,6 +34,8 @@ class TimeSlot(models.Model):
     start_time = models.TimeField()
     end_time = models.TimeField()
     is_active = models.BooleanField(default=False)
+    capacity = models.PositiveIntegerField(blank=True, null=True, help_text="Maximum reservations; empty means unlimited")
+    reserved = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -49,7 +56,7 @@ class Postcode(models.Model):
     postcode = models.CharField(max_length=20, unique=True)
     area = models.ForeignKey(Area, on_delete=models.CASCADE, related_name='postcodes')
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # delta sync
 
     class Meta:
         ordering = ['postcode']
@@ -57,4 +64,84 @@ class Postcode(models.Model):
         verbose_name_plural = 'Postcodes'
 
     def __str__(self):
-        return f"{self.postcode} - {self.area.name}"
\ No newline at end of file
+        return f"{self.postcode} - {self.area.name}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded area so a move can invalidate both areas
+        instance._loaded_area_id = instance.__dict__.get('area_id')
+        return instance
+
+class SlotTemplate(models.Model):
+    name = models.CharField(max_length=255, db_index=True)
+    is_default = models.BooleanField(default=False, help_text="Applied to newly created areas")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='areas_slottemplate_name_ci_unique'),
+        ]
+        verbose_name = 'Slot Template'
+        verbose_name_plural = 'Slot Templates'
+
+    def __str__(self):
+        return self.name
+
+
+class SlotTemplateWindow(models.Model):
+    """A slot window in a template; day_of_week=None applies to every day without its own windows"""
+    template = models.ForeignKey(SlotTemplate, on_delete=models.CASCADE, related_name='windows')
+    day_of_week = models.IntegerField(choices=TimeSlot.DAYS_OF_WEEK, blank=True, null=True)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    is_active = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['day_of_week', 'start_time']
+        verbose_name = 'Slot Template Window'
+        verbose_name_plural = 'Slot Template Windows'
+
+    def __str__(self):
+        day = self.get_day_of_week_display() if self.day_of_week is not None else 'Every day'
+        return f"{self.template.name} - {day} {self.start_time}-{self.end_time}"
+
+
+class AreaBroadcast(models.Model):
+    """An email to every customer in an area; sent in chunks by send_broadcasts and resumable"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    area = models.ForeignKey(Area, on_delete=models.CASCADE, related_name='broadcasts')
+    subject = models.CharField(max_length=255, help_text="Django template; context: area")
+    body = models.TextField(help_text="Django template; context: area")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    total_recipients = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    # Recipients are sent in user id order; a resumed run starts after this id
+    last_user_id = models.BigIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        verbose_name = 'Area Broadcast'
+        verbose_name_plural = 'Area Broadcasts'
+
+    def __str__(self):
+        return f"{self.area.name} - {self.subject} ({self.status})"
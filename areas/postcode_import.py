@@ -0,0 +1,135 @@
+from django.db import IntegrityError, transaction
+
+from caching import bump_model_version_on_commit
+from .cache import bump_area_version_on_commit
+from .models import Area, Postcode
+from .postcode_index import normalize_postcode, postcode_index
+
+CHUNK_SIZE = 1000
+MAX_REJECTS = 1000
+POSTCODE_MAX_LENGTH = Postcode._meta.get_field('postcode').max_length
+
+
+class PostcodeImporter:
+    """
+    Chunked postcode loader.
+
+    Rows carry a `postcode` and an `area` (id or name); `area` may be omitted
+    when a default area is given. Each chunk costs one SELECT for duplicates
+    and one bulk INSERT.
+    """
+
+    def __init__(self, default_area=None, chunk_size=CHUNK_SIZE, max_rejects=MAX_REJECTS):
+        self.default_area = default_area
+        self.chunk_size = chunk_size
+        self.max_rejects = max_rejects
+        self.created = 0
+        self.rejected = 0
+        self.rejects = []
+        self._seen = set()
+        self._touched_areas = set()
+        self._areas_by_id = None
+        self._areas_by_name = None
+
+    def _load_areas(self):
+        self._areas_by_id = {}
+        self._areas_by_name = {}
+        for pk, name in Area.objects.values_list('id', 'name').order_by():
+            self._areas_by_id[pk] = pk
+            self._areas_by_name[name.strip().lower()] = pk
+
+    def _resolve_area(self, value):
+        if value in (None, ''):
+            value = self.default_area
+        if value in (None, ''):
+            return None
+        if self._areas_by_id is None:
+            self._load_areas()
+        if isinstance(value, int) or str(value).strip().isdigit():
+            return self._areas_by_id.get(int(value))
+        return self._areas_by_name.get(str(value).strip().lower())
+
+    def _reject(self, line, postcode, error):
+        self.rejected += 1
+        if len(self.rejects) < self.max_rejects:
+            self.rejects.append({'line': line, 'postcode': postcode, 'error': error})
+
+    def run(self, rows):
+        """Import an iterable of (line_number, row) pairs and return a summary"""
+        chunk = []
+        for line, row in rows:
+            if row is None:
+                self._reject(line, None, 'Malformed row.')
+                continue
+
+            raw = row.get('postcode')
+            postcode = normalize_postcode(raw if isinstance(raw, str) else '')
+            if not postcode:
+                self._reject(line, raw, 'Postcode is required.')
+                continue
+            if len(postcode) > POSTCODE_MAX_LENGTH:
+                self._reject(line, postcode, f'Postcode must be at most {POSTCODE_MAX_LENGTH} characters.')
+                continue
+            if postcode in self._seen:
+                self._reject(line, postcode, f"Postcode '{postcode}' is duplicated in this file.")
+                continue
+
+            area_value = row.get('area', row.get('area_id'))
+            area_id = self._resolve_area(area_value)
+            if area_id is None:
+                self._reject(line, postcode, f"Area '{area_value if area_value not in (None, '') else self.default_area}' does not exist.")
+                continue
+
+            self._seen.add(postcode)
+            chunk.append((line, postcode, area_id))
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+
+        if chunk:
+            self._flush(chunk)
+
+        if self.created:
+            # bulk_create bypasses post_save, so rebuild the lookup index and
+            # invalidate cached area details here
+            transaction.on_commit(postcode_index.invalidate)
+            bump_area_version_on_commit(*self._touched_areas)
+            bump_model_version_on_commit(Postcode)
+
+        return self.summary()
+
+    def _flush(self, chunk):
+        for attempt in range(2):
+            existing = set(
+                Postcode.objects.filter(postcode__in=[postcode for _, postcode, _ in chunk]).values_list('postcode', flat=True)
+            )
+            pending = []
+            for line, postcode, area_id in chunk:
+                if postcode in existing:
+                    self._reject(line, postcode, f"Postcode '{postcode}' already exists.")
+                    continue
+                pending.append((line, postcode, area_id))
+            try:
+                with transaction.atomic():
+                    Postcode.objects.bulk_create(
+                        [Postcode(postcode=postcode, area_id=area_id) for _, postcode, area_id in pending]
+                    )
+            except IntegrityError:
+                # A concurrent writer inserted some of these; re-check and retry once
+                if attempt:
+                    for line, postcode, _ in pending:
+                        self._reject(line, postcode, f"Postcode '{postcode}' already exists.")
+                    return
+                chunk = pending
+                continue
+            self.created += len(pending)
+            self._touched_areas.update(area_id for _, _, area_id in pending)
+            return
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'rejected': self.rejected,
+            'rejects': sorted(self.rejects, key=lambda reject: reject['line']),
+            'rejects_truncated': self.rejected > len(self.rejects),
+        }
@@ -0,0 +1,235 @@
+import bisect
+import threading
+
+from caching import get_versions, model_scope
+
+
+def normalize_postcode(value):
+    """Normalize a postcode the same way PostcodeSerializer does"""
+    return (value or '').strip().upper()
+
+
+def outward_code(postcode):
+    """Return the outward part of a UK postcode (e.g. 'SW1A' for 'SW1A 1AA')"""
+    parts = postcode.split()
+    if len(parts) > 1:
+        return parts[0]
+    # Postcodes stored without a space: the inward code is always 3 characters
+    if len(postcode) > 4:
+        return postcode[:-3]
+    return postcode
+
+
+class PostcodeIndex:
+    """
+    Per-process postcode -> area index.
+
+    Holds an exact-match dict, a sorted key list for prefix matching and an
+    outward-code bucket map. Loaded lazily from the database and reloaded
+    when the Postcode/Area cache versions show another worker (or a bulk
+    write) changed something; this worker's own saves are applied
+    incrementally by the signal handlers in areas.signals.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # Serializes full reloads only; lookups and incremental updates keep
+        # running on the current maps while one is built
+        self._reload_lock = threading.Lock()
+        self._loaded_versions = None  # {scope: version} the index reflects
+        self._postcodes = {}   # postcode -> (postcode_id, area_id)
+        self._by_id = {}       # postcode_id -> postcode
+        self._sorted_keys = []
+        self._outward = {}     # outward code -> set of postcodes
+        self._area_names = {}  # area_id -> area name
+
+    def _scopes(self):
+        from .models import Area, Postcode
+        return [model_scope(Postcode), model_scope(Area)]
+
+    def _current_versions(self):
+        scopes = self._scopes()
+        return dict(zip(scopes, get_versions(scopes)))
+
+    # ----- loading -----
+
+    def load(self, versions=None):
+        """(Re)build the whole index with two queries"""
+        from .models import Area, Postcode
+
+        # Read the versions first so a write during the load only triggers another reload
+        if versions is None:
+            versions = self._current_versions()
+        postcodes = {}
+        by_id = {}
+        outward = {}
+        rows = Postcode.objects.values_list('id', 'postcode', 'area_id').order_by()
+        for pk, postcode, area_id in rows.iterator(chunk_size=5000):
+            postcodes[postcode] = (pk, area_id)
+            by_id[pk] = postcode
+            outward.setdefault(outward_code(postcode), set()).add(postcode)
+        area_names = dict(Area.objects.values_list('id', 'name').order_by())
+
+        with self._lock:
+            self._postcodes = postcodes
+            self._by_id = by_id
+            self._sorted_keys = sorted(postcodes)
+            self._outward = outward
+            self._area_names = area_names
+            self._loaded_versions = versions
+
+    def invalidate(self):
+        """Drop the index; it is rebuilt on the next lookup"""
+        with self._lock:
+            self._loaded_versions = None
+            self._postcodes = {}
+            self._by_id = {}
+            self._sorted_keys = []
+            self._outward = {}
+            self._area_names = {}
+
+    def _ensure_loaded(self):
+        # One get_many round trip per public call; a changed version means
+        # another worker wrote since the index was built
+        versions = self._current_versions()
+        if versions == self._loaded_versions:
+            return
+        with self._reload_lock:
+            # Another thread may have reloaded while this one waited
+            if versions != self._loaded_versions:
+                self.load(versions)
+
+    # ----- incremental updates -----
+
+    def _advance(self, model, version):
+        """
+        Record a version this worker bumped itself for a change just applied.
+
+        Only when it directly follows the loaded one: otherwise another
+        worker bumped in between, so the next lookup reloads instead.
+        """
+        scope = model_scope(model)
+        if self._loaded_versions is not None and version is not None and self._loaded_versions.get(scope) == version - 1:
+            self._loaded_versions = {**self._loaded_versions, scope: version}
+
+    def add(self, pk, postcode, area_id, version=None):
+        """Insert or move a single postcode; version is the Postcode version bumped for it"""
+        from .models import Postcode
+        with self._lock:
+            if self._loaded_versions is None:
+                return
+            # The postcode text may have changed on update
+            previous = self._by_id.get(pk)
+            if previous is not None and previous != postcode:
+                self._remove_key(previous)
+            if postcode not in self._postcodes:
+                bisect.insort(self._sorted_keys, postcode)
+                self._outward.setdefault(outward_code(postcode), set()).add(postcode)
+            self._postcodes[postcode] = (pk, area_id)
+            self._by_id[pk] = postcode
+            self._advance(Postcode, version)
+
+    def remove(self, pk, version=None):
+        """Remove a single postcode by id"""
+        from .models import Postcode
+        with self._lock:
+            if self._loaded_versions is None:
+                return
+            postcode = self._by_id.get(pk)
+            if postcode is not None:
+                self._remove_key(postcode)
+            self._advance(Postcode, version)
+
+    def set_area_name(self, area_id, name, version=None):
+        from .models import Area
+        with self._lock:
+            if self._loaded_versions is not None:
+                self._area_names[area_id] = name
+                self._advance(Area, version)
+
+    def remove_area(self, area_id, version=None):
+        from .models import Area
+        with self._lock:
+            if self._loaded_versions is not None:
+                self._area_names.pop(area_id, None)
+                self._advance(Area, version)
+
+    def _remove_key(self, postcode):
+        entry = self._postcodes.pop(postcode, None)
+        if entry is None:
+            return
+        self._by_id.pop(entry[0], None)
+        i = bisect.bisect_left(self._sorted_keys, postcode)
+        if i < len(self._sorted_keys) and self._sorted_keys[i] == postcode:
+            del self._sorted_keys[i]
+        outward = outward_code(postcode)
+        bucket = self._outward.get(outward)
+        if bucket is not None:
+            bucket.discard(postcode)
+            if not bucket:
+                del self._outward[outward]
+
+    # ----- lookups -----
+    # Reads hold the lock: the structures are mutated in place by the
+    # incremental updates above.
+
+    def _entry(self, postcode):
+        entry = self._postcodes.get(postcode)
+        if entry is None:
+            return None
+        pk, area_id = entry
+        return {
+            'id': pk,
+            'postcode': postcode,
+            'area': area_id,
+            'area_name': self._area_names.get(area_id),
+        }
+
+    def _prefix(self, query, limit):
+        keys = self._sorted_keys
+        results = []
+        i = bisect.bisect_left(keys, query)
+        while i < len(keys) and len(results) < limit and keys[i].startswith(query):
+            results.append(self._entry(keys[i]))
+            i += 1
+        return results
+
+    def _outward_areas(self, query):
+        bucket = self._outward.get(outward_code(query), ())
+        area_ids = sorted({self._postcodes[postcode][1] for postcode in bucket})
+        return [{'id': area_id, 'name': self._area_names.get(area_id)} for area_id in area_ids]
+
+    def get(self, postcode):
+        """Exact match, or None"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._entry(normalize_postcode(postcode))
+
+    def prefix(self, query, limit=10):
+        """Postcodes starting with query, in postcode order"""
+        self._ensure_loaded()
+        query = normalize_postcode(query)
+        if not query:
+            return []
+        with self._lock:
+            return self._prefix(query, limit)
+
+    def outward_areas(self, query):
+        """Areas covering the outward code of query"""
+        self._ensure_loaded()
+        with self._lock:
+            return self._outward_areas(normalize_postcode(query))
+
+    def lookup(self, query, limit=10):
+        """Exact match plus prefix and outward-code matches for query, from one version check and one read"""
+        self._ensure_loaded()
+        query = normalize_postcode(query)
+        with self._lock:
+            return {
+                'query': query,
+                'match': self._entry(query),
+                'outward_areas': self._outward_areas(query),
+                'suggestions': self._prefix(query, limit) if query else [],
+            }
+
+postcode_index = PostcodeIndex()
@@ -0,0 +1,63 @@
+from django.db.models import F, Q
+
+from .cache import bump_area_version_on_commit
+from .models import TimeSlot
+
+
+class ReservationError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _slot_state(area_id, slot_id):
+    return TimeSlot.objects.filter(pk=slot_id, area_id=area_id).values('id', 'is_active', 'capacity', 'reserved').first()
+
+
+def _failure(area_id, slot_id, default_message):
+    """Explain why a conditional UPDATE matched nothing (only runs on the failure path)"""
+    slot = _slot_state(area_id, slot_id)
+    if slot is None:
+        return ReservationError('Time slot not found.', 404)
+    if not slot['is_active']:
+        return ReservationError('Time slot is not active.', 400)
+    return ReservationError(default_message, 409)
+
+
+def reserve_slot(area_id, slot_id, quantity=1):
+    """
+    Reserve quantity places with a single conditional UPDATE.
+
+    The capacity guard lives in the WHERE clause, so concurrent requests can
+    never oversubscribe a slot and no row lock is held beyond the statement.
+    """
+    has_room = Q(capacity__isnull=True) | Q(capacity__gte=F('reserved') + quantity)
+    updated = TimeSlot.objects.filter(
+        has_room, pk=slot_id, area_id=area_id, is_active=True
+    ).update(reserved=F('reserved') + quantity)
+    if not updated:
+        raise _failure(area_id, slot_id, 'Time slot is fully booked.')
+    state = _slot_state(area_id, slot_id)
+    # Availability leaves full slots out, so refresh it once this one fills up
+    if state is not None and state['capacity'] is not None and state['reserved'] >= state['capacity']:
+        bump_area_version_on_commit(area_id)
+    return state
+
+
+def release_slot(area_id, slot_id, quantity=1):
+    """Release quantity places; never drops below zero"""
+    updated = TimeSlot.objects.filter(
+        pk=slot_id, area_id=area_id, reserved__gte=quantity
+    ).update(reserved=F('reserved') - quantity)
+    if not updated:
+        slot = _slot_state(area_id, slot_id)
+        if slot is None:
+            raise ReservationError('Time slot not found.', 404)
+        raise ReservationError('Cannot release more places than are reserved.', 409)
+    state = _slot_state(area_id, slot_id)
+    # The slot may have been full before; concurrent releases cannot tell
+    # which of them freed it, so each one refreshes availability
+    if state is not None and state['capacity'] is not None:
+        bump_area_version_on_commit(area_id)
+    return state
@@ -1,33 +1,29 @@
+from django.template import Template, TemplateSyntaxError
 from rest_framework import serializers
-from .models import Area, Postcode, TimeSlot
-from datetime import time
+from integrity import UniqueErrorMixin
+from .models import Area, AreaBroadcast, Postcode, SlotTemplate, SlotTemplateWindow, TimeSlot
+from .slot_matrix import parse_slot
+from .slot_templates import EXTRA_SLOTS_CHOICES, EXTRA_SLOTS_DEACTIVATE, default_grid
 
-class PostcodeSerializer(serializers.ModelSerializer):
+class PostcodeSerializer(UniqueErrorMixin, serializers.ModelSerializer):
     """Serializer for Postcode with area details"""
     area_name = serializers.CharField(source='area.name', read_only=True)
+    unique_error = ('postcode', "Postcode '{value}' already exists.")
     
     class Meta:
         model = Postcode
         fields = ['id', 'postcode', 'area', 'area_name', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
+        extra_kwargs = {'postcode': {'validators': []}}
 
     def validate_postcode(self, value):
         """Validate and format postcode"""
         if not value:
             raise serializers.ValidationError("Postcode is required.")
         
-        # Remove extra spaces and convert to uppercase
-        value = value.strip().upper()
-        
-        # Check if postcode already exists (for create operation)
-        if not self.instance:  # Only check during creation
-            if Postcode.objects.filter(postcode=value).exists():
-                raise serializers.ValidationError(f"Postcode '{value}' already exists.")
-        else:  # During update, exclude the current instance
-            if Postcode.objects.filter(postcode=value).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError(f"Postcode '{value}' already exists.")
-        
-        return value
+        # Remove extra spaces and convert to uppercase; the unique index on the
+        # normalized column rejects duplicates (see UniqueErrorMixin)
+        return value.strip().upper()
 
 class PostcodeListSerializer(serializers.ModelSerializer):
     """Simplified serializer for listing postcodes"""
@@ -36,18 +32,72 @@ class PostcodeListSerializer(serializers.ModelSerializer):
         model = Postcode
         fields = ['id', 'postcode']
 
+DAY_NAMES = dict(TimeSlot.DAYS_OF_WEEK)
+
 class TimeSlotSerializer(serializers.ModelSerializer):
     """Serializer for TimeSlot"""
-    day_name = serializers.CharField(source='get_day_of_week_display', read_only=True)
+    day_name = serializers.SerializerMethodField()
     
     class Meta:
         model = TimeSlot
-        fields = ['id', 'day_of_week', 'day_name', 'start_time', 'end_time', 'is_active']
+        fields = ['id', 'day_of_week', 'day_name', 'start_time', 'end_time', 'is_active', 'capacity']
+
+    def get_day_name(self, obj):
+        """Plain dict lookup instead of get_day_of_week_display() per slot"""
+        return DAY_NAMES.get(obj.day_of_week)
 
 class TimeSlotToggleSerializer(serializers.Serializer):
     """Serializer for toggling time slot active status"""
     is_active = serializers.BooleanField(required=True)
 
+class TimeSlotCapacitySerializer(serializers.Serializer):
+    """Serializer for setting a time slot's capacity (null for unlimited)"""
+    capacity = serializers.IntegerField(min_value=0, allow_null=True, required=True)
+
+class TimeSlotReservationSerializer(serializers.Serializer):
+    """Serializer for reserving or releasing places in a time slot"""
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+class TimeSlotBatchOperationSerializer(serializers.Serializer):
+    """One batch toggle operation: selectors are combined with AND"""
+    slots = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    areas = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    days = serializers.ListField(child=serializers.IntegerField(min_value=0, max_value=6), required=False, allow_empty=False)
+    start_time = serializers.TimeField(required=False)
+    end_time = serializers.TimeField(required=False)
+    is_active = serializers.BooleanField(required=True)
+
+    def validate(self, data):
+        """Require slot ids or areas so an operation never targets the whole network by accident"""
+        if not data.get('slots') and not data.get('areas'):
+            raise serializers.ValidationError("Each operation needs 'slots' or 'areas'.")
+        return data
+
+class TimeSlotBatchToggleSerializer(serializers.Serializer):
+    """Serializer for toggling many time slots across areas at once"""
+    operations = TimeSlotBatchOperationSerializer(many=True, allow_empty=False, max_length=500)
+
+class AreaSlotMaskSerializer(serializers.Serializer):
+    """One area row of the weekly availability matrix"""
+    id = serializers.IntegerField()
+    active = serializers.ListField(child=serializers.IntegerField(min_value=0), min_length=7, max_length=7)
+
+class TimeSlotMatrixSerializer(serializers.Serializer):
+    """Compact weekly availability: bit i of each day mask refers to slots[i]"""
+    slots = serializers.ListField(child=serializers.CharField())
+    areas = AreaSlotMaskSerializer(many=True)
+
+    def validate_slots(self, value):
+        """Slots must look like 'HH:MM-HH:MM' and be unique"""
+        for slot in value:
+            try:
+                parse_slot(slot)
+            except ValueError:
+                raise serializers.ValidationError(f"Invalid slot '{slot}'. Use HH:MM-HH:MM.")
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Slots must be unique.")
+        return value
+
 class AreaListSerializer(serializers.ModelSerializer):
     """Serializer for listing areas - only shows name"""
     
@@ -68,10 +118,14 @@ class AreaDetailSerializer(serializers.ModelSerializer):
     
     def get_postcode_count(self, obj):
         """Return the count of postcodes in this area"""
+        # Use the annotation from AreaDetailView when present
+        if hasattr(obj, 'postcode_count'):
+            return obj.postcode_count
         return obj.postcodes.count()
     
-class AreaSerializer(serializers.ModelSerializer):
+class AreaSerializer(UniqueErrorMixin, serializers.ModelSerializer):
     """Serializer for creating/updating areas"""
+    unique_error = ('name', "Area '{value}' already exists.")
     
     class Meta:
         model = Area
@@ -83,45 +137,147 @@ class AreaSerializer(serializers.ModelSerializer):
         if not value or not value.strip():
             raise serializers.ValidationError("Area name is required.")
         
-        value = value.strip()
-        
-        # Check if area name already exists (for create operation)
-        if not self.instance:  # Only check during creation
-            if Area.objects.filter(name__iexact=value).exists():
-                raise serializers.ValidationError(f"Area '{value}' already exists.")
-        else:  # During update, exclude the current instance
-            if Area.objects.filter(name__iexact=value).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError(f"Area '{value}' already exists.")
-        
-        return value
+        # Case-insensitive uniqueness is enforced by the database (see UniqueErrorMixin)
+        return value.strip()
     
     def create(self, validated_data):
         """Create area and automatically create time slots"""
         area = Area.objects.create(**validated_data)
         
-        # Define time slots
-        time_slots_config = [
-            (time(8, 0), time(10, 0)),
-            (time(10, 0), time(12, 0)),
-            (time(12, 0), time(14, 0)),
-            (time(14, 0), time(18, 0)),
-        ]
-        
-        # Create time slots for each day of the week
+        # Time slots come from the default slot template, or the built-in
+        # four slots per day when no template is marked as default
         time_slots = []
-        for day in range(7):  # Monday (0) to Sunday (6)
-            for start_time, end_time in time_slots_config:
-                time_slots.append(
-                    TimeSlot(
-                        area=area,
-                        day_of_week=day,
-                        start_time=start_time,
-                        end_time=end_time,
-                        is_active=False
-                    )
+        for (day, start_time, end_time), is_active in default_grid().items():
+            time_slots.append(
+                TimeSlot(
+                    area=area,
+                    day_of_week=day,
+                    start_time=start_time,
+                    end_time=end_time,
+                    is_active=is_active
                 )
+            )
         
         # Bulk create all time slots
         TimeSlot.objects.bulk_create(time_slots)
         
-        return area
\ No newline at end of file
+        return area
+
+class SlotTemplateWindowSerializer(serializers.ModelSerializer):
+    """Serializer for a slot window inside a template"""
+    
+    class Meta:
+        model = SlotTemplateWindow
+        fields = ['id', 'day_of_week', 'start_time', 'end_time', 'is_active']
+    
+    def validate(self, data):
+        """End time must be after start time"""
+        if data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError({
+                'end_time': 'End time must be after start time.'
+            })
+        return data
+
+class SlotTemplateSerializer(UniqueErrorMixin, serializers.ModelSerializer):
+    """Serializer for slot templates; writing windows replaces the whole set"""
+    windows = SlotTemplateWindowSerializer(many=True)
+    unique_error = ('name', "Slot template '{value}' already exists.")
+    
+    class Meta:
+        model = SlotTemplate
+        fields = ['id', 'name', 'is_default', 'windows', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+    
+    def validate_name(self, value):
+        """Validate template name"""
+        if not value or not value.strip():
+            raise serializers.ValidationError("Template name is required.")
+        
+        # Case-insensitive uniqueness is enforced by the database (see UniqueErrorMixin)
+        return value.strip()
+    
+    def validate_windows(self, value):
+        """Windows must be unique per day"""
+        seen = set()
+        for window in value:
+            key = (window.get('day_of_week'), window['start_time'], window['end_time'])
+            if key in seen:
+                raise serializers.ValidationError(
+                    f"Duplicate window {window['start_time']}-{window['end_time']} for the same day."
+                )
+            seen.add(key)
+        return value
+    
+    def _save_windows(self, template, windows):
+        template.windows.all().delete()
+        SlotTemplateWindow.objects.bulk_create([
+            SlotTemplateWindow(template=template, **window) for window in windows
+        ])
+    
+    def _unset_other_defaults(self, template):
+        if template.is_default:
+            SlotTemplate.objects.filter(is_default=True).exclude(pk=template.pk).update(is_default=False)
+    
+    def create(self, validated_data):
+        windows = validated_data.pop('windows')
+        template = SlotTemplate.objects.create(**validated_data)
+        self._save_windows(template, windows)
+        self._unset_other_defaults(template)
+        return template
+    
+    def update(self, instance, validated_data):
+        windows = validated_data.pop('windows', None)
+        instance = super().update(instance, validated_data)
+        if windows is not None:
+            self._save_windows(instance, windows)
+        self._unset_other_defaults(instance)
+        return instance
+
+class SlotTemplateApplySerializer(serializers.Serializer):
+    """Serializer for applying a template to areas"""
+    areas = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    all_areas = serializers.BooleanField(default=False)
+    extra_slots = serializers.ChoiceField(choices=EXTRA_SLOTS_CHOICES, default=EXTRA_SLOTS_DEACTIVATE)
+    
+    def validate(self, data):
+        """Either a list of areas or all_areas is required"""
+        if not data.get('areas') and not data['all_areas']:
+            raise serializers.ValidationError("Provide 'areas' or set 'all_areas' to true.")
+        return data
+
+
+class AreaBroadcastSerializer(serializers.ModelSerializer):
+    """Serializer for area broadcasts and their progress"""
+    area_name = serializers.CharField(source='area.name', read_only=True)
+    progress = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = AreaBroadcast
+        fields = [
+            'id', 'area', 'area_name', 'subject', 'body', 'status', 'total_recipients', 'sent_count',
+            'progress', 'last_error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = [
+            'area', 'status', 'total_recipients', 'sent_count', 'last_error', 'created_at', 'started_at', 'finished_at'
+        ]
+    
+    def get_progress(self, obj):
+        """Percentage of recipients sent so far"""
+        if obj.status == AreaBroadcast.STATUS_COMPLETED:
+            return 100.0
+        if not obj.total_recipients:
+            return 0.0
+        return round(min(obj.sent_count * 100 / obj.total_recipients, 100), 1)
+    
+    def _validate_template(self, value):
+        try:
+            Template(value)
+        except TemplateSyntaxError as e:
+            raise serializers.ValidationError(f"Invalid template: {e}")
+        return value
+    
+    def validate_subject(self, value):
+        return self._validate_template(value)
+    
+    def validate_body(self, value):
+        return self._validate_template(value)
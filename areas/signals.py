@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from caching import bump_version, model_scope
+from .cache import bump_area_version_on_commit, bump_matrix_version_on_commit
+from .models import Area, Postcode, TimeSlot
+from .postcode_index import postcode_index
+
+
+# Index updates and cache invalidation are deferred until commit so a rolled
+# back write never leaks into the per-process postcode index, and a reader
+# cannot re-cache the old rows under the new version. The Postcode/Area
+# version is bumped right before the index update and handed to it, so this
+# worker's index stays current while every other worker reloads.
+
+@receiver(post_save, sender=Postcode)
+def postcode_saved(sender, instance, **kwargs):
+    pk, postcode, area_id = instance.pk, instance.postcode, instance.area_id
+    transaction.on_commit(lambda: postcode_index.add(pk, postcode, area_id, bump_version(model_scope(Postcode))))
+    bump_area_version_on_commit(area_id, getattr(instance, '_loaded_area_id', None))
+
+
+@receiver(post_delete, sender=Postcode)
+def postcode_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: postcode_index.remove(pk, bump_version(model_scope(Postcode))))
+    bump_area_version_on_commit(instance.area_id)
+
+
+@receiver(post_save, sender=Area)
+def area_saved(sender, instance, **kwargs):
+    pk, name = instance.pk, instance.name
+    transaction.on_commit(lambda: postcode_index.set_area_name(pk, name, bump_version(model_scope(Area))))
+    bump_area_version_on_commit(pk)
+    bump_matrix_version_on_commit()
+
+
+@receiver(post_delete, sender=Area)
+def area_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: postcode_index.remove_area(pk, bump_version(model_scope(Area))))
+    bump_area_version_on_commit(pk)
+    bump_matrix_version_on_commit()
+
+
+@receiver([post_save, post_delete], sender=TimeSlot)
+def time_slot_changed(sender, instance, **kwargs):
+    bump_area_version_on_commit(instance.area_id)
+    bump_matrix_version_on_commit()
@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cache import bump_area_version_on_commit, bump_matrix_version_on_commit
+from .models import Area, TimeSlot
+
+
+class BatchError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def operation_filter(operation):
+    """Build the slot filter for one validated operation"""
+    q = Q()
+    if operation.get('slots'):
+        q &= Q(pk__in=operation['slots'])
+    if operation.get('areas'):
+        q &= Q(area_id__in=operation['areas'])
+    if operation.get('days'):
+        q &= Q(day_of_week__in=operation['days'])
+    if operation.get('start_time') is not None:
+        q &= Q(start_time=operation['start_time'])
+    if operation.get('end_time') is not None:
+        q &= Q(end_time=operation['end_time'])
+    return q
+
+
+def _check_references(operations):
+    """Reject operations that point at areas or slots that do not exist (2 queries)"""
+    area_ids = {area_id for operation in operations for area_id in operation.get('areas') or []}
+    slot_ids = {slot_id for operation in operations for slot_id in operation.get('slots') or []}
+    known_areas = set(Area.objects.filter(pk__in=area_ids).values_list('id', flat=True)) if area_ids else set()
+    slot_areas = dict(TimeSlot.objects.filter(pk__in=slot_ids).values_list('id', 'area_id')) if slot_ids else {}
+
+    errors = {}
+    for index, operation in enumerate(operations):
+        missing_areas = sorted(set(operation.get('areas') or []) - known_areas)
+        missing_slots = sorted(set(operation.get('slots') or []) - set(slot_areas))
+        if missing_areas:
+            errors[index] = f'Unknown area(s): {missing_areas}.'
+        elif missing_slots:
+            errors[index] = f'Unknown time slot(s): {missing_slots}.'
+    if errors:
+        raise BatchError(errors)
+    return slot_areas
+
+
+def apply_batch(operations):
+    """
+    Apply toggle operations in order inside one transaction.
+
+    Each operation is a single UPDATE restricted to the rows whose state
+    actually changes, so later operations win where selectors overlap.
+    Returns one result per operation.
+    """
+    with transaction.atomic():
+        slot_areas = _check_references(operations)
+
+        now = timezone.now()
+        results = []
+        touched_areas = set()
+        for index, operation in enumerate(operations):
+            is_active = operation['is_active']
+            updated_count = TimeSlot.objects.filter(operation_filter(operation)).exclude(
+                is_active=is_active
+            ).update(is_active=is_active, updated_at=now)
+            results.append({'index': index, 'is_active': is_active, 'updated_count': updated_count})
+
+            if updated_count:
+                touched_areas.update(operation.get('areas') or [])
+                touched_areas.update(slot_areas[slot_id] for slot_id in operation.get('slots') or [])
+
+        # update() skips post_save, so invalidate cached area data here
+        if touched_areas:
+            bump_area_version_on_commit(*touched_areas)
+            bump_matrix_version_on_commit()
+
+    return results
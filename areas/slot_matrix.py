@@ -0,0 +1,123 @@
+from datetime import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import (
+    MATRIX_SCOPE, bump_area_version_on_commit, bump_matrix_version_on_commit,
+    get_cached_slot_matrix, get_version, set_cached_slot_matrix
+)
+from .models import Area, TimeSlot
+
+DAYS = range(7)
+
+
+def format_slot(start_time, end_time):
+    return f"{start_time.strftime('%H:%M')}-{end_time.strftime('%H:%M')}"
+
+
+def parse_slot(value):
+    """'08:00-10:00' -> (time(8, 0), time(10, 0))"""
+    start, end = value.split('-')
+    return time.fromisoformat(start.strip()), time.fromisoformat(end.strip())
+
+
+def build_matrix():
+    """
+    Weekly availability for every area in one query.
+
+    `slots` lists every distinct window in the network; each area carries
+    seven bitmasks (Monday first) where bit i refers to slots[i]: `defined`
+    marks the windows the area has, `active` the ones that are switched on.
+    """
+    rows = Area.objects.order_by('name', 'id').values_list(
+        'id', 'name', 'time_slots__day_of_week', 'time_slots__start_time',
+        'time_slots__end_time', 'time_slots__is_active'
+    )
+
+    areas = {}
+    windows = set()
+    slot_rows = []
+    for area_id, name, day, start_time, end_time, is_active in rows:
+        if area_id not in areas:
+            areas[area_id] = {'id': area_id, 'name': name, 'defined': [0] * 7, 'active': [0] * 7}
+        if day is None:
+            continue
+        windows.add((start_time, end_time))
+        slot_rows.append((area_id, day, (start_time, end_time), is_active))
+
+    windows = sorted(windows)
+    bit = {window: 1 << i for i, window in enumerate(windows)}
+    for area_id, day, window, is_active in slot_rows:
+        area = areas[area_id]
+        area['defined'][day] |= bit[window]
+        if is_active:
+            area['active'][day] |= bit[window]
+
+    return {
+        'slots': [format_slot(start_time, end_time) for start_time, end_time in windows],
+        'areas': list(areas.values()),
+    }
+
+
+def get_matrix():
+    """Cached matrix, rebuilt after the next slot change"""
+    version = get_version(MATRIX_SCOPE)
+    data = get_cached_slot_matrix(version)
+    if data is None:
+        data = build_matrix()
+        data['version'] = version
+        set_cached_slot_matrix(version, data)
+    return data
+
+
+class MatrixError(Exception):
+    pass
+
+
+def apply_matrix(slots, areas):
+    """
+    Set is_active from compact masks, touching only slots whose state changes.
+
+    `slots` is the list of windows the masks refer to and `areas` a list of
+    {'id', 'active': [7 masks]}. Returns the number of updated slots.
+    """
+    windows = [parse_slot(value) for value in slots]
+    desired = {}
+    for area in areas:
+        for day, mask in enumerate(area['active']):
+            for i, window in enumerate(windows):
+                desired[(area['id'], day, window)] = bool(mask & (1 << i))
+            if mask >> len(windows):
+                raise MatrixError(f"Area {area['id']}: mask for day {day} refers to unknown slots.")
+
+    with transaction.atomic():
+        existing = TimeSlot.objects.filter(area_id__in=[area['id'] for area in areas]).order_by().only(
+            'id', 'area_id', 'day_of_week', 'start_time', 'end_time', 'is_active'
+        ).select_for_update()
+
+        now = timezone.now()
+        changed = []
+        seen = set()
+        for slot in existing:
+            key = (slot.area_id, slot.day_of_week, (slot.start_time, slot.end_time))
+            if key not in desired:
+                continue
+            seen.add(key)
+            if slot.is_active != desired[key]:
+                slot.is_active = desired[key]
+                slot.updated_at = now
+                changed.append(slot)
+
+        missing = [key for key, active in desired.items() if active and key not in seen]
+        if missing:
+            area_id, day, window = missing[0]
+            raise MatrixError(f"Area {area_id} has no {format_slot(*window)} slot on day {day}.")
+
+        TimeSlot.objects.bulk_update(changed, ['is_active', 'updated_at'], batch_size=1000)
+
+        if changed:
+            bump_matrix_version_on_commit()
+            bump_area_version_on_commit(*{slot.area_id for slot in changed})
+
+    return len(changed)
@@ -0,0 +1,128 @@
+from datetime import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_area_version_on_commit, bump_matrix_version_on_commit
+from .models import SlotTemplate, TimeSlot
+
+# Used for new areas when no template is marked as default
+DEFAULT_TIME_SLOTS = [
+    (time(8, 0), time(10, 0)),
+    (time(10, 0), time(12, 0)),
+    (time(12, 0), time(14, 0)),
+    (time(14, 0), time(18, 0)),
+]
+
+EXTRA_SLOTS_KEEP = 'keep'
+EXTRA_SLOTS_DEACTIVATE = 'deactivate'
+EXTRA_SLOTS_DELETE = 'delete'
+EXTRA_SLOTS_CHOICES = [EXTRA_SLOTS_KEEP, EXTRA_SLOTS_DEACTIVATE, EXTRA_SLOTS_DELETE]
+
+# Slot ids per UPDATE/DELETE; keeps network-wide changes under bind parameter limits
+ID_CHUNK_SIZE = 1000
+
+
+def resolve_windows(windows):
+    """
+    Expand template windows into {(day, start_time, end_time): is_active}.
+
+    Windows with a day_of_week override the every-day (day_of_week=None)
+    windows for that day.
+    """
+    every_day = []
+    per_day = {}
+    for window in windows:
+        entry = (window.start_time, window.end_time, window.is_active)
+        if window.day_of_week is None:
+            every_day.append(entry)
+        else:
+            per_day.setdefault(window.day_of_week, []).append(entry)
+
+    grid = {}
+    for day in range(7):
+        for start_time, end_time, is_active in per_day.get(day, every_day):
+            grid[(day, start_time, end_time)] = is_active
+    return grid
+
+
+def default_grid():
+    """Grid for new areas: the default template, or the built-in four slots per day"""
+    template = SlotTemplate.objects.filter(is_default=True).prefetch_related('windows').first()
+    if template is not None:
+        return resolve_windows(template.windows.all())
+    return {
+        (day, start_time, end_time): False
+        for day in range(7)
+        for start_time, end_time in DEFAULT_TIME_SLOTS
+    }
+
+
+def apply_grid(grid, area_ids, extra_slots=EXTRA_SLOTS_DEACTIVATE):
+    """
+    Bring the slots of every area in area_ids in line with grid.
+
+    One SELECT of the existing slot keys, one bulk INSERT of the missing
+    slots and an UPDATE or DELETE per ID_CHUNK_SIZE slots not in the grid.
+    Slots that already match are left alone, including their is_active
+    state. With extra_slots=delete, slots holding reservations are
+    deactivated instead, so booked customers keep their slot.
+    """
+    area_ids = list(area_ids)
+    if not area_ids:
+        return {'areas': 0, 'created': 0, 'deactivated': 0, 'deleted': 0, 'unchanged': 0}
+
+    with transaction.atomic():
+        existing = TimeSlot.objects.filter(area_id__in=area_ids).order_by().values_list(
+            'id', 'area_id', 'day_of_week', 'start_time', 'end_time'
+        )
+
+        present = set()
+        extra_ids = []
+        for pk, area_id, day, start_time, end_time in existing:
+            if (day, start_time, end_time) in grid:
+                present.add((area_id, day, start_time, end_time))
+            else:
+                extra_ids.append(pk)
+
+        missing = [
+            TimeSlot(area_id=area_id, day_of_week=day, start_time=start_time, end_time=end_time, is_active=is_active)
+            for area_id in area_ids
+            for (day, start_time, end_time), is_active in grid.items()
+            if (area_id, day, start_time, end_time) not in present
+        ]
+        TimeSlot.objects.bulk_create(missing, batch_size=1000)
+
+        deactivated = deleted = 0
+        if extra_slots != EXTRA_SLOTS_KEEP:
+            now = timezone.now()
+            for start in range(0, len(extra_ids), ID_CHUNK_SIZE):
+                chunk = extra_ids[start:start + ID_CHUNK_SIZE]
+                if extra_slots == EXTRA_SLOTS_DELETE:
+                    # reserved is re-checked in the DELETE itself, so a booking made since the SELECT is kept.
+                    # _raw_delete is a single DELETE: delete() would first load every row and fire the
+                    # TimeSlot post_delete receivers, queueing two version bumps per slot. Nothing
+                    # references TimeSlot, and the areas are invalidated once below
+                    unreserved = TimeSlot.objects.filter(pk__in=chunk, reserved=0)
+                    deleted += unreserved._raw_delete(unreserved.db)
+                # Whatever is left of the chunk (all of it, or the reserved slots) is deactivated
+                deactivated += TimeSlot.objects.filter(pk__in=chunk, is_active=True).update(
+                    is_active=False, updated_at=now
+                )
+
+        # bulk_create and update() skip post_save, so invalidate cached area data here
+        if missing or deactivated or deleted:
+            bump_area_version_on_commit(*area_ids)
+            bump_matrix_version_on_commit()
+
+    return {
+        'areas': len(area_ids),
+        'created': len(missing),
+        'deactivated': deactivated,
+        'deleted': deleted,
+        'unchanged': len(present),
+    }
+
+
+def apply_template(template, area_ids, extra_slots=EXTRA_SLOTS_DEACTIVATE):
+    return apply_grid(resolve_windows(template.windows.all()), area_ids, extra_slots)
@@ -1,3 +1,663 @@
-from django.test import TestCase
+import threading
+from datetime import date, datetime, time
+from zoneinfo import ZoneInfo
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from caching import bump_version, get_cache, get_versions, model_scope
+from pagination import encode_cursor
+from .availability import expand_schedule, load_weekly_schedule
+from .broadcasts import recipients
+from .models import Area, AreaBroadcast, Postcode, SlotTemplate, TimeSlot
+from .postcode_index import PostcodeIndex, postcode_index
+from .reservations import ReservationError, release_slot, reserve_slot
+from .slot_templates import EXTRA_SLOTS_DELETE, apply_grid
+
+
+def _create_slot(capacity, reserved=0, is_active=True):
+    area = Area.objects.create(name='Reservation Area')
+    return TimeSlot.objects.create(
+        area=area, day_of_week=5, start_time='08:00', end_time='10:00',
+        is_active=is_active, capacity=capacity, reserved=reserved
+    )
+
+
+class TimeSlotReservationTests(TestCase):
+    def test_reserve_until_full(self):
+        slot = _create_slot(capacity=2)
+        reserve_slot(slot.area_id, slot.pk)
+        state = reserve_slot(slot.area_id, slot.pk)
+        self.assertEqual(state['reserved'], 2)
+        with self.assertRaises(ReservationError) as ctx:
+            reserve_slot(slot.area_id, slot.pk)
+        self.assertEqual(ctx.exception.status_code, 409)
+
+    def test_quantity_cannot_exceed_remaining_capacity(self):
+        slot = _create_slot(capacity=3, reserved=2)
+        with self.assertRaises(ReservationError):
+            reserve_slot(slot.area_id, slot.pk, quantity=2)
+        slot.refresh_from_db()
+        self.assertEqual(slot.reserved, 2)
+
+    def test_unlimited_capacity(self):
+        slot = _create_slot(capacity=None)
+        for _ in range(5):
+            reserve_slot(slot.area_id, slot.pk)
+        slot.refresh_from_db()
+        self.assertEqual(slot.reserved, 5)
+
+    def test_inactive_slot_cannot_be_reserved(self):
+        slot = _create_slot(capacity=5, is_active=False)
+        with self.assertRaises(ReservationError) as ctx:
+            reserve_slot(slot.area_id, slot.pk)
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_release_never_goes_negative(self):
+        slot = _create_slot(capacity=5, reserved=1)
+        release_slot(slot.area_id, slot.pk)
+        with self.assertRaises(ReservationError) as ctx:
+            release_slot(slot.area_id, slot.pk)
+        self.assertEqual(ctx.exception.status_code, 409)
+
+    def test_reserve_uses_single_update_on_success_path(self):
+        slot = _create_slot(capacity=5)
+        # One conditional UPDATE plus one SELECT to report the new state
+        with self.assertNumQueries(2):
+            reserve_slot(slot.area_id, slot.pk)
+
+
+class TimeSlotReservationConcurrencyTests(TransactionTestCase):
+    """Stress the conditional UPDATE from many threads, each on its own connection"""
+
+    # Every worker holds a connection at once; stay well under Postgres's
+    # default max_connections (100) while still oversubscribing the slot
+    workers = 20
+    capacity = 10
+
+    def _hammer(self, func, slot):
+        barrier = threading.Barrier(self.workers)
+        outcomes = []
+        lock = threading.Lock()
+
+        def worker():
+            barrier.wait()
+            try:
+                func(slot.area_id, slot.pk)
+                outcome = 'ok'
+            except ReservationError:
+                outcome = 'rejected'
+            except Exception as e:
+                outcome = f'error: {e}'
+            finally:
+                connection.close()
+            with lock:
+                outcomes.append(outcome)
+
+        threads = [threading.Thread(target=worker) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_reservations_never_oversubscribe(self):
+        slot = _create_slot(capacity=self.capacity)
+
+        outcomes = self._hammer(reserve_slot, slot)
+
+        slot.refresh_from_db()
+        self.assertEqual(len(outcomes), self.workers)
+        self.assertEqual(outcomes.count('ok'), self.capacity)
+        self.assertEqual(outcomes.count('rejected'), self.workers - self.capacity)
+        self.assertEqual(slot.reserved, self.capacity)
+
+    def test_concurrent_releases_never_go_negative(self):
+        slot = _create_slot(capacity=self.capacity, reserved=self.capacity)
+
+        outcomes = self._hammer(release_slot, slot)
+
+        slot.refresh_from_db()
+        self.assertEqual(outcomes.count('ok'), self.capacity)
+        self.assertEqual(slot.reserved, 0)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        for name in ('Alpha', 'Bravo', 'Charlie'):
+            Area.objects.create(name=name)
+        user = get_user_model().objects.create_user(
+            username='pager@example.com', email='pager@example.com', password='password123',
+            full_name='Pager', phone_number='+441234567890', is_email_verified=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def test_pages_follow_cursor(self):
+        first = self.client.get('/api/areas/', {'page_size': 2}).json()
+        self.assertEqual([row['name'] for row in first['results']], ['Alpha', 'Bravo'])
+        second = self.client.get('/api/areas/', {'page_size': 2, 'cursor': first['next_cursor']}).json()
+        self.assertEqual([row['name'] for row in second['results']], ['Charlie'])
+        self.assertIsNone(second['next_cursor'])
+
+    def test_cursor_with_wrong_value_types_is_rejected(self):
+        for cursor in ('not-base64!', encode_cursor(['x']), encode_cursor(['x', 'abc']), encode_cursor(['x', [1]])):
+            response = self.client.get('/api/areas/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.json(), {'error': 'Invalid cursor.'})
+
+
+class AreaDetailCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.area = Area.objects.create(name='Detail Area')
+        self.slot = TimeSlot.objects.create(area=self.area, day_of_week=0, start_time='08:00', end_time='10:00', is_active=False)
+        Postcode.objects.create(postcode='SW1A 1AA', area=self.area)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='detail@example.com', email='detail@example.com', password='password123',
+            full_name='Detail', phone_number='+441234567890', is_email_verified=True
+        ))
+
+    def _detail(self, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get(f'/api/areas/{self.area.pk}/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def _slot(self, detail):
+        return next(slot for slot in detail['time_slots'] if slot['id'] == self.slot.pk)
+
+    def test_detail_is_three_queries_then_cached(self):
+        detail = self._detail(3)
+        self.assertEqual((detail['postcode_count'], detail['postcodes'][0]['postcode']), (1, 'SW1A 1AA'))
+        self.assertEqual(self._detail(0), detail)
+
+    def test_toggling_a_slot_invalidates(self):
+        self.assertFalse(self._slot(self._detail(3))['is_active'])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/areas/{self.area.pk}/time-slots/{self.slot.pk}/toggle/', {'is_active': True}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(self._slot(self._detail(3))['is_active'])
+
+    def test_adding_a_postcode_invalidates(self):
+        self._detail(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Postcode.objects.create(postcode='E1 6AN', area=self.area)
+        detail = self._detail(3)
+        self.assertEqual(detail['postcode_count'], 2)
+        self.assertEqual(sorted(row['postcode'] for row in detail['postcodes']), ['E1 6AN', 'SW1A 1AA'])
+
+
+class TimeSlotMatrixTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.north = Area.objects.create(name='North')
+        self.south = Area.objects.create(name='South')
+        self.morning = TimeSlot.objects.create(area=self.north, day_of_week=0, start_time='08:00', end_time='10:00', is_active=True)
+        self.noon = TimeSlot.objects.create(area=self.north, day_of_week=0, start_time='12:00', end_time='14:00', is_active=False)
+        self.saturday = TimeSlot.objects.create(area=self.south, day_of_week=5, start_time='12:00', end_time='14:00', is_active=True)
+        self.admin = get_user_model().objects.create_user(
+            username='matrix@example.com', email='matrix@example.com', password='password123',
+            full_name='Matrix', phone_number='+441234567890', is_email_verified=True, is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _put(self, payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.put('/api/time-slots/matrix/', payload, format='json')
+
+    def test_masks_round_trip(self):
+        matrix = self.client.get('/api/time-slots/matrix/').json()
+        self.assertEqual(matrix['slots'], ['08:00-10:00', '12:00-14:00'])
+        self.assertEqual(matrix['areas'], [
+            {'id': self.north.pk, 'name': 'North', 'defined': [3, 0, 0, 0, 0, 0, 0], 'active': [1, 0, 0, 0, 0, 0, 0]},
+            {'id': self.south.pk, 'name': 'South', 'defined': [0, 0, 0, 0, 0, 2, 0], 'active': [0, 0, 0, 0, 0, 2, 0]},
+        ])
+        response = self._put({'slots': matrix['slots'], 'areas': matrix['areas']})
+        self.assertEqual(response.json()['updated_count'], 0)
+
+    def test_only_changed_rows_are_written(self):
+        before = dict(TimeSlot.objects.values_list('pk', 'updated_at'))
+        response = self._put({'slots': ['08:00-10:00', '12:00-14:00'], 'areas': [
+            {'id': self.north.pk, 'active': [2, 0, 0, 0, 0, 0, 0]},
+            {'id': self.south.pk, 'active': [0, 0, 0, 0, 0, 2, 0]},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated_count'], 2)
+        after = TimeSlot.objects.in_bulk()
+        self.assertEqual((after[self.morning.pk].is_active, after[self.noon.pk].is_active), (False, True))
+        self.assertEqual(after[self.saturday.pk].updated_at, before[self.saturday.pk])
+
+    def test_malformed_slot_is_rejected(self):
+        response = self._put({'slots': ['8-10'], 'areas': [{'id': self.north.pk, 'active': [1, 0, 0, 0, 0, 0, 0]}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'slots': ["Invalid slot '8-10'. Use HH:MM-HH:MM."]})
+
+    def test_window_the_area_lacks_is_rejected(self):
+        response = self._put({'slots': ['08:00-10:00'], 'areas': [{'id': self.south.pk, 'active': [0, 0, 0, 0, 0, 1, 0]}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': f'Area {self.south.pk} has no 08:00-10:00 slot on day 5.'})
+        self.assertTrue(TimeSlot.objects.get(pk=self.saturday.pk).is_active)
+
+    def test_version_changes_with_the_matrix(self):
+        version = self.client.get('/api/time-slots/matrix/').json()['version']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/time-slots/matrix/').json()['version'], version)
+        self._put({'slots': ['12:00-14:00'], 'areas': [{'id': self.north.pk, 'active': [1, 0, 0, 0, 0, 0, 0]}]})
+        matrix = self.client.get('/api/time-slots/matrix/').json()
+        self.assertNotEqual(matrix['version'], version)
+        self.assertEqual(matrix['areas'][0]['active'][0], 3)
+
+    def test_customers_can_read_but_not_apply(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='customer@example.com', email='customer@example.com', password='password123',
+            full_name='Customer', phone_number='+441234567890', is_email_verified=True
+        ))
+        self.assertEqual(self.client.get('/api/time-slots/matrix/').status_code, 200)
+        response = self._put({'slots': ['12:00-14:00'], 'areas': [{'id': self.north.pk, 'active': [1, 0, 0, 0, 0, 0, 0]}]})
+        self.assertEqual(response.status_code, 403)
+
+
+class TimeSlotBatchToggleTests(TestCase):
+    def setUp(self):
+        self.north = Area.objects.create(name='North')
+        self.south = Area.objects.create(name='South')
+        for area in (self.north, self.south):
+            for day in (0, 6):
+                TimeSlot.objects.create(area=area, day_of_week=day, start_time='08:00', end_time='10:00', is_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='batch@example.com', email='batch@example.com', password='password123',
+            full_name='Batch', phone_number='+441234567890', is_email_verified=True, is_staff=True
+        ))
+
+    def _batch(self, operations):
+        return self.client.post('/api/time-slots/batch-toggle/', {'operations': operations}, format='json')
+
+    def test_results_follow_operation_order(self):
+        sunday = TimeSlot.objects.get(area=self.north, day_of_week=6)
+        response = self._batch([
+            {'areas': [self.north.pk, self.south.pk], 'days': [6], 'is_active': False},
+            {'slots': [sunday.pk], 'is_active': True},
+            {'areas': [self.south.pk], 'days': [0], 'is_active': True},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['updated_count'], 3)
+        self.assertEqual(response.json()['results'], [
+            {'index': 0, 'is_active': False, 'updated_count': 2},
+            {'index': 1, 'is_active': True, 'updated_count': 1},
+            {'index': 2, 'is_active': True, 'updated_count': 0},
+        ])
+        self.assertEqual(list(TimeSlot.objects.filter(is_active=False).values_list('area_id', 'day_of_week')), [(self.south.pk, 6)])
+
+    def test_unknown_references_roll_back_everything(self):
+        for operation in ({'slots': [999999], 'is_active': False}, {'areas': [999999], 'is_active': False}):
+            response = self._batch([{'areas': [self.north.pk], 'is_active': False}, operation])
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json()['error'], 'No changes were applied.')
+            self.assertEqual(list(response.json()['operations']), ['1'])
+            self.assertIn('999999', response.json()['operations']['1'])
+        self.assertFalse(TimeSlot.objects.filter(is_active=False).exists())
+
+    def test_one_cache_bump_per_batch(self):
+        with mock.patch('caching.bump_version') as bump, self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self._batch([
+                {'areas': [self.north.pk], 'days': [0], 'is_active': False},
+                {'areas': [self.north.pk, self.south.pk], 'days': [6], 'is_active': False},
+            ])
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(
+            sorted(call.args[0] for call in bump.call_args_list),
+            sorted([f'area:{self.north.pk}', f'area:{self.south.pk}', 'matrix'])
+        )
+
+    def test_customers_cannot_toggle(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='customer@example.com', email='customer@example.com', password='password123',
+            full_name='Customer', phone_number='+441234567890', is_email_verified=True
+        ))
+        self.assertEqual(self._batch([{'areas': [self.north.pk], 'is_active': False}]).status_code, 403)
+
+
+class AvailabilityTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.area = Area.objects.create(name='Availability Area')
+        self.saturday = TimeSlot.objects.create(area=self.area, day_of_week=5, start_time='08:00', end_time='10:00', is_active=True)
+        self.sunday = TimeSlot.objects.create(
+            area=self.area, day_of_week=6, start_time='08:00', end_time='10:00', is_active=True, capacity=1
+        )
+        TimeSlot.objects.create(area=self.area, day_of_week=6, start_time='12:00', end_time='14:00', is_active=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            Postcode.objects.create(postcode='SW1A 1AA', area=self.area)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='availability@example.com', email='availability@example.com', password='password123',
+            full_name='Availability', phone_number='+441234567890', is_email_verified=True
+        ))
+
+    def test_offset_follows_the_clock_change(self):
+        tz = ZoneInfo('Europe/London')
+        weekly = load_weekly_schedule(self.area.pk)
+        slots = expand_schedule(weekly, date(2026, 10, 24), 2, now=datetime(2026, 10, 1, tzinfo=tz), tz=tz)
+        # British Summer Time ends at 02:00 on Sunday 25 October 2026
+        self.assertEqual([(slot['start'], slot['end']) for slot in slots], [
+            ('2026-10-24T08:00:00+01:00', '2026-10-24T10:00:00+01:00'),
+            ('2026-10-25T08:00:00+00:00', '2026-10-25T10:00:00+00:00'),
+        ])
+
+    def test_slots_already_started_are_skipped(self):
+        tz = ZoneInfo('Europe/London')
+        weekly = ((), (), (), (), (), ((time(8, 0), time(10, 0)), (time(12, 0), time(14, 0))), ())
+        now = datetime(2026, 10, 24, 8, 30, tzinfo=tz)
+        slots = expand_schedule(weekly, now.date(), 1, now=now, tz=tz)
+        self.assertEqual([slot['start'] for slot in slots], ['2026-10-24T12:00:00+01:00'])
+
+        response = self.client.get('/api/availability/', {'postcode': 'sw1a 1aa', 'days': 7})
+        self.assertEqual(response.status_code, 200)
+        now = datetime.now(tz)
+        self.assertTrue(all(datetime.fromisoformat(slot['start']) > now for slot in response.json()['slots']))
+
+    def test_fully_booked_slots_are_left_out(self):
+        params = {'postcode': 'SW1A 1AA', 'from': '2030-01-05', 'days': 2}
+        self.assertEqual(len(self.client.get('/api/availability/', params).json()['slots']), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_slot(self.area.pk, self.sunday.pk)
+        self.assertEqual([slot['date'] for slot in self.client.get('/api/availability/', params).json()['slots']], ['2030-01-05'])
+        with self.captureOnCommitCallbacks(execute=True):
+            release_slot(self.area.pk, self.sunday.pk)
+        self.assertEqual(len(self.client.get('/api/availability/', params).json()['slots']), 2)
+
+    def test_unserved_postcode_is_404(self):
+        response = self.client.get('/api/availability/', {'postcode': 'E1 6AN'})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'error': 'We do not serve this postcode yet.'})
+
+    def test_bad_from_or_days_is_400(self):
+        for params in ({'from': '2030-13-01'}, {'from': 'tomorrow'}, {'days': 'abc'}, {'days': 0}, {'days': 29}):
+            response = self.client.get('/api/availability/', {'postcode': 'SW1A 1AA', **params})
+            self.assertEqual(response.status_code, 400, params)
+
+
+class PostcodeBulkImportTests(TestCase):
+    def setUp(self):
+        self.area = Area.objects.create(name='Import Area')
+        user = get_user_model().objects.create_user(
+            username='importer@example.com', email='importer@example.com', password='password123',
+            full_name='Importer', phone_number='+441234567890', is_email_verified=True, is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def _import(self, content, name='postcodes.csv'):
+        upload = SimpleUploadedFile(name, content)
+        return self.client.post('/api/postcodes/import/', {'file': upload, 'area': str(self.area.pk)}, format='multipart')
+
+    def test_rows_that_are_not_utf8_are_rejected(self):
+        for name, content in (
+            ('postcodes.csv', b'postcode\nSW1A 1AA\n\xff\xfe1\nSW1A 2AA\n'),
+            ('postcodes.ndjson', b'{"postcode": "SW1A 1AA"}\n{"postcode": "\xff"}\n{"postcode": "SW1A 2AA"}\n'),
+        ):
+            Postcode.objects.all().delete()
+            response = self._import(content, name)
+            self.assertEqual(response.status_code, 200, name)
+            self.assertEqual(response.json()['created'], 2, name)
+            self.assertEqual(response.json()['rejects'], [
+                {'line': 3 if name.endswith('.csv') else 2, 'postcode': None, 'error': 'Malformed row.'}
+            ], name)
+
+    def test_customers_cannot_import(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='customer@example.com', email='customer@example.com', password='password123',
+            full_name='Customer', phone_number='+441234567890', is_email_verified=True
+        ))
+        self.assertEqual(self._import(b'postcode\nSW1A 1AA\n').status_code, 403)
+        self.assertFalse(Postcode.objects.exists())
+
+
+class PostcodeIndexTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        postcode_index.invalidate()
+        self.north = Area.objects.create(name='North')
+        self.south = Area.objects.create(name='South')
+        for value in ('SW1A 1AA', 'SW1A 2AA', 'SW1B 1AA'):
+            Postcode.objects.create(postcode=value, area=self.north)
+
+    def test_exact_prefix_and_outward_lookup(self):
+        result = postcode_index.lookup(' sw1a 1aa ')
+        self.assertEqual(result['match']['area'], self.north.pk)
+        self.assertEqual(result['match']['area_name'], 'North')
+        self.assertEqual(result['outward_areas'], [{'id': self.north.pk, 'name': 'North'}])
+        self.assertEqual([row['postcode'] for row in postcode_index.prefix('SW1', limit=2)], ['SW1A 1AA', 'SW1A 2AA'])
+        self.assertIsNone(postcode_index.get('E1 6AN'))
+
+    def test_own_writes_apply_without_reload(self):
+        postcode_index.get('SW1A 1AA')
+        with self.captureOnCommitCallbacks(execute=True):
+            Postcode.objects.create(postcode='E1 6AN', area=self.south)
+        with self.assertNumQueries(0):
+            self.assertEqual(postcode_index.get('E1 6AN')['area_name'], 'South')
+
+    def test_other_worker_sees_writes(self):
+        other_worker = PostcodeIndex()
+        self.assertEqual(other_worker.get('SW1A 1AA')['area'], self.north.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            postcode = Postcode.objects.get(postcode='SW1A 1AA')
+            postcode.area = self.south
+            postcode.save()
+            self.south.name = 'South East'
+            self.south.save()
+            Postcode.objects.filter(postcode='SW1B 1AA').delete()
+        self.assertEqual(other_worker.get('SW1A 1AA')['area_name'], 'South East')
+        self.assertIsNone(other_worker.get('SW1B 1AA'))
+
+    def test_bulk_writes_reload_after_version_bump(self):
+        postcode_index.get('SW1A 1AA')
+        Postcode.objects.filter(postcode='SW1A 1AA').update(area=self.south)
+        bump_version(model_scope(Postcode))
+        self.assertEqual(postcode_index.get('SW1A 1AA')['area'], self.south.pk)
+
+    def test_lookup_checks_versions_once(self):
+        postcode_index.get('SW1A 1AA')
+        with mock.patch('areas.postcode_index.get_versions', wraps=get_versions) as versions:
+            result = postcode_index.lookup('SW1A')
+        self.assertEqual(versions.call_count, 1)
+        self.assertEqual([row['postcode'] for row in result['suggestions']], ['SW1A 1AA', 'SW1A 2AA'])
+
+    def test_reload_does_not_block_readers(self):
+        index = PostcodeIndex()
+        index.get('SW1A 1AA')
+        bump_version(model_scope(Postcode))
+        acquired = []
+        build = index.load
+
+        def read():
+            if index._lock.acquire(timeout=1):
+                index._lock.release()
+                acquired.append(True)
+
+        def load(versions=None):
+            # Another thread must be able to take the read lock while the maps are rebuilt
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join()
+            build(versions)
+
+        with mock.patch.object(index, 'load', side_effect=load):
+            self.assertEqual(index.get('SW1A 1AA')['area'], self.north.pk)
+        self.assertEqual(acquired, [True])
+
+
+class AreaBroadcastTests(TestCase):
+    def setUp(self):
+        self.area = Area.objects.create(name='Broadcast Area')
+        other = Area.objects.create(name='Other Area')
+        Postcode.objects.create(postcode='SW1A 1AA', area=self.area)
+        Postcode.objects.create(postcode='E1 6AN', area=other)
+        self.customer = self._user('customer@example.com', postcode=' sw1a 1aa ')
+        self.admin = self._user('admin@example.com', is_staff=True)
+        self._user('inactive@example.com', postcode='SW1A 1AA', is_active=False)
+        self._user('elsewhere@example.com', postcode='E1 6AN')
+        self.client = APIClient()
+
+    def _user(self, email, **fields):
+        return get_user_model().objects.create_user(
+            username=email, email=email, password='password123',
+            full_name='Broadcast User', phone_number='+441234567890', is_email_verified=True, **fields
+        )
+
+    def _queue(self):
+        return self.client.post(
+            f'/api/areas/{self.area.pk}/broadcasts/',
+            {'subject': 'Closed on {{ area.name }}', 'body': 'See you soon.'},
+            format='json'
+        )
+
+    def test_recipients_are_active_users_in_the_area(self):
+        self.assertEqual(list(recipients(self.area.pk)), [(self.customer.pk, 'customer@example.com')])
+
+    def test_customers_cannot_queue_or_read_broadcasts(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self._queue().status_code, 403)
+        self.assertEqual(self.client.get(f'/api/areas/{self.area.pk}/broadcasts/').status_code, 403)
+        broadcast = AreaBroadcast.objects.create(area=self.area, subject='Hi', body='Hi', created_by=self.admin)
+        self.assertEqual(self.client.get(f'/api/broadcasts/{broadcast.pk}/').status_code, 403)
+        self.assertEqual(AreaBroadcast.objects.count(), 1)
+
+    def test_admin_queues_broadcast_for_area_recipients(self):
+        self.client.force_authenticate(self.admin)
+        response = self._queue()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['broadcast']['total_recipients'], 1)
+        broadcast_id = response.json()['broadcast']['id']
+        self.assertEqual(self.client.get(f'/api/broadcasts/{broadcast_id}/').status_code, 200)
+
+
+class ApplyGridTests(TestCase):
+    def setUp(self):
+        self.area = Area.objects.create(name='Grid Area')
+        TimeSlot.objects.filter(area=self.area).delete()
+        self.kept = TimeSlot.objects.create(area=self.area, day_of_week=0, start_time='08:00', end_time='10:00', is_active=True)
+        self.booked = TimeSlot.objects.create(
+            area=self.area, day_of_week=0, start_time='10:00', end_time='12:00', is_active=True, capacity=5, reserved=2
+        )
+        self.empty = TimeSlot.objects.create(area=self.area, day_of_week=0, start_time='12:00', end_time='14:00', is_active=True)
+        self.grid = {(0, time(8, 0), time(10, 0)): True}
+
+    def test_delete_keeps_reserved_slots_deactivated(self):
+        with mock.patch('areas.slot_templates.ID_CHUNK_SIZE', 1), self.captureOnCommitCallbacks() as callbacks:
+            summary = apply_grid(self.grid, [self.area.pk], EXTRA_SLOTS_DELETE)
+        # One area and one matrix bump for the whole call, none per deleted slot
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual((summary['deleted'], summary['deactivated'], summary['unchanged']), (1, 1, 1))
+        self.assertFalse(TimeSlot.objects.filter(pk=self.empty.pk).exists())
+        self.booked.refresh_from_db()
+        self.assertEqual((self.booked.is_active, self.booked.reserved), (False, 2))
+
+    def test_customers_cannot_apply_templates(self):
+        template = SlotTemplate.objects.create(name='Weekdays')
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(
+            username='customer@example.com', email='customer@example.com', password='password123',
+            full_name='Customer', phone_number='+441234567890', is_email_verified=True
+        ))
+        response = client.post(f'/api/slot-templates/{template.pk}/apply/', {'all_areas': True}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class UniqueNameTests(TestCase):
+    def setUp(self):
+        self.area = Area.objects.create(name='North')
+        Postcode.objects.create(postcode='SW1A 1AA', area=self.area)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='unique@example.com', email='unique@example.com', password='password123',
+            full_name='Unique', phone_number='+441234567890', is_email_verified=True, is_staff=True
+        ))
+
+    def test_duplicate_and_case_variant_area_names_are_rejected(self):
+        for name in ('North', 'north', ' NORTH '):
+            response = self.client.post('/api/areas/', {'name': name}, format='json')
+            self.assertEqual(response.status_code, 400, name)
+            self.assertEqual(response.json(), {'name': [f"Area '{name.strip()}' already exists."]})
+        self.assertEqual(Area.objects.count(), 1)
+
+    def test_duplicate_and_case_variant_postcodes_are_rejected(self):
+        for postcode in ('SW1A 1AA', 'sw1a 1aa', ' Sw1a 1Aa '):
+            response = self.client.post('/api/postcodes/', {'postcode': postcode, 'area': self.area.pk}, format='json')
+            self.assertEqual(response.status_code, 400, postcode)
+            self.assertEqual(response.json(), {'postcode': ["Postcode 'SW1A 1AA' already exists."]})
+        self.assertEqual(Postcode.objects.count(), 1)
+
+    def test_rename_to_another_case_of_own_name(self):
+        response = self.client.patch(f'/api/areas/{self.area.pk}/', {'name': 'NORTH'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.area.refresh_from_db()
+        self.assertEqual(self.area.name, 'NORTH')
+
+    def test_rename_to_another_areas_name_is_rejected(self):
+        other = Area.objects.create(name='South')
+        response = self.client.patch(f'/api/areas/{other.pk}/', {'name': 'north'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'name': ["Area 'north' already exists."]})
+
+
+class DedupeMigrationTests(TransactionTestCase):
+    before = [('areas', '0007_timeslot_capacity_timeslot_reserved')]
+    after = [('areas', '0009_name_ci_unique')]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.before)
+        self.apps = self.executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def _migrate(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        return executor.loader.project_state(self.after).apps
+
+    def test_case_variants_are_renamed_and_postcodes_merged(self):
+        OldArea = self.apps.get_model('areas', 'Area')
+        OldPostcode = self.apps.get_model('areas', 'Postcode')
+        north = OldArea.objects.create(name='North')
+        variant = OldArea.objects.create(name='north')
+        OldPostcode.objects.create(postcode='SW1A 1AA', area=north)
+        OldPostcode.objects.create(postcode='sw1a 1aa', area=north)
+        OldPostcode.objects.create(postcode=' e1 6an', area=variant)
+
+        apps = self._migrate()
+        Area = apps.get_model('areas', 'Area')
+        Postcode = apps.get_model('areas', 'Postcode')
+        self.assertEqual(dict(Area.objects.values_list('pk', 'name')), {north.pk: 'North', variant.pk: 'north (2)'})
+        self.assertEqual(
+            sorted(Postcode.objects.values_list('postcode', 'area_id')),
+            [('E1 6AN', variant.pk), ('SW1A 1AA', north.pk)]
+        )
+
+    def test_postcodes_in_different_areas_stop_the_migration(self):
+        OldArea = self.apps.get_model('areas', 'Area')
+        OldPostcode = self.apps.get_model('areas', 'Postcode')
+        OldPostcode.objects.create(postcode='SW1A 1AA', area=OldArea.objects.create(name='North'))
+        OldPostcode.objects.create(postcode='sw1a 1aa', area=OldArea.objects.create(name='South'))
+
+        with self.assertRaises(RuntimeError) as ctx:
+            self._migrate()
+        self.assertIn("postcode='sw1a 1aa'", str(ctx.exception))
+        self.assertEqual(OldPostcode.objects.count(), 2)
+        # Fixed by hand, as the error asks, so tearDown can migrate forward
+        OldPostcode.objects.filter(postcode='sw1a 1aa').delete()
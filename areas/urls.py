@@ -1,7 +1,9 @@
 from django.urls import path
 from .views import (
-    AreaListCreateView, AreaDetailView, AreaTimeSlotListView, DayTimeSlotsBulkToggleView,
-    PostcodeListCreateView, PostcodeDetailView, TimeSlotToggleView
+    AreaListCreateView, AreaDetailView, AvailabilityView, AreaTimeSlotListView, DayTimeSlotsBulkToggleView,
+    PostcodeListCreateView, PostcodeDetailView, PostcodeBulkImportView, PostcodeLookupView, TimeSlotBatchToggleView,
+    TimeSlotMatrixView, TimeSlotToggleView, TimeSlotCapacityView, TimeSlotReserveView, TimeSlotReleaseView, SlotTemplateListCreateView, SlotTemplateDetailView, SlotTemplateApplyView,
+    AreaBroadcastListCreateView, AreaBroadcastDetailView
 )
 
 urlpatterns = [
@@ -11,8 +13,24 @@ urlpatterns = [
     # Time Slot URLs
     path('areas/<int:area_pk>/time-slots/', AreaTimeSlotListView.as_view(), name='area-timeslots-list'),
     path('areas/<int:area_pk>/time-slots/<int:slot_pk>/toggle/', TimeSlotToggleView.as_view(), name='timeslot-toggle'),
+    path('areas/<int:area_pk>/time-slots/<int:slot_pk>/capacity/', TimeSlotCapacityView.as_view(), name='timeslot-capacity'),
+    path('areas/<int:area_pk>/time-slots/<int:slot_pk>/reserve/', TimeSlotReserveView.as_view(), name='timeslot-reserve'),
+    path('areas/<int:area_pk>/time-slots/<int:slot_pk>/release/', TimeSlotReleaseView.as_view(), name='timeslot-release'),
     path('areas/<int:area_pk>/time-slots/day/<int:day>/toggle/', DayTimeSlotsBulkToggleView.as_view(), name='day-timeslots-bulk-toggle'),
+    path('time-slots/batch-toggle/', TimeSlotBatchToggleView.as_view(), name='timeslot-batch-toggle'),
+    path('time-slots/matrix/', TimeSlotMatrixView.as_view(), name='timeslot-matrix'),
+    # Slot template URLs
+    path('slot-templates/', SlotTemplateListCreateView.as_view(), name='slot-template-list-create'),
+    path('slot-templates/<int:pk>/', SlotTemplateDetailView.as_view(), name='slot-template-detail'),
+    path('slot-templates/<int:pk>/apply/', SlotTemplateApplyView.as_view(), name='slot-template-apply'),
+    # Broadcast URLs
+    path('areas/<int:area_pk>/broadcasts/', AreaBroadcastListCreateView.as_view(), name='area-broadcast-list-create'),
+    path('broadcasts/<int:pk>/', AreaBroadcastDetailView.as_view(), name='area-broadcast-detail'),
+    # Availability URLs
+    path('availability/', AvailabilityView.as_view(), name='availability'),
     # Postcode URLs
     path('postcodes/', PostcodeListCreateView.as_view(), name='postcode-list-create'),
+    path('postcodes/import/', PostcodeBulkImportView.as_view(), name='postcode-bulk-import'),
+    path('postcodes/lookup/', PostcodeLookupView.as_view(), name='postcode-lookup'),
     path('postcodes/<int:pk>/', PostcodeDetailView.as_view(), name='postcode-detail'), 
 ]
\ No newline at end of file
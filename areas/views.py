@@ -2,12 +2,29 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
 from django.shortcuts import get_object_or_404
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Prefetch
+from django.utils import timezone
+from datetime import date, datetime
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from .models import Area, Postcode, TimeSlot
-from .serializers import ( AreaSerializer, AreaListSerializer, AreaDetailSerializer, PostcodeSerializer, TimeSlotSerializer, TimeSlotToggleSerializer )
+from caching import cached_get
+from importing import IMPORT_FORMATS, detect_format, iter_rows
+from pagination import LIST_QUERY_PARAMETERS, list_response
+from .models import Area, AreaBroadcast, Postcode, SlotTemplate, TimeSlot
+from .availability import MAX_DAYS, expand_schedule, get_weekly_schedule, service_time_zone
+from .broadcasts import recipients
+from .cache import bump_area_version_on_commit, bump_matrix_version_on_commit, get_area_version, get_cached_area_detail, set_cached_area_detail
+from .postcode_index import postcode_index
+from .postcode_import import PostcodeImporter
+from .serializers import ( AreaSerializer, AreaBroadcastSerializer, AreaListSerializer, AreaDetailSerializer, PostcodeSerializer, TimeSlotSerializer, TimeSlotToggleSerializer, TimeSlotMatrixSerializer, TimeSlotBatchToggleSerializer,
+    SlotTemplateSerializer, SlotTemplateApplySerializer, TimeSlotCapacitySerializer, TimeSlotReservationSerializer )
+from .reservations import ReservationError, release_slot, reserve_slot
+from .slot_batch import BatchError, apply_batch
+from .slot_matrix import MatrixError, apply_matrix, get_matrix
+from .slot_templates import apply_template
 
 # ============= AREA VIEWS =============
 
@@ -17,13 +34,14 @@ class AreaListCreateView(APIView):
     
     @swagger_auto_schema(
         tags=["Areas"],
+        manual_parameters=LIST_QUERY_PARAMETERS,
         responses={200: AreaListSerializer(many=True)}
     )
+    @cached_get('areas', models=[Area])
     def get(self, request):
         """Get all areas - returns only id and name"""
         areas = Area.objects.all()
-        serializer = AreaListSerializer(areas, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return list_response(request, areas, AreaListSerializer, keys=('name', 'id'))
     
     @swagger_auto_schema(
         tags=["Areas"],
@@ -58,9 +76,22 @@ class AreaDetailView(APIView):
     )
     def get(self, request, pk):
         """Get area details with all associated postcodes and time slots"""
-        area = get_object_or_404(Area, pk=pk)
-        serializer = AreaDetailSerializer(area)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Read the version before querying so a concurrent change can only
+        # ever orphan this entry, never leave stale data under a newer version
+        version = get_area_version(pk)
+        data = get_cached_area_detail(pk, version)
+        if data is None:
+            # Three queries in total: area with annotated count, postcodes, time slots
+            queryset = Area.objects.annotate(
+                postcode_count=Count('postcodes')
+            ).prefetch_related(
+                Prefetch('postcodes', queryset=Postcode.objects.only('id', 'postcode', 'area_id')),
+                Prefetch('time_slots', queryset=TimeSlot.objects.order_by('day_of_week', 'start_time')),
+            )
+            area = get_object_or_404(queryset, pk=pk)
+            data = AreaDetailSerializer(area).data
+            set_cached_area_detail(pk, version, data)
+        return Response(data, status=status.HTTP_200_OK)
     
     @swagger_auto_schema(
         tags=["Areas"],
@@ -139,10 +170,12 @@ class PostcodeListCreateView(APIView):
                 openapi.IN_QUERY,
                 description="Filter postcodes by area ID",
                 type=openapi.TYPE_INTEGER
-            )
+            ),
+            *LIST_QUERY_PARAMETERS
         ],
         responses={200: PostcodeSerializer(many=True)}
     )
+    @cached_get('postcodes', models=[Postcode, Area])
     def get(self, request):
         """Get all postcodes with optional area filter"""
         area_id = request.query_params.get('area')
@@ -152,8 +185,8 @@ class PostcodeListCreateView(APIView):
         else:
             postcodes = Postcode.objects.all()
         
-        serializer = PostcodeSerializer(postcodes, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        postcodes = postcodes.select_related('area')
+        return list_response(request, postcodes, PostcodeSerializer, keys=('postcode', 'id'))
     
     @swagger_auto_schema(
         tags=["Postcodes"],
@@ -176,6 +209,119 @@ class PostcodeListCreateView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class PostcodeBulkImportView(APIView):
+    """Bulk import postcodes from a CSV or NDJSON upload"""
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    @swagger_auto_schema(
+        tags=["Postcodes"],
+        manual_parameters=[
+            openapi.Parameter(
+                'file',
+                openapi.IN_FORM,
+                description="CSV with a header row or NDJSON; columns/keys: postcode, area (id or name)",
+                type=openapi.TYPE_FILE,
+                required=True
+            ),
+            openapi.Parameter(
+                'format',
+                openapi.IN_FORM,
+                description="csv or ndjson (detected from the file name when omitted)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'area',
+                openapi.IN_FORM,
+                description="Default area (id or name) for rows without one",
+                type=openapi.TYPE_STRING
+            )
+        ],
+        responses={200: openapi.Response(
+            description="Import summary",
+            examples={
+                'application/json': {
+                    'message': 'Imported 2 postcode(s), rejected 1.',
+                    'created': 2,
+                    'rejected': 1,
+                    'rejects': [{'line': 3, 'postcode': 'SW1A 1AA', 'error': "Postcode 'SW1A 1AA' already exists."}],
+                    'rejects_truncated': False
+                }
+            }
+        )}
+    )
+    def post(self, request):
+        """Stream the upload in chunks with one duplicate check and one insert per chunk"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({
+                'error': 'A file is required.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = (request.data.get('format') or detect_format(upload.name, upload.content_type)).lower()
+        if file_format not in IMPORT_FORMATS:
+            return Response({
+                'error': 'Format must be csv or ndjson.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        importer = PostcodeImporter(default_area=request.data.get('area') or None)
+        summary = importer.run(iter_rows(upload, file_format))
+        return Response({
+            'message': f"Imported {summary['created']} postcode(s), rejected {summary['rejected']}.",
+            **summary
+        }, status=status.HTTP_200_OK)
+
+class PostcodeLookupView(APIView):
+    """Resolve a (partial) postcode to its area from the in-memory index"""
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        tags=["Postcodes"],
+        manual_parameters=[
+            openapi.Parameter(
+                'q',
+                openapi.IN_QUERY,
+                description="Full or partial postcode",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'limit',
+                openapi.IN_QUERY,
+                description="Maximum number of prefix suggestions (default 10, max 50)",
+                type=openapi.TYPE_INTEGER
+            )
+        ],
+        responses={200: openapi.Response(
+            description="Lookup result",
+            examples={
+                'application/json': {
+                    'query': 'SW1A 1AA',
+                    'serviced': True,
+                    'match': {'id': 1, 'postcode': 'SW1A 1AA', 'area': 3, 'area_name': 'Westminster'},
+                    'outward_areas': [{'id': 3, 'name': 'Westminster'}],
+                    'suggestions': [{'id': 1, 'postcode': 'SW1A 1AA', 'area': 3, 'area_name': 'Westminster'}]
+                }
+            }
+        )}
+    )
+    def get(self, request):
+        """Exact, prefix and outward-code match without hitting the database"""
+        query = request.query_params.get('q', '')
+        if not query.strip():
+            return Response({
+                'error': 'Query parameter "q" is required.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 0), 50)
+        except ValueError:
+            limit = 10
+
+        result = postcode_index.lookup(query, limit=limit)
+        result['serviced'] = result['match'] is not None
+        return Response(result, status=status.HTTP_200_OK)
+
 class PostcodeDetailView(APIView):
     """Retrieve, update or delete a postcode"""
     permission_classes = [IsAuthenticated]
@@ -314,7 +460,8 @@ class TimeSlotToggleView(APIView):
         serializer = TimeSlotToggleSerializer(data=request.data)
         if serializer.is_valid():
             time_slot.is_active = serializer.validated_data['is_active']
-            time_slot.save()
+            # Only write the toggled columns so concurrent reservations are not overwritten
+            time_slot.save(update_fields=['is_active', 'updated_at'])
             
             response_serializer = TimeSlotSerializer(time_slot)
             return Response({
@@ -324,6 +471,117 @@ class TimeSlotToggleView(APIView):
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class TimeSlotCapacityView(APIView):
+    """Set the capacity of a specific time slot"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        tags=["Time Slots"],
+        request_body=TimeSlotCapacitySerializer,
+        responses={
+            200: openapi.Response(
+                description="Time slot capacity updated",
+                schema=TimeSlotSerializer()
+            )
+        }
+    )
+    def patch(self, request, area_pk, slot_pk):
+        """Set capacity; existing reservations are kept even if above the new capacity"""
+        serializer = TimeSlotCapacitySerializer(data=request.data)
+        if serializer.is_valid():
+            capacity = serializer.validated_data['capacity']
+            # update() instead of save() so concurrent reservations are not overwritten
+            updated = TimeSlot.objects.filter(pk=slot_pk, area_id=area_pk).update(
+                capacity=capacity, updated_at=timezone.now()
+            )
+            if not updated:
+                return Response({
+                    'error': 'Time slot not found.'
+                }, status=status.HTTP_404_NOT_FOUND)
+            bump_area_version_on_commit(area_pk)
+            
+            time_slot = TimeSlot.objects.get(pk=slot_pk)
+            return Response({
+                'message': 'Time slot capacity updated successfully.',
+                'time_slot': TimeSlotSerializer(time_slot).data,
+                'reserved': time_slot.reserved
+            }, status=status.HTTP_200_OK)
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class TimeSlotReserveView(APIView):
+    """Reserve places in a time slot"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        tags=["Time Slots"],
+        request_body=TimeSlotReservationSerializer,
+        responses={
+            200: openapi.Response(
+                description="Places reserved",
+                examples={
+                    'application/json': {
+                        'message': 'Time slot reserved successfully.',
+                        'time_slot': {'id': 12, 'is_active': True, 'capacity': 20, 'reserved': 8}
+                    }
+                }
+            ),
+            409: 'Time slot is fully booked'
+        }
+    )
+    def post(self, request, area_pk, slot_pk):
+        """Atomically reserve places if the slot has room"""
+        serializer = TimeSlotReservationSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                slot = reserve_slot(area_pk, slot_pk, serializer.validated_data['quantity'])
+            except ReservationError as e:
+                return Response({
+                    'error': e.message
+                }, status=e.status_code)
+            return Response({
+                'message': 'Time slot reserved successfully.',
+                'time_slot': slot
+            }, status=status.HTTP_200_OK)
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class TimeSlotReleaseView(APIView):
+    """Release previously reserved places in a time slot"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        tags=["Time Slots"],
+        request_body=TimeSlotReservationSerializer,
+        responses={
+            200: openapi.Response(
+                description="Places released",
+                examples={
+                    'application/json': {
+                        'message': 'Time slot released successfully.',
+                        'time_slot': {'id': 12, 'is_active': True, 'capacity': 20, 'reserved': 7}
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request, area_pk, slot_pk):
+        """Atomically release places"""
+        serializer = TimeSlotReservationSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                slot = release_slot(area_pk, slot_pk, serializer.validated_data['quantity'])
+            except ReservationError as e:
+                return Response({
+                    'error': e.message
+                }, status=e.status_code)
+            return Response({
+                'message': 'Time slot released successfully.',
+                'time_slot': slot
+            }, status=status.HTTP_200_OK)
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 class DayTimeSlotsBulkToggleView(APIView):
     """Activate or deactivate all time slots for a specific day"""
     permission_classes = [IsAuthenticated]
@@ -360,6 +618,9 @@ class DayTimeSlotsBulkToggleView(APIView):
             # Update all time slots for this day
             time_slots = TimeSlot.objects.filter(area=area, day_of_week=day)
             updated_count = time_slots.update(is_active=is_active)
+            # update() skips post_save, so invalidate cached area data here
+            bump_area_version_on_commit(area.pk)
+            bump_matrix_version_on_commit()
             
             day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
             day_name = day_names[day]
@@ -370,3 +631,385 @@ class DayTimeSlotsBulkToggleView(APIView):
             }, status=status.HTTP_200_OK)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class TimeSlotBatchToggleView(APIView):
+    """Activate or deactivate time slots across many areas in one transaction"""
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Time Slots"],
+        request_body=TimeSlotBatchToggleSerializer,
+        responses={
+            200: openapi.Response(
+                description="Operations applied in order",
+                examples={
+                    'application/json': {
+                        'message': '2 operation(s) applied successfully.',
+                        'updated_count': 13,
+                        'results': [
+                            {'index': 0, 'is_active': False, 'updated_count': 12},
+                            {'index': 1, 'is_active': True, 'updated_count': 1}
+                        ]
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        """Apply operations such as 'all Sunday slots in areas 1, 2, 3 off'"""
+        serializer = TimeSlotBatchToggleSerializer(data=request.data)
+        if serializer.is_valid():
+            operations = serializer.validated_data['operations']
+            try:
+                results = apply_batch(operations)
+            except BatchError as e:
+                return Response({
+                    'error': 'No changes were applied.',
+                    'operations': {str(index): error for index, error in e.errors.items()}
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response({
+                'message': f'{len(operations)} operation(s) applied successfully.',
+                'updated_count': sum(result['updated_count'] for result in results),
+                'results': results
+            }, status=status.HTTP_200_OK)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class TimeSlotMatrixView(APIView):
+    """Weekly availability of every slot in every area in compact form"""
+    permission_classes = [IsAuthenticated]
+
+    def get_permissions(self):
+        # Anyone signed in may read the matrix; applying one rewrites every area
+        if self.request.method == 'PUT':
+            return [IsAdminUser()]
+        return super().get_permissions()
+
+    @swagger_auto_schema(
+        tags=["Time Slots"],
+        responses={200: openapi.Response(
+            description="Availability matrix; bit i of each day mask refers to slots[i]",
+            examples={
+                'application/json': {
+                    'version': 1730000000000000000,
+                    'slots': ['08:00-10:00', '10:00-12:00', '12:00-14:00', '14:00-18:00'],
+                    'areas': [
+                        {'id': 1, 'name': 'Westminster', 'defined': [15, 15, 15, 15, 15, 15, 15], 'active': [3, 3, 3, 3, 3, 15, 0]}
+                    ]
+                }
+            }
+        )}
+    )
+    def get(self, request):
+        """Get the matrix for all areas (cached until the next slot change)"""
+        return Response(get_matrix(), status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        tags=["Time Slots"],
+        request_body=TimeSlotMatrixSerializer,
+        responses={
+            200: openapi.Response(
+                description="Matrix applied",
+                examples={
+                    'application/json': {
+                        'message': 'Availability matrix applied successfully.',
+                        'updated_count': 6
+                    }
+                }
+            )
+        }
+    )
+    def put(self, request):
+        """Apply a matrix, updating only the slots whose state differs"""
+        serializer = TimeSlotMatrixSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                updated_count = apply_matrix(
+                    serializer.validated_data['slots'],
+                    serializer.validated_data['areas']
+                )
+            except MatrixError as e:
+                return Response({
+                    'error': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            return Response({
+                'message': 'Availability matrix applied successfully.',
+                'updated_count': updated_count
+            }, status=status.HTTP_200_OK)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+# ============= SLOT TEMPLATE VIEWS =============
+
+class SlotTemplateListCreateView(APIView):
+    """List all slot templates or create a new one"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        tags=["Slot Templates"],
+        responses={200: SlotTemplateSerializer(many=True)}
+    )
+    def get(self, request):
+        """Get all slot templates with their windows"""
+        templates = SlotTemplate.objects.prefetch_related('windows')
+        serializer = SlotTemplateSerializer(templates, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    @swagger_auto_schema(
+        tags=["Slot Templates"],
+        request_body=SlotTemplateSerializer,
+        responses={201: SlotTemplateSerializer()}
+    )
+    def post(self, request):
+        """Create a slot template"""
+        serializer = SlotTemplateSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                with transaction.atomic():
+                    serializer.save()
+                return Response({
+                    'message': 'Slot template created successfully.',
+                    'template': serializer.data
+                }, status=status.HTTP_201_CREATED)
+            except IntegrityError:
+                return Response({
+                    'error': 'A slot template with this name already exists.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class SlotTemplateDetailView(APIView):
+    """Retrieve, update or delete a slot template"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        tags=["Slot Templates"],
+        responses={200: SlotTemplateSerializer()}
+    )
+    def get(self, request, pk):
+        """Get a slot template"""
+        template = get_object_or_404(SlotTemplate.objects.prefetch_related('windows'), pk=pk)
+        serializer = SlotTemplateSerializer(template)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+    
+    def _update(self, request, pk, partial):
+        template = get_object_or_404(SlotTemplate, pk=pk)
+        serializer = SlotTemplateSerializer(template, data=request.data, partial=partial)
+        if serializer.is_valid():
+            try:
+                with transaction.atomic():
+                    serializer.save()
+                return Response({
+                    'message': 'Slot template updated successfully.',
+                    'template': serializer.data
+                }, status=status.HTTP_200_OK)
+            except IntegrityError:
+                return Response({
+                    'error': 'A slot template with this name already exists.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    @swagger_auto_schema(
+        tags=["Slot Templates"],
+        request_body=SlotTemplateSerializer,
+        responses={200: SlotTemplateSerializer()}
+    )
+    def put(self, request, pk):
+        """Update a slot template (windows are replaced)"""
+        return self._update(request, pk, partial=False)
+    
+    @swagger_auto_schema(
+        tags=["Slot Templates"],
+        request_body=SlotTemplateSerializer,
+        responses={200: SlotTemplateSerializer()}
+    )
+    def patch(self, request, pk):
+        """Partially update a slot template"""
+        return self._update(request, pk, partial=True)
+    
+    @swagger_auto_schema(
+        tags=["Slot Templates"],
+        responses={204: 'Slot template deleted successfully'}
+    )
+    def delete(self, request, pk):
+        """Delete a slot template; slots already created from it are kept"""
+        template = get_object_or_404(SlotTemplate, pk=pk)
+        template.delete()
+        return Response({
+            'message': 'Slot template deleted successfully.'
+        }, status=status.HTTP_204_NO_CONTENT)
+
+class SlotTemplateApplyView(APIView):
+    """Apply a slot template to some or all areas in one set-based operation"""
+    permission_classes = [IsAdminUser]
+    
+    @swagger_auto_schema(
+        tags=["Slot Templates"],
+        request_body=SlotTemplateApplySerializer,
+        responses={
+            200: openapi.Response(
+                description="Template applied",
+                examples={
+                    'application/json': {
+                        'message': "Slot template 'Weekdays' applied to 3 area(s).",
+                        'areas': 3,
+                        'created': 12,
+                        'deactivated': 6,
+                        'deleted': 0,
+                        'unchanged': 72
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request, pk):
+        """Insert missing slots, deactivate or delete extra ones and leave matching slots alone"""
+        template = get_object_or_404(SlotTemplate.objects.prefetch_related('windows'), pk=pk)
+        
+        serializer = SlotTemplateApplySerializer(data=request.data)
+        if serializer.is_valid():
+            if serializer.validated_data['all_areas']:
+                area_ids = list(Area.objects.values_list('id', flat=True))
+            else:
+                requested = set(serializer.validated_data['areas'])
+                area_ids = list(Area.objects.filter(pk__in=requested).values_list('id', flat=True))
+                missing = sorted(requested - set(area_ids))
+                if missing:
+                    return Response({
+                        'error': f'Unknown area(s): {missing}.'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+            
+            summary = apply_template(template, area_ids, serializer.validated_data['extra_slots'])
+            return Response({
+                'message': f"Slot template '{template.name}' applied to {summary['areas']} area(s).",
+                **summary
+            }, status=status.HTTP_200_OK)
+        
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+# ============= BROADCAST VIEWS =============
+
+class AreaBroadcastListCreateView(APIView):
+    """List an area's broadcasts or queue a new one"""
+    permission_classes = [IsAdminUser]
+    
+    @swagger_auto_schema(
+        tags=["Broadcasts"],
+        manual_parameters=LIST_QUERY_PARAMETERS,
+        responses={200: AreaBroadcastSerializer(many=True)}
+    )
+    def get(self, request, area_pk):
+        """Get the area's broadcasts with their progress"""
+        area = get_object_or_404(Area, pk=area_pk)
+        broadcasts = AreaBroadcast.objects.filter(area=area).select_related('area')
+        return list_response(request, broadcasts, AreaBroadcastSerializer, keys=('id',))
+    
+    @swagger_auto_schema(
+        tags=["Broadcasts"],
+        request_body=AreaBroadcastSerializer,
+        responses={201: AreaBroadcastSerializer()}
+    )
+    def post(self, request, area_pk):
+        """Queue an email to every customer in the area; manage.py send_broadcasts delivers it"""
+        area = get_object_or_404(Area, pk=area_pk)
+        serializer = AreaBroadcastSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save(
+                area=area,
+                created_by=request.user,
+                total_recipients=recipients(area.pk).count()
+            )
+            return Response({
+                'message': f"Broadcast queued for {serializer.instance.total_recipients} recipient(s).",
+                'broadcast': serializer.data
+            }, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class AreaBroadcastDetailView(APIView):
+    """Retrieve a broadcast and its progress"""
+    permission_classes = [IsAdminUser]
+    
+    @swagger_auto_schema(
+        tags=["Broadcasts"],
+        responses={200: AreaBroadcastSerializer()}
+    )
+    def get(self, request, pk):
+        """Get a broadcast's status, sent count and progress"""
+        broadcast = get_object_or_404(AreaBroadcast.objects.select_related('area'), pk=pk)
+        return Response(AreaBroadcastSerializer(broadcast).data, status=status.HTTP_200_OK)
+
+# ============= AVAILABILITY VIEWS =============
+
+class AvailabilityView(APIView):
+    """Upcoming bookable slots for a postcode"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        tags=["Availability"],
+        manual_parameters=[
+            openapi.Parameter(
+                'postcode',
+                openapi.IN_QUERY,
+                description="Customer postcode",
+                type=openapi.TYPE_STRING,
+                required=True
+            ),
+            openapi.Parameter(
+                'from',
+                openapi.IN_QUERY,
+                description="First date (YYYY-MM-DD), defaults to today",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'days',
+                openapi.IN_QUERY,
+                description=f"Number of days to expand (default 7, max {MAX_DAYS})",
+                type=openapi.TYPE_INTEGER
+            )
+        ],
+        responses={200: openapi.Response(
+            description="Upcoming slots",
+            examples={
+                'application/json': {
+                    'postcode': 'SW1A 1AA',
+                    'area': {'id': 3, 'name': 'Westminster'},
+                    'from': '2025-11-03',
+                    'days': 7,
+                    'slots': [
+                        {'date': '2025-11-03', 'day_of_week': 0, 'start': '2025-11-03T08:00:00+00:00', 'end': '2025-11-03T10:00:00+00:00'}
+                    ]
+                }
+            }
+        )}
+    )
+    def get(self, request):
+        """Resolve postcode -> area -> active slots and expand them into datetimes"""
+        match = postcode_index.get(request.query_params.get('postcode', ''))
+        if match is None:
+            return Response({
+                'error': 'We do not serve this postcode yet.'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        tz = service_time_zone()
+        now = datetime.now(tz)
+        try:
+            start_date = date.fromisoformat(request.query_params['from']) if request.query_params.get('from') else now.date()
+            days = int(request.query_params.get('days', 7))
+        except ValueError:
+            return Response({
+                'error': 'Invalid "from" date or "days" value.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not (1 <= days <= MAX_DAYS):
+            return Response({
+                'error': f'Days must be between 1 and {MAX_DAYS}.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        weekly = get_weekly_schedule(match['area'])
+        return Response({
+            'postcode': match['postcode'],
+            'area': {'id': match['area'], 'name': match['area_name']},
+            'from': start_date.isoformat(),
+            'days': days,
+            'slots': expand_schedule(weekly, start_date, days, now=now, tz=tz)
+        }, status=status.HTTP_200_OK)
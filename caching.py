@@ -0,0 +1,149 @@
+import hashlib
+import os
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def get_cache():
+    """Cache backend used for versioned read-through data (see CACHES / READ_CACHE_ALIAS)"""
+    return caches[getattr(settings, 'READ_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'READ_CACHE_TIMEOUT', 60 * 60)
+
+
+# ============= VERSIONS =============
+
+def _version_key(scope):
+    return f'version:{scope}'
+
+
+def get_version(scope):
+    """Current cache version for a scope ('model:areas.area', 'area:<id>', ...)"""
+    cache = get_cache()
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never restarts at a value
+        # that still has a stale payload cached under it
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(scopes):
+    """Versions for several scopes with a single get_many round trip"""
+    cache = get_cache()
+    keys = {scope: _version_key(scope) for scope in scopes}
+    found = cache.get_many(list(keys.values()))
+    return [found[keys[scope]] if keys[scope] in found else get_version(scope) for scope in scopes]
+
+
+def bump_version(scope):
+    """Invalidate everything cached under a scope; returns the new version, or None if it was reseeded"""
+    cache = get_cache()
+    key = _version_key(scope)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+        return None
+
+
+def bump_on_commit(*scopes):
+    """Bump once the current transaction commits, so readers never re-cache old rows"""
+    scopes = set(scopes)
+    if scopes:
+        transaction.on_commit(lambda: [bump_version(scope) for scope in scopes])
+
+
+def model_scope(model):
+    return f'model:{model._meta.label_lower}'
+
+
+def bump_model_version_on_commit(*models):
+    bump_on_commit(*[model_scope(model) for model in models])
+
+
+# ============= STATS =============
+
+class CacheStats:
+    """Per-process hit/miss counters, keyed by cache name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, name, hit):
+        with self._lock:
+            counters = self._counters.setdefault(name, {'hits': 0, 'misses': 0})
+            counters['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'caches': {
+                    name: {**counters, 'hit_rate': round(counters['hits'] / ((counters['hits'] + counters['misses']) or 1), 4)}
+                    for name, counters in sorted(self._counters.items())
+                }
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+
+
+cache_stats = CacheStats()
+
+
+# ============= READ-THROUGH VIEWS =============
+
+def cached_get(name, models, bypass_params=('stream',)):
+    """
+    Cache a read-only APIView handler's 200 responses.
+
+    The key combines the current version of every model in `models` with the
+    request's query string, so any save/delete of those models (see the
+    signal handlers in each app) makes old entries unreachable. Requests with
+    any of `bypass_params` (e.g. streaming) go straight to the handler.
+    """
+    scopes = [model_scope(model) for model in models]
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            if any(param in request.query_params for param in bypass_params):
+                return handler(self, request, *args, **kwargs)
+
+            versions = '.'.join(str(version) for version in get_versions(scopes))
+            variant = '|'.join([
+                *(str(value) for value in args),
+                *(f'{key}={value}' for key, value in sorted(kwargs.items())),
+                *(f'{key}={value}' for key, value in sorted(request.query_params.lists())),
+            ])
+            # Hash the request part so keys stay short and backend-safe
+            key = f'read:{name}:{versions}:{hashlib.md5(variant.encode()).hexdigest()}'
+
+            cache = get_cache()
+            data = cache.get(key)
+            if data is not None:
+                cache_stats.record(name, hit=True)
+                return Response(data, status=status.HTTP_200_OK)
+
+            cache_stats.record(name, hit=False)
+            response = handler(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and not isinstance(response, StreamingHttpResponse):
+                cache.set(key, response.data, _timeout())
+            return response
+        return wrapper
+    return decorator
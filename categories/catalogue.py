@@ -0,0 +1,54 @@
+import hashlib
+import threading
+
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+
+from caching import get_cache, get_versions, model_scope
+from .models import Category, Item
+from .serializers import CatalogueCategorySerializer
+
+SNAPSHOT_CACHE_TIMEOUT = 24 * 60 * 60
+
+_local = {'version': None, 'snapshot': None}
+_lock = threading.Lock()
+
+
+def catalogue_version():
+    return '.'.join(str(version) for version in get_versions([model_scope(Category), model_scope(Item)]))
+
+
+def build_snapshot():
+    """Render the full catalogue to bytes with two queries"""
+    categories = Category.objects.prefetch_related(
+        Prefetch('items', queryset=Item.objects.order_by('name'))
+    )
+    body = JSONRenderer().render({
+        'categories': CatalogueCategorySerializer(categories, many=True).data,
+    })
+    # Derived from the content only, so every worker hands out the same ETag
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def get_snapshot():
+    """
+    Return (body, etag) for the current catalogue.
+
+    Kept in process memory and in the shared cache under the Category/Item
+    versions, so it is only rebuilt after a category or item changes.
+    """
+    version = catalogue_version()
+    if _local['version'] == version:
+        return _local['snapshot']
+
+    cache = get_cache()
+    key = f'catalogue:snapshot:{version}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_snapshot()
+        cache.set(key, snapshot, SNAPSHOT_CACHE_TIMEOUT)
+
+    with _lock:
+        _local['version'] = version
+        _local['snapshot'] = snapshot
+    return snapshot
@@ -0,0 +1,252 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from caching import bump_model_version_on_commit
+from .models import Category, Item, PriceHistory
+
+CHUNK_SIZE = 1000
+MAX_REJECTS = 1000
+NAME_MAX_LENGTH = Item._meta.get_field('name').max_length
+CATEGORY_MAX_LENGTH = Category._meta.get_field('name').max_length
+PRICE_FIELDS = [PriceHistory.WASHING_PRICE, PriceHistory.DRYCLEANING_PRICE]
+UPDATE_FIELDS = ['description', *PRICE_FIELDS, 'pieces', 'updated_at']
+
+
+def _text(value):
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _price(value):
+    """Decimal with at most two places and no sign, or None"""
+    try:
+        price = Decimal(_text(value))
+    except InvalidOperation:
+        return None
+    if not price.is_finite() or price < 0 or price.as_tuple().exponent < -2 or price >= Decimal('1e8'):
+        return None
+    return price.quantize(Decimal('0.01'))
+
+
+class CatalogueImporter:
+    """
+    Chunked category/item upsert.
+
+    Rows carry `category` and `name` (matched case-insensitively against
+    existing rows), `washing_price`, `drycleaning_price` and optionally
+    `description` and `pieces`. Missing categories are created. Each chunk
+    costs one SELECT of the existing items and one INSERT ... ON CONFLICT
+    DO UPDATE; rows identical to the stored item are skipped, and changed
+    prices are appended to PriceHistory.
+    """
+
+    def __init__(self, chunk_size=CHUNK_SIZE, max_rejects=MAX_REJECTS, changed_by=None):
+        self.chunk_size = chunk_size
+        self.max_rejects = max_rejects
+        self.changed_by = changed_by
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.categories_created = 0
+        self.rejected = 0
+        self.rejects = []
+        self._seen = set()
+        self._categories = None  # lower(name) -> id
+
+    def _load_categories(self):
+        self._categories = {
+            name.strip().lower(): pk for pk, name in Category.objects.values_list('id', 'name').order_by()
+        }
+
+    def _reject(self, line, name, error):
+        self.rejected += 1
+        if len(self.rejects) < self.max_rejects:
+            self.rejects.append({'line': line, 'name': name, 'error': error})
+
+    def _parse(self, line, row):
+        """Validated row dict, or None after recording a reject"""
+        name = _text(row.get('name'))
+        category = _text(row.get('category'))
+        if not name:
+            self._reject(line, None, 'Item name is required.')
+            return None
+        if len(name) > NAME_MAX_LENGTH:
+            self._reject(line, name, f'Item name must be at most {NAME_MAX_LENGTH} characters.')
+            return None
+        if not category:
+            self._reject(line, name, 'Category is required.')
+            return None
+        if len(category) > CATEGORY_MAX_LENGTH:
+            self._reject(line, name, f'Category name must be at most {CATEGORY_MAX_LENGTH} characters.')
+            return None
+
+        prices = {}
+        for field in PRICE_FIELDS:
+            prices[field] = _price(row.get(field))
+            if prices[field] is None:
+                self._reject(line, name, f'{field} must be a non-negative amount with at most two decimal places.')
+                return None
+
+        pieces = _text(row.get('pieces')) or '1'
+        if not pieces.isdigit() or int(pieces) < 1:
+            self._reject(line, name, 'Pieces must be at least 1.')
+            return None
+
+        key = (category.lower(), name.lower())
+        if key in self._seen:
+            self._reject(line, name, f"Item '{name}' is duplicated in category '{category}' in this file.")
+            return None
+        self._seen.add(key)
+
+        return {
+            'line': line,
+            'category': category,
+            'name': name,
+            'description': _text(row.get('description')) or None,
+            'pieces': int(pieces),
+            **prices,
+        }
+
+    def run(self, rows):
+        """Import an iterable of (line_number, row) pairs and return a summary"""
+        if self._categories is None:
+            self._load_categories()
+
+        chunk = []
+        for line, row in rows:
+            if row is None:
+                self._reject(line, None, 'Malformed row.')
+                continue
+            parsed = self._parse(line, row)
+            if parsed is None:
+                continue
+            chunk.append(parsed)
+            if len(chunk) >= self.chunk_size:
+                self._flush(chunk)
+                chunk = []
+
+        if chunk:
+            self._flush(chunk)
+
+        # bulk_create bypasses post_save, so invalidate lists, search and the catalogue here
+        if self.categories_created:
+            bump_model_version_on_commit(Category)
+        if self.created or self.updated:
+            bump_model_version_on_commit(Item)
+
+        return self.summary()
+
+    def _create_categories(self, names):
+        """Create categories not seen yet; only costs queries when there are new ones"""
+        missing = {}
+        for name in names:
+            missing.setdefault(name.lower(), name)
+        missing = {lower: name for lower, name in missing.items() if lower not in self._categories}
+        if not missing:
+            return
+        lost = []
+        # New categories are rare, so insert them one by one: the savepoint
+        # tells us exactly which ones this import created and which ones a
+        # concurrent importer won
+        for lower, name in missing.items():
+            try:
+                with transaction.atomic():
+                    self._categories[lower] = Category.objects.create(name=name).pk
+            except IntegrityError:
+                lost.append(lower)
+                continue
+            self.categories_created += 1
+        if lost:
+            found = Category.objects.annotate(lower_name=Lower('name')).filter(lower_name__in=lost).values_list('id', 'name')
+            for pk, name in found:
+                self._categories[name.strip().lower()] = pk
+
+    def _flush(self, chunk):
+        self._create_categories(row['category'] for row in chunk)
+        for row in chunk:
+            row['category_id'] = self._categories[row['category'].lower()]
+
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    counts = self._write(chunk)
+            except IntegrityError:
+                # A concurrent writer inserted a case variant of one of these
+                # names, which the (category, name) conflict target does not
+                # cover; re-read the existing items and retry once
+                if attempt:
+                    for row in chunk:
+                        self._reject(row['line'], row['name'], 'Item was changed concurrently; import it again.')
+                    return
+                continue
+            # Counted only once the chunk is written
+            created, updated, unchanged = counts
+            self.created += created
+            self.updated += updated
+            self.unchanged += unchanged
+            return
+
+    def _write(self, chunk):
+        """Upsert one chunk; returns (created, updated, unchanged) counts"""
+        # Candidates by lower(name) only (index lead column); the category is
+        # matched in Python, since IN on both columns multiplies the probes
+        existing = {}
+        candidates = Item.objects.annotate(lower_name=Lower('name')).filter(
+            lower_name__in={row['name'].lower() for row in chunk},
+        ).order_by().values_list('id', 'category_id', 'name', 'description', *PRICE_FIELDS, 'pieces')
+        for pk, category_id, name, description, washing_price, drycleaning_price, pieces in candidates:
+            existing[(category_id, name.lower())] = {
+                'id': pk, 'name': name, 'description': description, 'pieces': pieces,
+                PriceHistory.WASHING_PRICE: washing_price, PriceHistory.DRYCLEANING_PRICE: drycleaning_price,
+            }
+
+        created = updated = unchanged = 0
+        items = []
+        history = []
+        for row in chunk:
+            name = row['name']
+            current = existing.get((row['category_id'], name.lower()))
+            if current is None:
+                created += 1
+            else:
+                if all(row[field] == current[field] for field in ('description', *PRICE_FIELDS, 'pieces')):
+                    unchanged += 1
+                    continue
+                # Keep the stored spelling so the conflict target matches
+                name = current['name']
+                updated += 1
+                history.extend(
+                    PriceHistory(
+                        item_id=current['id'], field=field, old_price=current[field],
+                        new_price=row[field], changed_by=self.changed_by
+                    )
+                    for field in PRICE_FIELDS if row[field] != current[field]
+                )
+            items.append(Item(
+                category_id=row['category_id'], name=name, description=row['description'],
+                washing_price=row['washing_price'], drycleaning_price=row['drycleaning_price'],
+                pieces=row['pieces'],
+            ))
+
+        Item.objects.bulk_create(
+            items,
+            update_conflicts=True,
+            unique_fields=['category', 'name'],
+            update_fields=UPDATE_FIELDS,
+        )
+        PriceHistory.objects.bulk_create(history)
+        return created, updated, unchanged
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'categories_created': self.categories_created,
+            'rejected': self.rejected,
+            'rejects': sorted(self.rejects, key=lambda reject: reject['line']),
+            'rejects_truncated': self.rejected > len(self.rejects),
+        }
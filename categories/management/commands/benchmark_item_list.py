@@ -0,0 +1,61 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from categories.models import Category, Item
+from categories.serializers import ItemListSerializer, item_list_rows
+
+
+class Command(BaseCommand):
+    help = "Compare item list serialization paths. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000, help='Number of items to generate')
+        parser.add_argument('--categories', type=int, default=50, help='Number of categories to spread them over')
+        parser.add_argument('--runs', type=int, default=3, help='Timed runs per path (best is reported)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['items'], options['categories'])
+            paths = [
+                ('serializer, no select_related (before)', lambda: ItemListSerializer(Item.objects.all(), many=True).data),
+                ('serializer + select_related', lambda: ItemListSerializer(Item.objects.select_related('category'), many=True).data),
+                ('values() fast path (after)', lambda: list(item_list_rows(Item.objects.order_by('category__name', 'name', 'id')))),
+            ]
+            for label, run in paths:
+                self._measure(label, run, options['runs'])
+            transaction.set_rollback(True)
+
+    def _seed(self, count, category_count):
+        categories = Category.objects.bulk_create(
+            [Category(name=f'__bench_category_{i}') for i in range(category_count)]
+        )
+        Item.objects.bulk_create([
+            Item(
+                category=categories[i % category_count],
+                name=f'__bench_item_{i}',
+                washing_price=Decimal('2.50'),
+                drycleaning_price=Decimal('4.75'),
+            )
+            for i in range(count)
+        ], batch_size=2000)
+        self.stdout.write(f'Seeded {count} items over {category_count} categories')
+
+    def _measure(self, label, run, runs):
+        best = None
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        for _ in range(runs):
+            queries[0] = 0
+            with connection.execute_wrapper(count):
+                start = time.perf_counter()
+                rows = run()
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(f'{label:42} {best * 1000:9.1f} ms  {queries[0]:6} queries  {len(rows)} rows')
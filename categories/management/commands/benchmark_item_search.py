@@ -0,0 +1,89 @@
+import random
+import statistics
+import string
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from categories.models import Category, Item
+from categories.search import _backend_name, memory_search, search_items
+
+WORDS = [
+    'silk', 'shirt', 'duvet', 'cover', 'wool', 'coat', 'linen', 'curtain', 'cotton', 'dress',
+    'suit', 'jacket', 'blanket', 'pillow', 'leather', 'skirt', 'trousers', 'scarf', 'tie', 'gown',
+]
+QUERIES = ['duvet', 'silk shirt', 'sil', 'wool co', 'curtain', 'leather jack', 'pillow', 'gown', 'li', 'dress']
+
+
+class Command(BaseCommand):
+    help = "Time item search against a LIKE scan. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=50000, help='Number of items to generate')
+        parser.add_argument('--categories', type=int, default=100, help='Number of categories to spread them over')
+        parser.add_argument('--queries', type=int, default=1000, help='Searches to time')
+        parser.add_argument(
+            '--vocabulary', type=int, default=len(WORDS),
+            help='Distinct words in generated names/descriptions (extra ones are random)'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        with transaction.atomic():
+            words = WORDS + [
+                ''.join(rng.choice(string.ascii_lowercase) for _ in range(7))
+                for _ in range(max(0, options['vocabulary'] - len(WORDS)))
+            ]
+            self._seed(rng, words, options['items'], options['categories'])
+            if _backend_name() == 'memory':
+                start = time.perf_counter()
+                memory_search.load()
+                self.stdout.write(f'Built in-process index in {(time.perf_counter() - start) * 1000:.0f} ms')
+
+            queries = [rng.choice(QUERIES) for _ in range(options['queries'])]
+            self._measure('LIKE scan (before)', queries[:50], self._like_scan)
+            self._measure(f'search_items [{_backend_name()}], cold', queries, self._cold_search)
+            self._measure(f'search_items [{_backend_name()}], warm', queries, lambda text: search_items(text, 20))
+            transaction.set_rollback(True)
+        memory_search.invalidate()
+
+    def _seed(self, rng, words, count, category_count):
+        categories = Category.objects.bulk_create(
+            [Category(name=f'__bench {rng.choice(words)} {i}') for i in range(category_count)]
+        )
+        Item.objects.bulk_create([
+            Item(
+                category=categories[i % category_count],
+                name=f'{rng.choice(words)} {rng.choice(words)} {i}',
+                description=' '.join(rng.choice(words) for _ in range(8)),
+                washing_price=Decimal('2.50'),
+                drycleaning_price=Decimal('4.75'),
+            )
+            for i in range(count)
+        ], batch_size=2000)
+        self.stdout.write(f'Seeded {count} items over {category_count} categories')
+
+    def _like_scan(self, text):
+        condition = Q()
+        for word in text.split():
+            condition &= Q(name__icontains=word) | Q(description__icontains=word) | Q(category__name__icontains=word)
+        return list(Item.objects.select_related('category').filter(condition).order_by('name')[:20])
+
+    def _cold_search(self, text):
+        memory_search.clear_results()
+        return search_items(text, 20)
+
+    def _measure(self, label, queries, run):
+        timings = []
+        for text in queries:
+            start = time.perf_counter()
+            run(text)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f'{label:34} p50 {statistics.median(timings):8.2f} ms  p99 {p99:8.2f} ms  ({len(timings)} searches)'
+        )
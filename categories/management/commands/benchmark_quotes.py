@@ -0,0 +1,64 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from categories.models import Category, Item
+from categories.quotes import SERVICE_CHOICES, quote_baskets
+from categories.serializers import QuoteRequestSerializer
+
+
+class Command(BaseCommand):
+    help = "Time validating and quoting a batch of baskets. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=2000, help='Number of items to generate')
+        parser.add_argument('--baskets', type=int, default=5000, help='Number of baskets to quote')
+        parser.add_argument('--lines', type=int, default=6, help='Lines per basket')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        with transaction.atomic():
+            category = Category.objects.create(name='__bench_quotes')
+            items = Item.objects.bulk_create([
+                Item(
+                    category=category,
+                    name=f'__bench_item_{i}',
+                    washing_price=Decimal(rng.randrange(100, 2000)) / 100,
+                    drycleaning_price=Decimal(rng.randrange(100, 4000)) / 100,
+                    pieces=rng.randint(1, 3),
+                )
+                for i in range(options['items'])
+            ], batch_size=2000)
+            ids = [item.pk for item in items]
+            payload = {'baskets': [
+                {'reference': f'basket-{b}', 'lines': [
+                    {'item': rng.choice(ids), 'service': rng.choice(SERVICE_CHOICES), 'quantity': rng.randint(1, 5)}
+                    for _ in range(options['lines'])
+                ]}
+                for b in range(options['baskets'])
+            ]}
+
+            start = time.perf_counter()
+            serializer = QuoteRequestSerializer(data=payload)
+            serializer.is_valid(raise_exception=True)
+            validated = time.perf_counter()
+
+            queries = [0]
+
+            def count(execute, sql, params, many, context):
+                queries[0] += 1
+                return execute(sql, params, many, context)
+
+            with connection.execute_wrapper(count):
+                result = quote_baskets(serializer.validated_data['baskets'])
+            done = time.perf_counter()
+
+            self.stdout.write(
+                f"{options['baskets']} baskets x {options['lines']} lines: "
+                f"validate {(validated - start) * 1000:.0f} ms, quote {(done - validated) * 1000:.0f} ms, "
+                f"{queries[0]} queries, total {result['total']}"
+            )
+            transaction.set_rollback(True)
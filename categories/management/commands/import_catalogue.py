@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from categories.catalogue_import import CHUNK_SIZE, CatalogueImporter
+from importing import IMPORT_FORMATS, detect_format, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Upsert categories and items from a CSV or NDJSON price list (use '-' for stdin)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' to read from stdin")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help='Defaults to detection from the file extension')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or detect_format(path)
+        importer = CatalogueImporter(chunk_size=options['chunk_size'])
+
+        if path == '-':
+            summary = importer.run(iter_rows(sys.stdin.buffer, file_format))
+        else:
+            try:
+                with open(path, 'rb') as stream:
+                    summary = importer.run(iter_rows(stream, file_format))
+            except OSError as e:
+                raise CommandError(f'Cannot read {path}: {e}')
+
+        for reject in summary['rejects']:
+            self.stderr.write(f"line {reject['line']}: {reject['error']}")
+        if summary['rejects_truncated']:
+            self.stderr.write(f"... {summary['rejected'] - len(summary['rejects'])} more rejects not shown")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['created']} item(s), updated {summary['updated']}, "
+            f"unchanged {summary['unchanged']}, new categories {summary['categories_created']}, "
+            f"rejected {summary['rejected']}."
+        ))
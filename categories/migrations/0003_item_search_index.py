@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# Expression must stay identical to the item vector in categories/search.py,
+# otherwise the planner cannot use the index.
+CREATE_INDEX = """
+CREATE INDEX IF NOT EXISTS categories_item_search_idx ON categories_item USING gin (
+    (setweight(to_tsvector('simple', COALESCE(name, '')), 'A')
+     || setweight(to_tsvector('simple', COALESCE(description, '')), 'C'))
+)
+"""
+DROP_INDEX = 'DROP INDEX IF EXISTS categories_item_search_idx'
+
+
+def create_search_index(apps, schema_editor):
+    # Full-text index is Postgres only; other backends use the in-process index
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0002_item'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
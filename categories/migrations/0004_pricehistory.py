@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-16 22:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_item_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('washing_price', 'Washing price'), ('drycleaning_price', 'Drycleaning price')], max_length=32)),
+                ('old_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('new_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('changed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='categories.item')),
+            ],
+            options={
+                'verbose_name': 'Price history',
+                'verbose_name_plural': 'Price history',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['item', '-created_at'], name='categories__item_id_b8bb80_idx')],
+            },
+        ),
+    ]
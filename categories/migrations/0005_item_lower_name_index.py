@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:02
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_pricehistory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(django.db.models.functions.text.Lower('name'), models.F('category'), name='categories_item_lname_cat_idx'),
+        ),
+    ]
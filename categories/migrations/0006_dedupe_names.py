@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+def _unique_name(name, taken, max_length=255):
+    """'Name (2)', 'Name (3)', ... trimmed to fit, not case-insensitively in taken"""
+    n = 2
+    while True:
+        suffix = f' ({n})'
+        candidate = name[:max_length - len(suffix)] + suffix
+        if candidate.lower() not in taken:
+            return candidate
+        n += 1
+
+
+def dedupe(apps, schema_editor):
+    """Rename categories (globally) and items (per category) that differ only by case"""
+    Category = apps.get_model('categories', 'Category')
+    Item = apps.get_model('categories', 'Item')
+
+    rows = list(Category.objects.order_by('pk').values_list('pk', 'name'))
+    taken = {name.lower() for _, name in rows}
+    seen = set()
+    for pk, name in rows:
+        if name.lower() in seen:
+            name = _unique_name(name, taken)
+            taken.add(name.lower())
+            Category.objects.filter(pk=pk).update(name=name)
+        seen.add(name.lower())
+
+    rows = list(Item.objects.order_by('pk').values_list('pk', 'category_id', 'name'))
+    taken = {(category_id, name.lower()) for _, category_id, name in rows}
+    seen = set()
+    for pk, category_id, name in rows:
+        if (category_id, name.lower()) in seen:
+            in_category = {taken_name for taken_category, taken_name in taken if taken_category == category_id}
+            name = _unique_name(name, in_category)
+            taken.add((category_id, name.lower()))
+            Item.objects.filter(pk=pk).update(name=name)
+        seen.add((category_id, name.lower()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0005_item_lower_name_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-16 23:06
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0006_dedupe_names'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='item',
+            name='categories_item_lname_cat_idx',
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='categories_category_name_ci_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='item',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), models.F('category'), name='categories_item_name_ci_unique'),
+        ),
+    ]
@@ -1,13 +1,19 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 
 class Category(models.Model):
-    name = models.CharField(max_length=255, unique=True)
+    name = models.CharField(max_length=255, db_index=True)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # delta sync
 
     class Meta:
         ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(Lower('name'), name='categories_category_name_ci_unique'),
+        ]
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
 
@@ -22,13 +28,44 @@ class Item(models.Model):
     drycleaning_price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     pieces = models.IntegerField(default=1, help_text="Number of pieces")
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # delta sync
 
     class Meta:
         ordering = ['category', 'name']
+        # The exact pair stays unique as the catalogue import's ON CONFLICT target
         unique_together = ['category', 'name']
+        constraints = [
+            # lower(name) leads so catalogue import can look up by name alone
+            models.UniqueConstraint(Lower('name'), F('category'), name='categories_item_name_ci_unique'),
+        ]
         verbose_name = 'Item'
         verbose_name_plural = 'Items'
 
     def __str__(self):
-        return f"{self.category.name} - {self.name}"
\ No newline at end of file
+        return f"{self.category.name} - {self.name}"
+
+class PriceHistory(models.Model):
+    WASHING_PRICE = 'washing_price'
+    DRYCLEANING_PRICE = 'drycleaning_price'
+    FIELD_CHOICES = [
+        (WASHING_PRICE, 'Washing price'),
+        (DRYCLEANING_PRICE, 'Drycleaning price'),
+    ]
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='price_history')
+    field = models.CharField(max_length=32, choices=FIELD_CHOICES)
+    old_price = models.DecimalField(max_digits=10, decimal_places=2)
+    new_price = models.DecimalField(max_digits=10, decimal_places=2)
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [models.Index(fields=['item', '-created_at'])]
+        verbose_name = 'Price history'
+        verbose_name_plural = 'Price history'
+
+    def __str__(self):
+        return f"{self.item_id} {self.field}: {self.old_price} -> {self.new_price}"
@@ -0,0 +1,117 @@
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from caching import bump_model_version_on_commit
+from .models import Item, PriceHistory
+from .serializers import TWO_PLACES, item_list_row
+
+MODE_ABSOLUTE = 'absolute'
+MODE_PERCENT = 'percent'
+MODE_DELTA = 'delta'
+MODE_CHOICES = [MODE_ABSOLUTE, MODE_PERCENT, MODE_DELTA]
+
+PRICE_FIELDS = [PriceHistory.WASHING_PRICE, PriceHistory.DRYCLEANING_PRICE]
+
+# Largest price the numeric(10, 2) columns hold
+_price_field = Item._meta.get_field('washing_price')
+MAX_PRICE = Decimal(10) ** (_price_field.max_digits - _price_field.decimal_places) - Decimal('0.01')
+
+
+class PricingError(Exception):
+    pass
+
+
+def _price(value):
+    return Value(value, output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def price_expression(field, mode, value):
+    """SET expression for one price column"""
+    if mode == MODE_ABSOLUTE:
+        return _price(value)
+    if mode == MODE_PERCENT:
+        return Round(F(field) * _price(1 + value / 100), 2)
+    return F(field) + _price(value)
+
+
+def _preview(price, mode, value):
+    """Python twin of price_expression, only used to refuse out-of-range results"""
+    if mode == MODE_ABSOLUTE:
+        return value
+    if mode == MODE_PERCENT:
+        return (price * (1 + value / 100)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+    return price + value
+
+
+def adjust_prices(fields, mode, value, category_id=None, item_ids=None, changed_by=None):
+    """
+    Reprice a category or a list of items with one UPDATE.
+
+    Locks and reads the current prices, runs a single UPDATE ... SET
+    price = <expression>, re-reads the stored prices and bulk inserts a
+    PriceHistory row for every price that changed, all in one transaction
+    (four queries whatever the number of items). Returns the updated rows
+    in ItemListSerializer shape.
+    """
+    value = Decimal(value)
+    items = Item.objects.order_by()
+    if category_id is not None:
+        items = items.filter(category_id=category_id)
+    if item_ids:
+        items = items.filter(pk__in=item_ids)
+
+    with transaction.atomic():
+        old = {
+            pk: dict(zip(fields, prices))
+            for pk, *prices in items.select_for_update().values_list('id', *fields)
+        }
+        if item_ids:
+            missing = sorted(set(item_ids) - set(old))
+            if missing:
+                raise PricingError(f'Unknown item(s): {missing}.')
+        if not old:
+            return []
+
+        negative = sorted(
+            pk for pk, prices in old.items()
+            if any(_preview(price, mode, value) < 0 for price in prices.values())
+        )
+        if negative:
+            raise PricingError(f'Adjustment would make prices negative for item(s): {negative}.')
+        too_high = sorted(
+            pk for pk, prices in old.items()
+            if any(_preview(price, mode, value) > MAX_PRICE for price in prices.values())
+        )
+        if too_high:
+            raise PricingError(f'Adjustment would make prices exceed {MAX_PRICE} for item(s): {too_high}.')
+
+        Item.objects.filter(pk__in=list(old)).update(
+            **{field: price_expression(field, mode, value) for field in fields},
+            updated_at=timezone.now()
+        )
+
+        rows = Item.objects.filter(pk__in=list(old)).order_by('category__name', 'name', 'id').values_list(
+            'id', 'name', 'category__name', 'washing_price', 'drycleaning_price', 'pieces'
+        )
+        updated = []
+        history = []
+        for row in rows:
+            pk = row[0]
+            new = {PriceHistory.WASHING_PRICE: row[3], PriceHistory.DRYCLEANING_PRICE: row[4]}
+            for field in fields:
+                if new[field] != old[pk][field]:
+                    history.append(PriceHistory(
+                        item_id=pk, field=field, old_price=old[pk][field],
+                        new_price=new[field], changed_by=changed_by
+                    ))
+            updated.append(item_list_row(*row))
+        PriceHistory.objects.bulk_create(history, batch_size=1000)
+
+        # update() skips post_save, so invalidate cached lists, search and catalogue here
+        bump_model_version_on_commit(Item)
+
+    return updated
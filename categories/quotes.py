@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from .models import Item
+
+SERVICE_WASHING = 'washing'
+SERVICE_DRYCLEANING = 'drycleaning'
+SERVICE_CHOICES = [SERVICE_WASHING, SERVICE_DRYCLEANING]
+
+ZERO = Decimal('0.00')
+
+# Ids per IN query; keeps each query under SQLite's and Postgres's bind parameter limits
+ID_CHUNK_SIZE = 1000
+
+
+class QuoteError(Exception):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def load_prices(item_ids):
+    """{item_id: (name, {service: price}, pieces)} for every id, with one IN query per ID_CHUNK_SIZE ids"""
+    item_ids = sorted(item_ids)
+    prices = {}
+    for start in range(0, len(item_ids), ID_CHUNK_SIZE):
+        rows = Item.objects.filter(pk__in=item_ids[start:start + ID_CHUNK_SIZE]).order_by().values_list(
+            'id', 'name', 'washing_price', 'drycleaning_price', 'pieces'
+        )
+        for pk, name, washing_price, drycleaning_price, pieces in rows:
+            prices[pk] = (name, {SERVICE_WASHING: washing_price, SERVICE_DRYCLEANING: drycleaning_price}, pieces)
+    return prices
+
+
+def quote_baskets(baskets):
+    """
+    Price many baskets against the current catalogue in one pass.
+
+    `baskets` is a list of {'reference'?, 'lines': [{'item', 'service',
+    'quantity'}]}. Prices for every referenced item are read up front, in
+    ID_CHUNK_SIZE-id queries; totals are exact Decimals. Raises QuoteError with per-basket
+    messages when a line refers to an unknown item.
+    """
+    prices = load_prices({line['item'] for basket in baskets for line in basket['lines']})
+
+    errors = {}
+    for index, basket in enumerate(baskets):
+        missing = sorted({line['item'] for line in basket['lines'] if line['item'] not in prices})
+        if missing:
+            errors[index] = f'Unknown item(s): {missing}.'
+    if errors:
+        raise QuoteError(errors)
+
+    quotes = []
+    grand_total = ZERO
+    for basket in baskets:
+        lines = []
+        total = ZERO
+        total_pieces = 0
+        for line in basket['lines']:
+            name, service_prices, pieces = prices[line['item']]
+            unit_price = service_prices[line['service']]
+            line_total = unit_price * line['quantity']
+            line_pieces = pieces * line['quantity']
+            total += line_total
+            total_pieces += line_pieces
+            lines.append({
+                'item': line['item'],
+                'name': name,
+                'service': line['service'],
+                'quantity': line['quantity'],
+                'unit_price': str(unit_price),
+                'line_total': str(line_total),
+                'pieces': line_pieces,
+            })
+        grand_total += total
+        quotes.append({
+            'reference': basket.get('reference'),
+            'lines': lines,
+            'total_pieces': total_pieces,
+            'total': str(total),
+        })
+
+    return {'quotes': quotes, 'basket_count': len(quotes), 'total': str(grand_total)}
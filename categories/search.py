@@ -0,0 +1,299 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from caching import get_versions, model_scope
+from .models import Category, Item
+from .serializers import item_list_row
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Field weights shared by both backends (Postgres labels A/B/C)
+NAME_WEIGHT = 3
+CATEGORY_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+# Text search configuration; 'simple' keeps prefixes predictable for autocomplete
+SEARCH_CONFIG = 'simple'
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or '').lower())
+
+
+def _result_rows(rows):
+    """(id, name, category_name, washing_price, drycleaning_price, pieces, rank) -> response rows"""
+    return [{**item_list_row(*row[:6]), 'rank': row[6]} for row in rows]
+
+
+class PostgresItemSearch:
+    """
+    Full-text search with to_tsquery prefix matching.
+
+    Item name/description match through the GIN expression index created in
+    migration 0003; category names are few, so matching categories are
+    resolved separately and OR'ed in by category_id.
+    """
+
+    def _query(self, tokens):
+        from django.contrib.postgres.search import SearchQuery
+        raw = ' & '.join(f'{token}:*' for token in tokens)
+        return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+
+    def search(self, text, limit):
+        from django.contrib.postgres.search import SearchRank, SearchVector
+
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+        query = self._query(tokens)
+
+        # Must match the indexed expression exactly for the GIN index to be used
+        item_vector = SearchVector('name', weight='A', config=SEARCH_CONFIG) + SearchVector(
+            'description', weight='C', config=SEARCH_CONFIG
+        )
+        category_ids = list(
+            Category.objects.annotate(
+                vector=SearchVector('name', config=SEARCH_CONFIG)
+            ).filter(vector=query).values_list('id', flat=True)
+        )
+        rank_vector = item_vector + SearchVector('category__name', weight='B', config=SEARCH_CONFIG)
+
+        rows = Item.objects.annotate(
+            vector=item_vector,
+            rank=SearchRank(rank_vector, query),
+        ).filter(
+            Q(vector=query) | Q(category_id__in=category_ids)
+        ).order_by('-rank', 'name', 'id').values_list(
+            'id', 'name', 'category__name', 'washing_price', 'drycleaning_price', 'pieces', 'rank'
+        )[:limit]
+        return _result_rows(rows)
+
+
+class _SearchSnapshot:
+    """
+    One immutable state of the in-memory index.
+
+    Postings map token -> {item_id: weight}; a sorted token list gives prefix
+    matching by bisect. Result rows are kept alongside, so a search runs no
+    queries. Never mutated once published: updated() copies what it changes.
+    """
+
+    def __init__(self, versions=None):
+        self.versions = versions
+        self.postings = {}
+        self.tokens = []
+        self.documents = {}  # item_id -> indexed tokens
+        self.rows = {}  # item_id -> ItemListSerializer-shaped row
+        self.category_items = {}  # category_id -> frozenset of item ids
+        self._shared = frozenset()  # tokens whose posting dicts belong to the previous snapshot
+
+    @classmethod
+    def build(cls, rows, versions):
+        snapshot = cls(versions)
+        category_items = {}
+        for row in rows:
+            snapshot._index(*row)
+            category_items.setdefault(row[3], set()).add(row[0])
+        snapshot.category_items = {pk: frozenset(items) for pk, items in category_items.items()}
+        snapshot.tokens = sorted(snapshot.postings)
+        return snapshot
+
+    def updated(self, item_ids, rows, versions):
+        """Copy with item_ids re-indexed from rows (items missing from rows are dropped)"""
+        snapshot = _SearchSnapshot(versions)
+        snapshot.postings = dict(self.postings)
+        snapshot.documents = dict(self.documents)
+        snapshot.rows = dict(self.rows)
+        snapshot.category_items = dict(self.category_items)
+        snapshot._shared = set(self.postings)
+        item_ids = set(item_ids)
+        for pk in item_ids:
+            snapshot._unindex(pk)
+        for category_id, items in self.category_items.items():
+            if not items.isdisjoint(item_ids):
+                snapshot.category_items[category_id] = items - item_ids
+        for row in rows:
+            snapshot._index(*row)
+            snapshot.category_items[row[3]] = snapshot.category_items.get(row[3], frozenset()) | {row[0]}
+        snapshot.tokens = sorted(snapshot.postings)
+        snapshot._shared = frozenset()
+        return snapshot
+
+    def _own(self, token):
+        """The posting dict for token, copied first if the previous snapshot still uses it"""
+        if token in self._shared:
+            self._shared.discard(token)
+            self.postings[token] = dict(self.postings[token])
+        return self.postings.setdefault(token, {})
+
+    def _index(self, pk, name, description, category_id, category_name, washing_price, drycleaning_price, pieces):
+        document = {}
+        for tokens, weight in (
+            (tokenize(name), NAME_WEIGHT),
+            (tokenize(category_name), CATEGORY_WEIGHT),
+            (tokenize(description), DESCRIPTION_WEIGHT),
+        ):
+            for token in tokens:
+                if weight > document.get(token, 0):
+                    document[token] = weight
+        for token, weight in document.items():
+            self._own(token)[pk] = weight
+        self.documents[pk] = list(document)
+        self.rows[pk] = item_list_row(pk, name, category_name, washing_price, drycleaning_price, pieces)
+
+    def _unindex(self, pk):
+        tokens = self.documents.pop(pk, None)
+        if tokens is None:
+            return
+        self.rows.pop(pk, None)
+        for token in tokens:
+            if token not in self.postings:
+                continue
+            postings = self._own(token)
+            postings.pop(pk, None)
+            if not postings:
+                del self.postings[token]
+
+    def _matches(self, token):
+        """{item_id: score} for items with a word starting with token; exact words score double"""
+        lo = bisect.bisect_left(self.tokens, token)
+        hi = bisect.bisect_left(self.tokens, token + '\U0010ffff', lo)
+        matches = {}
+        for indexed in self.tokens[lo:hi]:
+            boost = 2 if indexed == token else 1
+            for pk, weight in self.postings[indexed].items():
+                score = weight * boost
+                if score > matches.get(pk, 0):
+                    matches[pk] = score
+        return matches
+
+    def search(self, tokens, limit):
+        # Longest (usually rarest) token first keeps the intersection small
+        scores = None
+        for token in sorted(set(tokens), key=len, reverse=True):
+            matches = self._matches(token)
+            if scores is None:
+                scores = matches
+            else:
+                if len(matches) < len(scores):
+                    scores, matches = matches, scores
+                scores = {pk: score + matches[pk] for pk, score in scores.items() if pk in matches}
+            if not scores:
+                return []
+
+        top = heapq.nlargest(limit, scores, key=scores.__getitem__)
+        top.sort(key=lambda pk: (-scores[pk], self.rows[pk]['name'], pk))
+        return [{**self.rows[pk], 'rank': float(scores[pk])} for pk in top]
+
+
+class InMemoryItemSearch:
+    """
+    Per-process inverted index for SQLite and local runs.
+
+    Searches read the current _SearchSnapshot without locking. The lock is
+    only taken to rebuild or update the index and swap in the new snapshot:
+    kept current in-process by signals and rebuilt when the Item/Category
+    cache versions show another worker changed something.
+    """
+
+    RESULT_CACHE_SIZE = 1024
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._snapshot = None
+        self._results_lock = threading.Lock()
+        self._results = OrderedDict()  # (tokens, limit) -> rows, cleared on every swap
+
+    def _current_versions(self):
+        return get_versions([model_scope(Item), model_scope(Category)])
+
+    def _select(self, queryset):
+        return queryset.order_by().values_list(
+            'id', 'name', 'description', 'category_id', 'category__name',
+            'washing_price', 'drycleaning_price', 'pieces'
+        )
+
+    def _publish(self, snapshot):
+        with self._results_lock:
+            self._snapshot = snapshot
+            self._results.clear()
+
+    def load(self):
+        with self._lock:
+            versions = self._current_versions()
+            rows = self._select(Item.objects.all()).iterator(chunk_size=5000)
+            self._publish(_SearchSnapshot.build(rows, versions))
+
+    def invalidate(self):
+        self._publish(None)
+
+    def clear_results(self):
+        with self._results_lock:
+            self._results.clear()
+
+    def update_items(self, item_ids):
+        """Re-index items (or drop deleted ones) after a commit"""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return
+            rows = list(self._select(Item.objects.filter(pk__in=item_ids)))
+            self._publish(snapshot.updated(item_ids, rows, self._current_versions()))
+
+    def category_item_ids(self, category_id):
+        snapshot = self._snapshot
+        return list(snapshot.category_items.get(category_id, ())) if snapshot else []
+
+    def _current_snapshot(self):
+        versions = self._current_versions()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.versions != versions:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.versions != versions:
+                    self.load()
+                    snapshot = self._snapshot
+        return snapshot
+
+    def search(self, text, limit):
+        tokens = tokenize(text)
+        if not tokens:
+            return []
+        snapshot = self._current_snapshot()
+        key = (tuple(tokens), limit)
+        with self._results_lock:
+            cached = self._results.get(key) if snapshot is self._snapshot else None
+            if cached is not None:
+                self._results.move_to_end(key)
+                return cached
+        rows = snapshot.search(tokens, limit)
+        with self._results_lock:
+            # Only cache results computed from the snapshot that is still current
+            if snapshot is self._snapshot:
+                self._results[key] = rows
+                if len(self._results) > self.RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+        return rows
+
+
+def _backend_name():
+    configured = getattr(settings, 'ITEM_SEARCH_BACKEND', 'auto')
+    if configured == 'auto':
+        return 'postgres' if connection.vendor == 'postgresql' else 'memory'
+    return configured
+
+
+memory_search = InMemoryItemSearch()
+postgres_search = PostgresItemSearch()
+
+
+def search_items(text, limit=20):
+    backend = postgres_search if _backend_name() == 'postgres' else memory_search
+    return backend.search(text, limit)
@@ -1,5 +1,10 @@
+from decimal import Decimal
 from rest_framework import serializers
-from .models import Category, Item
+from integrity import UniqueErrorMixin
+from .models import Category, Item, PriceHistory
+from .quotes import SERVICE_CHOICES
+
+TWO_PLACES = Decimal('0.01')
 
 class ItemListSerializer(serializers.ModelSerializer):
     """Simplified serializer for listing items"""
@@ -9,8 +14,9 @@ class ItemListSerializer(serializers.ModelSerializer):
         model = Item
         fields = ['id', 'name', 'category_name', 'washing_price', 'drycleaning_price', 'pieces']
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(UniqueErrorMixin, serializers.ModelSerializer):
     """Serializer for Category CRUD operations"""
+    unique_error = ('name', "Category '{value}' already exists.")
     items = ItemListSerializer(many=True, read_only=True)
 
     class Meta:
@@ -23,17 +29,8 @@ class CategorySerializer(serializers.ModelSerializer):
         if not value or not value.strip():
             raise serializers.ValidationError("Category name is required.")
         
-        value = value.strip()
-        
-        # Check if category name already exists (for create operation)
-        if not self.instance:  # Only check during creation
-            if Category.objects.filter(name__iexact=value).exists():
-                raise serializers.ValidationError(f"Category '{value}' already exists.")
-        else:  # During update, exclude the current instance
-            if Category.objects.filter(name__iexact=value).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError(f"Category '{value}' already exists.")
-        
-        return value
+        # Case-insensitive uniqueness is enforced by the database (see UniqueErrorMixin)
+        return value.strip()
 
 class CategoryDetailSerializer(serializers.ModelSerializer):
     """Detailed serializer for category with all items"""
@@ -50,15 +47,18 @@ class CategoryListSerializer(serializers.ModelSerializer):
         model = Category
         fields = ['id', 'name']
 
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(UniqueErrorMixin, serializers.ModelSerializer):
     """Serializer for Item CRUD operations"""
     category_name = serializers.CharField(source='category.name', read_only=True)
+    unique_error = ('name', "Item '{value}' already exists in this category.")
     
     class Meta:
         model = Item
         fields = ['id', 'category', 'category_name', 'name', 'description', 
                   'washing_price', 'drycleaning_price', 'pieces', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
+        # (category, name) uniqueness is enforced case-insensitively by the database
+        validators = []
     
     def validate_name(self, value):
         """Validate item name"""
@@ -83,25 +83,7 @@ class ItemSerializer(serializers.ModelSerializer):
         if value < 1:
             raise serializers.ValidationError("Pieces must be at least 1.")
         return value
-    
-    def validate(self, data):
-        """Validate unique constraint for category and name"""
-        category = data.get('category')
-        name = data.get('name', '').strip()
-        
-        # Check if item with same name exists in this category
-        if not self.instance:  # Only check during creation
-            if Item.objects.filter(category=category, name__iexact=name).exists():
-                raise serializers.ValidationError({
-                    'name': f"Item '{name}' already exists in this category."
-                })
-        else:  # During update, exclude the current instance
-            if Item.objects.filter(category=category, name__iexact=name).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError({
-                    'name': f"Item '{name}' already exists in this category."
-                })
-        
-        return data
+
 
 class ItemListSerializer(serializers.ModelSerializer):
     """Simplified serializer for listing items"""
@@ -111,8 +93,9 @@ class ItemListSerializer(serializers.ModelSerializer):
         model = Item
         fields = ['id', 'name', 'category_name', 'washing_price', 'drycleaning_price', 'pieces']
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(UniqueErrorMixin, serializers.ModelSerializer):
     """Serializer for Category CRUD operations"""
+    unique_error = ('name', "Category '{value}' already exists.")
     
     class Meta:
         model = Category
@@ -124,14 +107,92 @@ class CategorySerializer(serializers.ModelSerializer):
         if not value or not value.strip():
             raise serializers.ValidationError("Category name is required.")
         
-        value = value.strip()
-        
-        # Check if category name already exists (for create operation)
-        if not self.instance:  # Only check during creation
-            if Category.objects.filter(name__iexact=value).exists():
-                raise serializers.ValidationError(f"Category '{value}' already exists.")
-        else:  # During update, exclude the current instance
-            if Category.objects.filter(name__iexact=value).exclude(pk=self.instance.pk).exists():
-                raise serializers.ValidationError(f"Category '{value}' already exists.")
-        
-        return value
\ No newline at end of file
+        # Case-insensitive uniqueness is enforced by the database (see UniqueErrorMixin)
+        return value.strip()
+
+class CatalogueItemSerializer(serializers.ModelSerializer):
+    """Item as published in the catalogue snapshot"""
+    
+    class Meta:
+        model = Item
+        fields = ['id', 'name', 'description', 'washing_price', 'drycleaning_price', 'pieces']
+
+class CatalogueCategorySerializer(serializers.ModelSerializer):
+    """Category with nested items for the catalogue snapshot"""
+    items = CatalogueItemSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Category
+        fields = ['id', 'name', 'description', 'items']
+
+class ItemSearchResultSerializer(ItemListSerializer):
+    """Item search hit with its relevance"""
+    rank = serializers.FloatField(read_only=True)
+    
+    class Meta(ItemListSerializer.Meta):
+        fields = ItemListSerializer.Meta.fields + ['rank']
+
+class ItemSearchQuerySerializer(serializers.Serializer):
+    """Query parameters for item search"""
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(required=False, default=20, min_value=1, max_value=100)
+
+class PriceAdjustmentSerializer(serializers.Serializer):
+    """Bulk price change for a category or a list of items"""
+    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False)
+    item_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    fields = serializers.MultipleChoiceField(choices=PriceHistory.FIELD_CHOICES)
+    mode = serializers.ChoiceField(choices=['absolute', 'percent', 'delta'])
+    value = serializers.DecimalField(max_digits=10, decimal_places=2)
+    
+    def validate(self, data):
+        """Validate target and value"""
+        if not data.get('category') and not data.get('item_ids'):
+            raise serializers.ValidationError("Provide a category or item_ids.")
+        if not data['fields']:
+            raise serializers.ValidationError({'fields': "Select at least one price."})
+        if data['mode'] == 'absolute' and data['value'] < 0:
+            raise serializers.ValidationError({'value': "Price cannot be negative."})
+        if data['mode'] == 'percent' and data['value'] < -100:
+            raise serializers.ValidationError({'value': "Percentage cannot be below -100."})
+        return data
+
+class QuoteLineSerializer(serializers.Serializer):
+    """One basket line"""
+    item = serializers.IntegerField(min_value=1)
+    service = serializers.ChoiceField(choices=SERVICE_CHOICES)
+    quantity = serializers.IntegerField(min_value=1, max_value=10000)
+
+class QuoteBasketSerializer(serializers.Serializer):
+    """A basket to quote; reference is echoed back"""
+    reference = serializers.CharField(max_length=100, required=False)
+    lines = QuoteLineSerializer(many=True, allow_empty=False, max_length=500)
+
+class QuoteRequestSerializer(serializers.Serializer):
+    """One or many baskets"""
+    baskets = QuoteBasketSerializer(many=True, allow_empty=False, max_length=10000)
+
+def item_list_row(pk, name, category_name, washing_price, drycleaning_price, pieces):
+    """ItemListSerializer output for one row of plain values"""
+    return {
+        'id': pk,
+        'name': name,
+        'category_name': category_name,
+        # Match DecimalField's string output
+        'washing_price': str(washing_price.quantize(TWO_PLACES)),
+        'drycleaning_price': str(drycleaning_price.quantize(TWO_PLACES)),
+        'pieces': pieces,
+    }
+
+def item_list_rows(queryset, chunk_size=2000):
+    """
+    values()-based equivalent of ItemListSerializer for large lists.
+
+    Reads category_name through the same join as the sort, in one query,
+    and skips the per-row ModelSerializer field machinery.
+    """
+    rows = queryset.values_list(
+        'id', 'name', 'category__name', 'washing_price', 'drycleaning_price', 'pieces'
+    ).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield item_list_row(*row)
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from caching import bump_model_version_on_commit
+from .models import Category, Item
+from .search import memory_search
+
+
+# Version bumps are deferred until commit so a reader cannot re-cache the
+# old rows under the new version.
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    bump_model_version_on_commit(Category)
+
+
+@receiver([post_save, post_delete], sender=Item)
+def item_changed(sender, instance, **kwargs):
+    bump_model_version_on_commit(Item)
+
+
+# Keep this worker's search index current; other workers rebuild theirs when
+# they see the version bumps above.
+
+@receiver([post_save, post_delete], sender=Item)
+def item_search_changed(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: memory_search.update_items([pk]))
+
+
+@receiver(post_save, sender=Category)
+def category_search_changed(sender, instance, created, **kwargs):
+    if not created:
+        pk = instance.pk
+        transaction.on_commit(lambda: memory_search.update_items(memory_search.category_item_ids(pk)))
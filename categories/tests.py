@@ -1,3 +1,401 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from caching import cache_stats, get_cache
+from . import quotes
+from .catalogue_import import CatalogueImporter
+from .models import Category, Item, PriceHistory
+from .search import InMemoryItemSearch, _backend_name, memory_search
+
+
+class CatalogueImportTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username='catalogue@example.com', email='catalogue@example.com', password='password123',
+            full_name='Catalogue', phone_number='+441234567890', is_email_verified=True, is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def _import(self, content):
+        upload = SimpleUploadedFile('catalogue.csv', content)
+        response = self.client.post('/api/catalogue/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_customers_cannot_import(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='customer@example.com', email='customer@example.com', password='password123',
+            full_name='Customer', phone_number='+441234567890', is_email_verified=True
+        ))
+        upload = SimpleUploadedFile('catalogue.csv', b'category,name,washing_price,drycleaning_price\nShirts,Shirt,1.00,2.00\n')
+        response = self.client.post('/api/catalogue/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Item.objects.exists())
+
+    def test_reimport_counts_created_updated_and_unchanged(self):
+        header = b'category,name,washing_price,drycleaning_price\n'
+        summary = self._import(header + b'Shirts,Shirt,1.00,2.00\nShirts,Suit,5.00,9.00\n')
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (2, 0, 0))
+
+        summary = self._import(header + b'Shirts,shirt,1.00,2.50\nShirts,Suit,5.00,9.00\nShirts,Tie,1.00,1.00\n')
+        self.assertEqual((summary['created'], summary['updated'], summary['unchanged']), (1, 1, 1))
+        self.assertEqual(Item.objects.count(), 3)
+        # The stored spelling is kept
+        self.assertEqual(str(Item.objects.get(name='Shirt').drycleaning_price), '2.50')
+
+    def test_price_changes_are_recorded(self):
+        header = b'category,name,washing_price,drycleaning_price\n'
+        self._import(header + b'Shirts,Shirt,1.00,2.00\n')
+        self.assertFalse(PriceHistory.objects.exists())
+
+        self._import(header + b'Shirts,Shirt,1.25,2.00\n')
+        history = PriceHistory.objects.get()
+        self.assertEqual(history.item, Item.objects.get(name='Shirt'))
+        self.assertEqual(history.field, PriceHistory.WASHING_PRICE)
+        self.assertEqual((str(history.old_price), str(history.new_price)), ('1.00', '1.25'))
+
+    def test_conflicting_chunk_is_retried_then_rejected(self):
+        rows = [(2, {'category': 'Shirts', 'name': 'Shirt', 'washing_price': '1.00', 'drycleaning_price': '2.00'})]
+        with mock.patch.object(CatalogueImporter, '_write', side_effect=[IntegrityError, (1, 0, 0)]):
+            summary = CatalogueImporter().run(rows)
+        self.assertEqual((summary['created'], summary['rejects']), (1, []))
+
+        with mock.patch.object(CatalogueImporter, '_write', side_effect=IntegrityError):
+            summary = CatalogueImporter().run(rows)
+        self.assertEqual(summary['created'], 0)
+        self.assertEqual(summary['rejects'], [{'line': 2, 'name': 'Shirt', 'error': 'Item was changed concurrently; import it again.'}])
+
+    def test_rows_that_are_not_utf8_are_rejected(self):
+        content = b'category,name,washing_price,drycleaning_price\nShirts,Shirt,1.00,2.00\nShirts,\xffBad,1.00,2.00\n'
+        upload = SimpleUploadedFile('catalogue.csv', content)
+        response = self.client.post('/api/catalogue/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(response.json()['rejects'], [{'line': 3, 'name': None, 'error': 'Malformed row.'}])
+
+    def test_categories_created_by_another_importer_are_not_counted(self):
+        importer = CatalogueImporter()
+        importer._load_categories()
+        # Created concurrently, after this importer loaded the category names
+        Category.objects.create(name='shirts')
+        rows = [
+            (2, {'category': 'Shirts', 'name': 'Shirt', 'washing_price': '1.00', 'drycleaning_price': '2.00'}),
+            (3, {'category': 'Suits', 'name': 'Suit', 'washing_price': '5.00', 'drycleaning_price': '9.00'}),
+        ]
+        summary = importer.run(rows)
+        self.assertEqual(summary['categories_created'], 1)
+        self.assertEqual(summary['created'], 2)
+        self.assertEqual(Category.objects.count(), 2)
+        self.assertEqual(Item.objects.get(name='Shirt').category.name, 'shirts')
+
+
+class ItemPriceAdjustTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Shirts')
+        self.item = Item.objects.create(category=category, name='Shirt', washing_price='10.00', drycleaning_price='20.00')
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='pricing@example.com', email='pricing@example.com', password='password123',
+            full_name='Pricing', phone_number='+441234567890', is_email_verified=True, is_staff=True
+        ))
+
+    def _adjust(self, mode, value):
+        return self.client.post('/api/items/prices/adjust/', {
+            'item_ids': [self.item.pk], 'fields': ['washing_price', 'drycleaning_price'], 'mode': mode, 'value': value
+        }, format='json')
+
+    def test_percent_adjustment(self):
+        response = self._adjust('percent', '12.5')
+        self.assertEqual(response.status_code, 200)
+        self.item.refresh_from_db()
+        self.assertEqual((str(self.item.washing_price), str(self.item.drycleaning_price)), ('11.25', '22.50'))
+        self.assertEqual(PriceHistory.objects.count(), 2)
+
+    def test_results_beyond_column_range_are_rejected(self):
+        Item.objects.filter(pk=self.item.pk).update(drycleaning_price='200.00')
+        for mode, value in (('percent', '99999999'), ('delta', '99999990.00')):
+            response = self._adjust(mode, value)
+            self.assertEqual(response.status_code, 400, mode)
+            self.assertIn('exceed', response.json()['error'])
+        self.item.refresh_from_db()
+        self.assertEqual(str(self.item.washing_price), '10.00')
+
+    def test_customers_cannot_reprice(self):
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='customer@example.com', email='customer@example.com', password='password123',
+            full_name='Customer', phone_number='+441234567891', is_email_verified=True
+        ))
+        self.assertEqual(self._adjust('percent', '10').status_code, 403)
+
+
+class QuoteTests(TestCase):
+    def test_price_lookup_is_chunked(self):
+        category = Category.objects.create(name='Shirts')
+        items = Item.objects.bulk_create([
+            Item(category=category, name=f'Item {i}', washing_price='1.50', drycleaning_price='3.00') for i in range(5)
+        ])
+        baskets = [{'lines': [{'item': item.pk, 'service': 'washing', 'quantity': 2}]} for item in items]
+        with mock.patch.object(quotes, 'ID_CHUNK_SIZE', 2), self.assertNumQueries(3):
+            result = quotes.quote_baskets(baskets)
+        self.assertEqual(result['total'], '15.00')
+
+
+class InMemoryItemSearchTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        memory_search.invalidate()
+        shirts = Category.objects.create(name='Shirts')
+        silkwear = Category.objects.create(name='Silk wear')
+        self.shirt = Item.objects.create(category=shirts, name='Silk shirt')
+        self.blouse = Item.objects.create(category=shirts, name='Blouse', description='Pure silk')
+        self.scarf = Item.objects.create(category=silkwear, name='Scarf')
+
+    def _names(self, index, text):
+        return [(row['name'], row['rank']) for row in index.search(text, 20)]
+
+    def test_name_beats_category_beats_description(self):
+        self.assertEqual(self._names(memory_search, 'silk'), [('Silk shirt', 6.0), ('Scarf', 4.0), ('Blouse', 2.0)])
+        # Prefix matches score half an exact word
+        self.assertEqual(self._names(memory_search, 'sil'), [('Silk shirt', 3.0), ('Scarf', 2.0), ('Blouse', 1.0)])
+        self.assertEqual(self._names(memory_search, 'silk sh'), [('Silk shirt', 9.0), ('Blouse', 4.0)])
+
+    def test_own_changes_apply_without_reload(self):
+        memory_search.search('silk', 20)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.scarf.name = 'Silk scarf'
+            self.scarf.save()
+            self.blouse.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._names(memory_search, 'silk'), [('Silk scarf', 6.0), ('Silk shirt', 6.0)])
+        self.assertEqual(memory_search.category_item_ids(self.shirt.category_id), [self.shirt.pk])
+
+    def test_other_worker_rebuilds_after_version_change(self):
+        other_worker = InMemoryItemSearch()
+        self.assertEqual(len(other_worker.search('silk', 20)), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(category=self.shirt.category, name='Silk tie')
+        self.assertIn('Silk tie', [row['name'] for row in other_worker.search('silk', 20)])
+
+    def test_backend_choice(self):
+        with override_settings(ITEM_SEARCH_BACKEND='auto'):
+            self.assertEqual(_backend_name(), 'memory')
+        with override_settings(ITEM_SEARCH_BACKEND='postgres'):
+            self.assertEqual(_backend_name(), 'postgres')
+
+
+class ReadCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        cache_stats.reset()
+        Category.objects.create(name='Shirts')
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='cache@example.com', email='cache@example.com', password='password123',
+            full_name='Cache', phone_number='+441234567890', is_email_verified=True
+        ))
+
+    def _names(self):
+        response = self.client.get('/api/categories/')
+        self.assertEqual(response.status_code, 200)
+        return [row['name'] for row in response.json()]
+
+    def test_second_read_is_served_from_cache(self):
+        self.assertEqual(self._names(), ['Shirts'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._names(), ['Shirts'])
+        self.assertEqual(cache_stats.snapshot()['caches']['categories'], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_save_invalidates_through_version_bump(self):
+        self._names()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Suits')
+        self.assertEqual(self._names(), ['Shirts', 'Suits'])
+        self.assertEqual(cache_stats.snapshot()['caches']['categories']['misses'], 2)
+
+    def test_stats_endpoint_is_for_staff(self):
+        self._names()
+        self.assertEqual(self.client.get('/api/cache/stats/').status_code, 403)
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='admin@example.com', email='admin@example.com', password='password123',
+            full_name='Admin', phone_number='+441234567890', is_staff=True
+        ))
+        response = self.client.get('/api/cache/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['caches'], {'categories': {'hits': 0, 'misses': 1, 'hit_rate': 0.0}})
+
+
+class CatalogueTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.item = Item.objects.create(
+            category=Category.objects.create(name='Shirts'), name='Shirt', washing_price='1.00', drycleaning_price='2.00'
+        )
+        self.client = APIClient()
+
+    def test_matching_etag_gets_304(self):
+        response = self.client.get('/api/catalogue/public/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['categories'][0]['items'][0]['name'], 'Shirt')
+        etag = response['ETag']
+
+        for if_none_match in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            response = self.client.get('/api/catalogue/public/', HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(response.status_code, 304, if_none_match)
+            self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get('/api/catalogue/public/', HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_etag_changes_after_item_save(self):
+        etag = self.client.get('/api/catalogue/public/')['ETag']
+        self.item.washing_price = '1.50'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.save()
+        response = self.client.get('/api/catalogue/public/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['categories'][0]['items'][0]['washing_price'], '1.50')
+
+    @override_settings(CATALOGUE_PUBLIC_MAX_AGE=120)
+    def test_cache_control(self):
+        response = self.client.get('/api/catalogue/public/')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=120, must-revalidate')
+        self.assertEqual(self.client.get('/api/catalogue/').status_code, 401)
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='catalogue@example.com', email='catalogue@example.com', password='password123',
+            full_name='Catalogue', phone_number='+441234567890', is_email_verified=True
+        ))
+        self.assertEqual(self.client.get('/api/catalogue/')['Cache-Control'], 'private, no-cache')
+
+    @override_settings(CATALOGUE_PUBLIC_ENABLED=False)
+    def test_public_catalogue_can_be_disabled(self):
+        self.assertEqual(self.client.get('/api/catalogue/public/').status_code, 404)
+
+
+class ItemQueryCountTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.category = Category.objects.create(name='Shirts')
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='queries@example.com', email='queries@example.com', password='password123',
+            full_name='Queries', phone_number='+441234567890', is_email_verified=True
+        ))
+
+    def _create_items(self, count):
+        Item.objects.bulk_create(
+            Item(category=self.category, name=f'Item {n:02}', washing_price='1.00', drycleaning_price='2.00')
+            for n in range(count)
+        )
+
+    def test_item_list_is_one_query_whatever_its_length(self):
+        for count in (1, 20):
+            Item.objects.all().delete()
+            get_cache().clear()
+            self._create_items(count)
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/items/')
+            self.assertEqual(len(response.json()), count)
+            self.assertEqual(response.json()[0]['category_name'], 'Shirts')
+
+    def test_item_detail(self):
+        self._create_items(1)
+        item = Item.objects.get()
+        with self.assertNumQueries(1):
+            response = self.client.get(f'/api/items/{item.pk}/')
+        self.assertEqual(response.json()['category_name'], 'Shirts')
+
+    def test_cursor_pages_are_one_query_each(self):
+        self._create_items(20)
+        with self.assertNumQueries(1):
+            first = self.client.get('/api/items/', {'page_size': 10}).json()
+        with self.assertNumQueries(1):
+            second = self.client.get('/api/items/', {'page_size': 10, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(second['results'][0]['name'], 'Item 10')
+        self.assertEqual(second['results'][0]['category_name'], 'Shirts')
+
+
+class UniqueNameTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Shirts')
+        self.item = Item.objects.create(category=self.category, name='Shirt', washing_price='1.00', drycleaning_price='2.00')
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='unique@example.com', email='unique@example.com', password='password123',
+            full_name='Unique', phone_number='+441234567890', is_email_verified=True
+        ))
+
+    def _create_item(self, name, category=None):
+        return self.client.post('/api/items/', {
+            'category': (category or self.category).pk, 'name': name, 'washing_price': '1.00', 'drycleaning_price': '2.00'
+        }, format='json')
+
+    def test_duplicate_and_case_variant_category_names_are_rejected(self):
+        for name in ('Shirts', 'shirts', ' SHIRTS '):
+            response = self.client.post('/api/categories/', {'name': name}, format='json')
+            self.assertEqual(response.status_code, 400, name)
+            self.assertEqual(response.json(), {'name': [f"Category '{name.strip()}' already exists."]})
+        self.assertEqual(Category.objects.count(), 1)
+
+    def test_duplicate_and_case_variant_item_names_are_rejected(self):
+        for name in ('Shirt', 'shirt', 'SHIRT'):
+            response = self._create_item(name)
+            self.assertEqual(response.status_code, 400, name)
+            self.assertEqual(response.json(), {'name': [f"Item '{name}' already exists in this category."]})
+        self.assertEqual(Item.objects.count(), 1)
+
+    def test_item_names_are_unique_per_category_only(self):
+        response = self._create_item('shirt', Category.objects.create(name='Suits'))
+        self.assertEqual(response.status_code, 201)
+
+    def test_rename_to_another_case_of_own_name(self):
+        response = self.client.patch(f'/api/categories/{self.category.pk}/', {'name': 'SHIRTS'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(f'/api/items/{self.item.pk}/', {'name': 'shirt'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.name, self.item.category.name), ('shirt', 'SHIRTS'))
+
+
+class DedupeMigrationTests(TransactionTestCase):
+    before = [('categories', '0005_item_lower_name_index')]
+    after = [('categories', '0007_name_ci_unique')]
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        self.apps = executor.loader.project_state(self.before).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_case_variants_are_renamed(self):
+        OldCategory = self.apps.get_model('categories', 'Category')
+        OldItem = self.apps.get_model('categories', 'Item')
+        shirts = OldCategory.objects.create(name='Shirts')
+        variant = OldCategory.objects.create(name='SHIRTS')
+        taken = OldCategory.objects.create(name='shirts (2)')
+        prices = {'washing_price': '1.00', 'drycleaning_price': '2.00'}
+        first = OldItem.objects.create(category=shirts, name='Shirt', **prices)
+        second = OldItem.objects.create(category=shirts, name='shirt', **prices)
+        elsewhere = OldItem.objects.create(category=variant, name='shirt', **prices)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        Category = apps.get_model('categories', 'Category')
+        Item = apps.get_model('categories', 'Item')
+        self.assertEqual(
+            dict(Category.objects.values_list('pk', 'name')),
+            {shirts.pk: 'Shirts', variant.pk: 'SHIRTS (3)', taken.pk: 'shirts (2)'}
+        )
+        self.assertEqual(
+            dict(Item.objects.values_list('pk', 'name')),
+            {first.pk: 'Shirt', second.pk: 'shirt (2)', elsewhere.pk: 'shirt'}
+        )
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import CategoryListCreateView, CategoryDetailView, ItemDetailView, ItemListCreateView
+from .views import CatalogueImportView, CatalogueView, CategoryListCreateView, CategoryDetailView, ItemDetailView, ItemListCreateView, ItemPriceAdjustView, ItemSearchView, PublicCatalogueView, QuoteView
 
 urlpatterns = [
     # Category URLs
@@ -8,5 +8,15 @@ urlpatterns = [
 
     # Item URLs
     path('items/', ItemListCreateView.as_view(), name='item-list-create'),
+    path('items/prices/adjust/', ItemPriceAdjustView.as_view(), name='item-price-adjust'),
+    path('items/search/', ItemSearchView.as_view(), name='item-search'),
     path('items/<int:pk>/', ItemDetailView.as_view(), name='item-detail'),
+
+    # Quote URLs
+    path('quotes/', QuoteView.as_view(), name='quotes'),
+
+    # Catalogue URLs
+    path('catalogue/', CatalogueView.as_view(), name='catalogue'),
+    path('catalogue/public/', PublicCatalogueView.as_view(), name='catalogue-public'),
+    path('catalogue/import/', CatalogueImportView.as_view(), name='catalogue-import'),
 ]
\ No newline at end of file
@@ -1,13 +1,30 @@
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 from django.db import IntegrityError
+from django.db.models import Prefetch
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from caching import cached_get
+from importing import IMPORT_FORMATS, detect_format, iter_rows
+from pagination import LIST_QUERY_PARAMETERS, list_response
+from .catalogue import get_snapshot
+from .catalogue_import import CatalogueImporter
 from .models import Category, Item
-from .serializers import CategoryDetailSerializer, CategorySerializer, CategoryListSerializer, ItemListSerializer, ItemSerializer
+from .pricing import PRICE_FIELDS, PricingError, adjust_prices
+from .quotes import QuoteError, quote_baskets
+from .search import search_items
+from .serializers import (
+    CategoryDetailSerializer, CategorySerializer, CategoryListSerializer, ItemListSerializer,
+    ItemSearchQuerySerializer, ItemSearchResultSerializer, ItemSerializer, PriceAdjustmentSerializer,
+    QuoteRequestSerializer, item_list_rows
+)
 
 
 class CategoryListCreateView(APIView):
@@ -16,13 +33,14 @@ class CategoryListCreateView(APIView):
     
     @swagger_auto_schema(
         tags=["Categories"],
+        manual_parameters=LIST_QUERY_PARAMETERS,
         responses={200: CategoryListSerializer(many=True)}
     )
+    @cached_get('categories', models=[Category])
     def get(self, request):
         """Get all categories"""
         categories = Category.objects.all()
-        serializer = CategoryListSerializer(categories, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return list_response(request, categories, CategoryListSerializer, keys=('name', 'id'))
     
     @swagger_auto_schema(
         tags=["Categories"],
@@ -55,7 +73,10 @@ class CategoryDetailView(APIView):
     )
     def get(self, request, pk):
         """Get category details"""
-        category = get_object_or_404(Category, pk=pk)
+        # Order items by name only; the default Item ordering would join Category again
+        category = get_object_or_404(
+            Category.objects.prefetch_related(Prefetch('items', queryset=Item.objects.order_by('name'))), pk=pk
+        )
         serializer = CategoryDetailSerializer(category)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -127,10 +148,12 @@ class ItemListCreateView(APIView):
                 openapi.IN_QUERY,
                 description="Filter items by category ID",
                 type=openapi.TYPE_INTEGER
-            )
+            ),
+            *LIST_QUERY_PARAMETERS
         ],
         responses={200: ItemListSerializer(many=True)}
     )
+    @cached_get('items', models=[Item, Category])
     def get(self, request):
         """Get all items with optional category filter"""
         category_id = request.query_params.get('category')
@@ -140,8 +163,11 @@ class ItemListCreateView(APIView):
         else:
             items = Item.objects.all()
         
-        serializer = ItemListSerializer(items, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # One query either way: the category join serves both the sort and category_name
+        items = items.select_related('category')
+        return list_response(
+            request, items, ItemListSerializer, keys=('category__name', 'name', 'id'), rows=item_list_rows
+        )
     
     @swagger_auto_schema(
         tags=["Items"],
@@ -164,6 +190,65 @@ class ItemListCreateView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class ItemSearchView(APIView):
+    """Ranked full-text search over item names, descriptions and categories"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        tags=["Items"],
+        query_serializer=ItemSearchQuerySerializer,
+        responses={200: ItemSearchResultSerializer(many=True)}
+    )
+    def get(self, request):
+        """Search items; every word matches as a prefix ('silk sh' finds 'Silk shirt')"""
+        query = ItemSearchQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Backends return ItemSearchResultSerializer-shaped rows directly
+        results = search_items(query.validated_data['q'], query.validated_data['limit'])
+        return Response({
+            'query': query.validated_data['q'],
+            'count': len(results),
+            'results': results
+        }, status=status.HTTP_200_OK)
+
+class ItemPriceAdjustView(APIView):
+    """Reprice a whole category or a list of items in one statement"""
+    permission_classes = [IsAdminUser]
+    
+    @swagger_auto_schema(
+        tags=["Items"],
+        request_body=PriceAdjustmentSerializer,
+        responses={200: ItemListSerializer(many=True)}
+    )
+    def post(self, request):
+        """Set, scale (percent) or shift (delta) washing and/or drycleaning prices"""
+        serializer = PriceAdjustmentSerializer(data=request.data)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            category = data.get('category')
+            try:
+                items = adjust_prices(
+                    # Fixed column order keeps the UPDATE statement stable
+                    [field for field in PRICE_FIELDS if field in data['fields']],
+                    data['mode'],
+                    data['value'],
+                    category_id=category.pk if category else None,
+                    item_ids=data.get('item_ids'),
+                    changed_by=request.user,
+                )
+            except PricingError as e:
+                return Response({
+                    'error': str(e)
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            return Response({
+                'message': f'{len(items)} item(s) repriced successfully.',
+                'items': items
+            }, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
 class ItemDetailView(APIView):
     """Retrieve, update or delete an item"""
     permission_classes = [IsAuthenticated]
@@ -174,7 +259,7 @@ class ItemDetailView(APIView):
     )
     def get(self, request, pk):
         """Get item details"""
-        item = get_object_or_404(Item, pk=pk)
+        item = get_object_or_404(Item.objects.select_related('category'), pk=pk)
         serializer = ItemSerializer(item)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -185,7 +270,7 @@ class ItemDetailView(APIView):
     )
     def put(self, request, pk):
         """Update an item"""
-        item = get_object_or_404(Item, pk=pk)
+        item = get_object_or_404(Item.objects.select_related('category'), pk=pk)
         serializer = ItemSerializer(item, data=request.data)
         if serializer.is_valid():
             try:
@@ -207,7 +292,7 @@ class ItemDetailView(APIView):
     )
     def patch(self, request, pk):
         """Partially update an item"""
-        item = get_object_or_404(Item, pk=pk)
+        item = get_object_or_404(Item.objects.select_related('category'), pk=pk)
         serializer = ItemSerializer(item, data=request.data, partial=True)
         if serializer.is_valid():
             try:
@@ -233,3 +318,155 @@ class ItemDetailView(APIView):
         return Response({
             'message': 'Item deleted successfully.'
         }, status=status.HTTP_204_NO_CONTENT)
+
+# ============= QUOTE VIEWS =============
+
+class QuoteView(APIView):
+    """Price baskets against the current catalogue"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(
+        tags=["Quotes"],
+        request_body=QuoteRequestSerializer,
+        responses={
+            200: openapi.Response(
+                description="Line, basket and overall totals",
+                examples={
+                    'application/json': {
+                        'quotes': [{
+                            'reference': 'order-42',
+                            'lines': [{'item': 1, 'name': 'Silk shirt', 'service': 'drycleaning', 'quantity': 2,
+                                       'unit_price': '5.00', 'line_total': '10.00', 'pieces': 2}],
+                            'total_pieces': 2,
+                            'total': '10.00'
+                        }],
+                        'basket_count': 1,
+                        'total': '10.00'
+                    }
+                }
+            )
+        }
+    )
+    def post(self, request):
+        """Quote one or many baskets of (item, service, quantity) lines"""
+        serializer = QuoteRequestSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                quote = quote_baskets(serializer.validated_data['baskets'])
+            except QuoteError as e:
+                return Response({
+                    'error': 'Some baskets refer to unknown items.',
+                    'baskets': {str(index): error for index, error in e.errors.items()}
+                }, status=status.HTTP_400_BAD_REQUEST)
+            return Response(quote, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+# ============= CATALOGUE VIEWS =============
+
+def catalogue_response(request, cache_control):
+    """Serve the pre-encoded snapshot, or 304 when the client already has it"""
+    body, etag = get_snapshot()
+    # Weak comparison, as for If-None-Match in Django's get_conditional_response:
+    # proxies that compress the body hand the ETag back as W/"..."
+    etags = [tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))]
+    if etag.removeprefix('W/') in etags or '*' in etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+CATALOGUE_RESPONSE = openapi.Response(
+    description="All categories with nested items and prices; 304 when If-None-Match matches the ETag",
+    examples={
+        'application/json': {
+            'categories': [
+                {'id': 1, 'name': 'Shirts', 'description': None, 'items': [
+                    {'id': 1, 'name': 'Silk shirt', 'description': None, 'washing_price': '3.50', 'drycleaning_price': '5.00', 'pieces': 1}
+                ]}
+            ]
+        }
+    }
+)
+
+class CatalogueView(APIView):
+    """Full price list in one response"""
+    permission_classes = [IsAuthenticated]
+    
+    @swagger_auto_schema(tags=["Catalogue"], responses={200: CATALOGUE_RESPONSE, 304: 'Not modified'})
+    def get(self, request):
+        """Get the catalogue snapshot"""
+        return catalogue_response(request, 'private, no-cache')
+
+class PublicCatalogueView(APIView):
+    """Unauthenticated catalogue snapshot that shared caches may store"""
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    
+    @swagger_auto_schema(tags=["Catalogue"], responses={200: CATALOGUE_RESPONSE, 304: 'Not modified'})
+    def get(self, request):
+        """Get the catalogue snapshot without a token"""
+        if not getattr(settings, 'CATALOGUE_PUBLIC_ENABLED', False):
+            raise Http404
+        max_age = getattr(settings, 'CATALOGUE_PUBLIC_MAX_AGE', 300)
+        return catalogue_response(request, f'public, max-age={max_age}, must-revalidate')
+
+class CatalogueImportView(APIView):
+    """Upsert categories and items from a CSV or NDJSON price list"""
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser]
+    
+    @swagger_auto_schema(
+        tags=["Catalogue"],
+        manual_parameters=[
+            openapi.Parameter(
+                'file',
+                openapi.IN_FORM,
+                description="CSV with a header row or NDJSON; columns/keys: category, name, washing_price, drycleaning_price, description, pieces",
+                type=openapi.TYPE_FILE,
+                required=True
+            ),
+            openapi.Parameter(
+                'format',
+                openapi.IN_FORM,
+                description="csv or ndjson (detected from the file name when omitted)",
+                type=openapi.TYPE_STRING
+            )
+        ],
+        responses={200: openapi.Response(
+            description="Import summary",
+            examples={
+                'application/json': {
+                    'message': 'Created 1 item(s), updated 1, rejected 1.',
+                    'created': 1,
+                    'updated': 1,
+                    'unchanged': 0,
+                    'categories_created': 1,
+                    'rejected': 1,
+                    'rejects': [{'line': 4, 'name': 'Silk shirt', 'error': 'Pieces must be at least 1.'}],
+                    'rejects_truncated': False
+                }
+            }
+        )}
+    )
+    def post(self, request):
+        """Stream the upload in chunks; items are matched on category and case-insensitive name"""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({
+                'error': 'A file is required.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        file_format = (request.data.get('format') or detect_format(upload.name, upload.content_type)).lower()
+        if file_format not in IMPORT_FORMATS:
+            return Response({
+                'error': 'Format must be csv or ndjson.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        importer = CatalogueImporter(changed_by=request.user)
+        summary = importer.run(iter_rows(upload, file_format))
+        return Response({
+            'message': f"Created {summary['created']} item(s), updated {summary['updated']}, rejected {summary['rejected']}.",
+            **summary
+        }, status=status.HTTP_200_OK)
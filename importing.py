@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import re
+
+IMPORT_FORMATS = ['csv', 'ndjson']
+
+# Bytes that are not valid UTF-8 decode to lone surrogates under surrogateescape
+UNDECODABLE = re.compile('[\udc80-\udcff]')
+
+
+def _decodes(values):
+    """False when any of the parsed strings came from bytes that are not valid UTF-8"""
+    for value in values:
+        if isinstance(value, list):
+            if not _decodes(value):
+                return False
+        elif isinstance(value, str) and UNDECODABLE.search(value):
+            return False
+    return True
+
+
+def iter_csv_rows(stream):
+    """Yield (line_number, row) from a CSV text stream with a header row"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        if not (_decodes(row.values()) and _decodes(reader.fieldnames)):
+            yield reader.line_num, None
+            continue
+        yield reader.line_num, row
+
+
+def iter_ndjson_rows(stream):
+    """Yield (line_number, row) from a newline-delimited JSON text stream"""
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if UNDECODABLE.search(line):
+            yield line_number, None
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def iter_rows(binary_stream, file_format):
+    """
+    Wrap a binary stream and yield parsed rows without reading it all into memory.
+
+    Rows containing bytes that are not valid UTF-8 come through as None, like
+    any other malformed row, instead of aborting the import mid-stream.
+    """
+    stream = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', errors='surrogateescape', newline='')
+    if file_format == 'ndjson':
+        return iter_ndjson_rows(stream)
+    return iter_csv_rows(stream)
+
+
+def detect_format(name='', content_type=''):
+    """Guess the import format from a file name or content type"""
+    name = (name or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonl' in content_type:
+        return 'ndjson'
+    return 'csv'
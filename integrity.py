@@ -0,0 +1,39 @@
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+
+# SQLSTATE for unique_violation (Postgres)
+UNIQUE_VIOLATION = '23505'
+
+
+def is_unique_violation(exc):
+    """True when an IntegrityError comes from a unique constraint or index"""
+    cause = exc.__cause__
+    pgcode = getattr(cause, 'pgcode', None) or getattr(getattr(cause, 'diag', None), 'sqlstate', None)
+    if pgcode is not None:
+        return pgcode == UNIQUE_VIOLATION
+    message = str(exc).lower()
+    return 'unique constraint' in message or 'duplicate key' in message
+
+
+class UniqueErrorMixin:
+    """
+    Let the database enforce uniqueness instead of a pre-check SELECT.
+
+    Set `unique_error = (field, message)`; `message` is formatted with
+    `value`, the field's new (or current) value. A unique violation on save
+    is re-raised as the ValidationError the pre-check used to produce, so
+    the response payload is unchanged. The save runs in a savepoint so the
+    failure does not poison an outer transaction.
+    """
+    unique_error = None
+
+    def save(self, **kwargs):
+        try:
+            with transaction.atomic():
+                return super().save(**kwargs)
+        except IntegrityError as e:
+            if self.unique_error is None or not is_unique_violation(e):
+                raise
+            field, message = self.unique_error
+            value = self.validated_data.get(field, getattr(self.instance, field, ''))
+            raise serializers.ValidationError({field: [message.format(value=value)]})
@@ -46,16 +46,20 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'areas',
-    'categories'
+    'categories',
+    'sync',
 ]
 
 # REST Framework JWT Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ],
 }
 
+# Seconds a JWT-authenticated user stays cached (users/authentication.py); saves invalidate it
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+
 # SimpleJWT settings (optional, to modify token expiration time, etc.)
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),  # Expiry time for access token
@@ -128,6 +132,73 @@ DATABASES = {
     }
 }
 
+# Cache
+# LocMem works out of the box (and in tests) but is per process; point
+# 'default' at a shared backend (e.g. django.core.cache.backends.redis.RedisCache)
+# so cached reads and their version keys are shared across workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'laundryserver',
+    }
+}
+
+# Versioned read-through cache for reference data (see caching.py)
+READ_CACHE_ALIAS = 'default'
+READ_CACHE_TIMEOUT = 60 * 60
+
+# Unauthenticated catalogue snapshot (GET /api/catalogue/public/) for reverse proxies
+CATALOGUE_PUBLIC_ENABLED = True
+CATALOGUE_PUBLIC_MAX_AGE = 300
+
+# Item search: 'postgres' (full-text index), 'memory' (in-process index) or 'auto'
+ITEM_SEARCH_BACKEND = 'auto'
+
+# Delta sync (GET /api/sync/): tokens older than the retention get a full sync
+SYNC_TOMBSTONE_RETENTION_DAYS = 30
+SYNC_OVERLAP_SECONDS = 60
+
+# Email outbox (manage.py run_email_worker): lease while sending, backoff between retries
+EMAIL_OUTBOX_LEASE_SECONDS = 300
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 30
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 3600
+# Sent and failed rows are deleted by manage.py prune_email_outbox after this
+EMAIL_OUTBOX_RETENTION_DAYS = 7
+
+# Email verification and password reset codes (users.codes): stored hashed in
+# their own table, one live code per user and purpose; expired rows are deleted
+# on use, opportunistically on issue, and by manage.py prune_verification_codes
+VERIFICATION_CODE_TTL_SECONDS = 15 * 60
+VERIFICATION_CODE_MAX_ATTEMPTS = 5
+
+# Auth endpoint throttling (throttling.py): token buckets per IP and per email,
+# checked before any query. MemoryBucketStore limits per worker process;
+# CacheBucketStore shares buckets through THROTTLE_CACHE_ALIAS (point it at
+# Redis/Memcached) so limits hold across workers
+THROTTLE_STORE = 'throttling.MemoryBucketStore'
+THROTTLE_CACHE_ALIAS = 'default'
+AUTH_THROTTLE_RATES = {
+    'register': {'ip': '10/hour'},
+    'login': {'ip': '30/min', 'email': '10/min'},
+    'verify_email': {'ip': '30/min', 'email': '5/min'},
+    'resend_verification': {'ip': '10/min', 'email': '3/hour'},
+    'forgot_password': {'ip': '10/min', 'email': '3/hour'},
+    'reset_password': {'ip': '30/min', 'email': '5/min'},
+}
+
+# Password hashing: the first hasher encodes new hashes, the rest only verify old ones.
+# PBKDF2 cost per login; changing it rehashes each password at its next login
+# (measure with manage.py benchmark_login)
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 1_000_000))
+PASSWORD_HASHERS = [
+    'users.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -158,6 +229,9 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Time zone that area time slots (start_time/end_time) are expressed in
+AVAILABILITY_TIME_ZONE = 'Europe/London'
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -20,6 +20,7 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from drf_yasg.generators import OpenAPISchemaGenerator
+from .views import CacheStatsView, ThrottleStatsView
 
 # Swagger schema view setup
 schema_view = get_schema_view(
@@ -58,5 +59,8 @@ urlpatterns = [
     path('api/', include('users.urls')),
     path('api/', include('areas.urls')),
     path('api/', include('categories.urls')),
+    path('api/', include('sync.urls')),
+    path('api/cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('api/throttle/stats/', ThrottleStatsView.as_view(), name='throttle-stats'),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='swagger-ui'),
 ]
@@ -0,0 +1,52 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from caching import cache_stats
+from throttling import throttle_stats
+
+
+class CacheStatsView(APIView):
+    """Read-through cache hit/miss counters for this worker process"""
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Cache"],
+        responses={200: openapi.Response(
+            description="Counters since this worker started",
+            examples={
+                'application/json': {
+                    'pid': 4242,
+                    'caches': {'areas': {'hits': 980, 'misses': 20, 'hit_rate': 0.98}}
+                }
+            }
+        )}
+    )
+    def get(self, request):
+        """Get hit/miss counters per cached endpoint"""
+        return Response(cache_stats.snapshot(), status=status.HTTP_200_OK)
+
+
+class ThrottleStatsView(APIView):
+    """Auth throttle counters for this worker process"""
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        tags=["Throttling"],
+        responses={200: openapi.Response(
+            description="Counters since this worker started",
+            examples={
+                'application/json': {
+                    'pid': 4242,
+                    'store': 'MemoryBucketStore',
+                    'buckets': 310,
+                    'scopes': {'login': {'email': {'allowed': 120, 'rejected': 4}, 'ip': {'allowed': 124, 'rejected': 0}}}
+                }
+            }
+        )}
+    )
+    def get(self, request):
+        """Get allowed/rejected counts per throttled endpoint and bucket kind"""
+        return Response(throttle_stats.snapshot(), status=status.HTTP_200_OK)
@@ -0,0 +1,186 @@
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from drf_yasg import openapi
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 2000
+
+# Shared swagger parameters for list endpoints
+LIST_QUERY_PARAMETERS = [
+    openapi.Parameter(
+        'cursor',
+        openapi.IN_QUERY,
+        description="Enable cursor pagination; pass the previous response's next_cursor (empty for the first page)",
+        type=openapi.TYPE_STRING
+    ),
+    openapi.Parameter(
+        'page_size',
+        openapi.IN_QUERY,
+        description=f"Rows per page when paginating (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})",
+        type=openapi.TYPE_INTEGER
+    ),
+    openapi.Parameter(
+        'stream',
+        openapi.IN_QUERY,
+        description="Stream the full unpaginated list as a JSON array (true/false)",
+        type=openapi.TYPE_BOOLEAN
+    ),
+]
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=JSONEncoder, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor()
+    return values
+
+
+def _key_value(instance, key):
+    """Read a (possibly related, e.g. 'category__name') key from a model instance"""
+    value = instance
+    for part in key.split('__'):
+        value = getattr(value, part)
+    return value
+
+
+def keyset_filter(keys, values):
+    """(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... for ascending keys"""
+    clauses = []
+    for i, key in enumerate(keys):
+        equal = {keys[j]: values[j] for j in range(i)}
+        clauses.append(Q(**equal, **{f'{key}__gt': values[i]}))
+    return reduce(or_, clauses)
+
+
+def _page_size(request):
+    try:
+        page_size = int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    return min(max(page_size, 1), MAX_PAGE_SIZE)
+
+
+def keyset_page(request, queryset, serializer_class, keys):
+    """
+    Return one page ordered by keys (ascending; the last key must be unique)
+    plus the cursor for the next page. Each page is a single indexed range
+    query regardless of how deep the client has paged.
+    """
+    page_size = _page_size(request)
+    queryset = queryset.order_by(*keys)
+
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        # A well-formed cursor can still carry values the key fields reject
+        try:
+            queryset = queryset.filter(keyset_filter(keys, values))
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidCursor()
+
+    rows = list(queryset[:page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor([_key_value(rows[-1], key) for key in keys])
+
+    return {
+        'results': serializer_class(rows, many=True).data,
+        'next_cursor': next_cursor,
+        'page_size': page_size,
+    }
+
+
+def _encode_chunks(chunks):
+    """Yield a JSON array from an iterable of lists of already-serialized rows"""
+    encoder = JSONEncoder(separators=(',', ':'))
+    yield '['
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        body = encoder.encode(chunk)[1:-1]
+        yield body if first else ',' + body
+        first = False
+    yield ']'
+
+
+def _chunked(iterable, chunk_size):
+    chunk = []
+    for row in iterable:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_json_array(queryset, serializer_class, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield a JSON array, serializing chunk_size rows at a time"""
+    return _encode_chunks(
+        serializer_class(chunk, many=True).data
+        for chunk in _chunked(queryset.iterator(chunk_size=chunk_size), chunk_size)
+    )
+
+
+def stream_json_rows(rows, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield a JSON array from an iterable of plain dicts"""
+    return _encode_chunks(_chunked(rows, chunk_size))
+
+
+def list_response(request, queryset, serializer_class, keys, rows=None):
+    """
+    Build a list response for an APIView.
+
+    ?cursor= (or ?page_size=) switches to keyset pagination and ?stream=true
+    streams the whole list; without either the plain list is returned as before.
+    `rows`, when given, is a values()-based equivalent of serializer_class
+    (a callable taking the queryset and yielding dicts) used for the full
+    list and stream modes, where per-row serializer overhead dominates.
+    """
+    params = request.query_params
+    if params.get('stream', '').lower() in ['true', '1', 'yes']:
+        ordered = queryset.order_by(*keys)
+        return StreamingHttpResponse(
+            stream_json_rows(rows(ordered)) if rows else stream_json_array(ordered, serializer_class),
+            content_type='application/json'
+        )
+
+    if 'cursor' in params or 'page_size' in params:
+        try:
+            return Response(keyset_page(request, queryset, serializer_class, keys), status=status.HTTP_200_OK)
+        except InvalidCursor:
+            return Response({
+                'error': 'Invalid cursor.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+    if rows:
+        return Response(list(rows(queryset.order_by(*keys))), status=status.HTTP_200_OK)
+
+    serializer = serializer_class(queryset, many=True)
+    return Response(serializer.data, status=status.HTTP_200_OK)
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor, stream_json_rows
+from .feeds import COLLECTIONS, changed_rows
+from .models import Tombstone
+
+
+def _overlap():
+    # Rows saved by transactions still open when the token was issued carry
+    # an earlier updated_at; re-send that window so they are not missed
+    return timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 60))
+
+
+def tombstone_retention():
+    return timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def encode_token(moment):
+    return encode_cursor([moment.isoformat()])
+
+
+def decode_token(token):
+    """Token -> aware datetime; raises InvalidCursor"""
+    (value,) = decode_cursor(token, 1)
+    try:
+        moment = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidCursor()
+    if timezone.is_naive(moment):
+        raise InvalidCursor()
+    return moment
+
+
+def build_delta(token=None):
+    """
+    Changes since `token`, or everything for a cold sync, as JSON text chunks.
+
+    One query per collection plus one for tombstones. A token older than
+    the tombstone retention also gets a full sync, since deletions from
+    that far back may already be pruned. The token is decoded (raising
+    InvalidCursor) and tombstones are read before the first chunk; the
+    collections are then streamed, so a cold sync of the whole catalogue
+    is never held in memory.
+    """
+    now = timezone.now()
+    since = decode_token(token) if token else None
+    full = since is None or since < now - tombstone_retention()
+    since = None if full else since - _overlap()
+
+    deleted = {name: [] for name in COLLECTIONS}
+    if not full:
+        tombstones = Tombstone.objects.filter(deleted_at__gte=since).order_by().values_list('collection', 'object_id')
+        for collection, object_id in tombstones:
+            if collection in deleted:
+                deleted[collection].append(object_id)
+
+    head = {'token': encode_token(now), 'full': full, 'deleted': deleted}
+    return _encode_delta(head, since)
+
+
+def _encode_delta(head, since):
+    """{**head, "changes": {collection: [rows]}} with each collection streamed"""
+    encoder = JSONEncoder(separators=(',', ':'))
+    yield encoder.encode(head)[:-1] + ',"changes":{'
+    for i, name in enumerate(COLLECTIONS):
+        yield (',' if i else '') + encoder.encode(name) + ':'
+        yield from stream_json_rows(changed_rows(name, since))
+    yield '}}'
+
+
+def prune_tombstones():
+    """Delete tombstones past the retention window; returns the count"""
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - tombstone_retention()).delete()
+    return deleted
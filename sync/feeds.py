@@ -0,0 +1,34 @@
+from areas.models import Area, Postcode
+from categories.models import Category, Item
+from categories.serializers import TWO_PLACES
+
+# Collection name -> (model, [(output key, model field)]); output keys match
+# the regular API serializers
+COLLECTIONS = {
+    'categories': (Category, [('id', 'id'), ('name', 'name'), ('description', 'description')]),
+    'items': (Item, [
+        ('id', 'id'), ('category', 'category_id'), ('name', 'name'), ('description', 'description'),
+        ('washing_price', 'washing_price'), ('drycleaning_price', 'drycleaning_price'), ('pieces', 'pieces'),
+    ]),
+    'areas': (Area, [('id', 'id'), ('name', 'name')]),
+    'postcodes': (Postcode, [('id', 'id'), ('postcode', 'postcode'), ('area', 'area_id')]),
+}
+
+MODEL_COLLECTIONS = {model: name for name, (model, _) in COLLECTIONS.items()}
+
+DECIMAL_KEYS = {'washing_price', 'drycleaning_price'}
+
+
+def changed_rows(name, since=None):
+    """Yield rows of a collection updated at or after `since` (all rows when None), one query"""
+    model, fields = COLLECTIONS[name]
+    queryset = model.objects.order_by('id')
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    keys = [key for key, _ in fields]
+    for values in queryset.values_list(*[field for _, field in fields]).iterator(chunk_size=5000):
+        row = dict(zip(keys, values))
+        for key in DECIMAL_KEYS.intersection(row):
+            # Match DecimalField's string output
+            row[key] = str(row[key].quantize(TWO_PLACES))
+        yield row
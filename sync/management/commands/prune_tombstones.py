@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from sync.delta import prune_tombstones, tombstone_retention
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS"
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} tombstone(s) older than {tombstone_retention().days} day(s)."
+        ))
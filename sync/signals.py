@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete
+
+from .feeds import MODEL_COLLECTIONS
+from .models import Tombstone
+
+
+# Written in the deleting transaction, so a rolled back delete leaves no tombstone
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(collection=MODEL_COLLECTIONS[sender], object_id=instance.pk)
+
+
+for model in MODEL_COLLECTIONS:
+    post_delete.connect(record_tombstone, sender=model, dispatch_uid=f'sync_tombstone_{model._meta.label_lower}')
@@ -0,0 +1,74 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from areas.models import Area, Postcode
+from categories.models import Category, Item
+from .delta import encode_token, prune_tombstones
+from .models import Tombstone
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0, SYNC_TOMBSTONE_RETENTION_DAYS=30)
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Shirts')
+        self.item = Item.objects.create(category=self.category, name='Shirt', washing_price='1.50', drycleaning_price='3.00')
+        self.area = Area.objects.create(name='North')
+        Postcode.objects.create(postcode='SW1A 1AA', area=self.area)
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username='sync@example.com', email='sync@example.com', password='password123',
+            full_name='Sync', phone_number='+441234567890', is_email_verified=True
+        ))
+
+    def _sync(self, since=None):
+        response = self.client.get('/api/sync/', {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_cold_sync_returns_everything(self):
+        delta = self._sync()
+        self.assertTrue(delta['full'])
+        self.assertEqual(delta['changes']['items'], [{
+            'id': self.item.pk, 'category': self.category.pk, 'name': 'Shirt', 'description': None,
+            'washing_price': '1.50', 'drycleaning_price': '3.00', 'pieces': self.item.pieces,
+        }])
+        self.assertEqual([row['postcode'] for row in delta['changes']['postcodes']], ['SW1A 1AA'])
+        self.assertEqual(delta['deleted'], {'categories': [], 'items': [], 'areas': [], 'postcodes': []})
+
+    def test_delta_after_create_update_and_delete(self):
+        token = self._sync()['token']
+        created = Item.objects.create(category=self.category, name='Suit', washing_price='5.00', drycleaning_price='9.00')
+        self.area.name = 'North East'
+        self.area.save()
+        deleted_id = self.item.pk
+        self.item.delete()
+
+        delta = self._sync(token)
+        self.assertFalse(delta['full'])
+        self.assertEqual([row['id'] for row in delta['changes']['items']], [created.pk])
+        self.assertEqual(delta['changes']['areas'], [{'id': self.area.pk, 'name': 'North East'}])
+        self.assertEqual(delta['changes']['categories'], [])
+        self.assertEqual(delta['deleted']['items'], [deleted_id])
+
+        self.assertEqual(self._sync(delta['token'])['changes']['items'], [])
+
+    def test_token_older_than_retention_gets_full_sync(self):
+        delta = self._sync(encode_token(timezone.now() - timedelta(days=31)))
+        self.assertTrue(delta['full'])
+        self.assertEqual(len(delta['changes']['items']), 1)
+
+    def test_invalid_token_is_rejected(self):
+        response = self.client.get('/api/sync/', {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_prune_tombstones_keeps_recent_ones(self):
+        item_id = self.item.pk
+        self.item.delete()
+        Tombstone.objects.create(collection='items', object_id=999, deleted_at=timezone.now() - timedelta(days=31))
+        self.assertEqual(prune_tombstones(), 1)
+        self.assertEqual(list(Tombstone.objects.values_list('object_id', flat=True)), [item_id])
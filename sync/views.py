@@ -0,0 +1,53 @@
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+from pagination import InvalidCursor
+from .delta import build_delta
+
+
+class SyncView(APIView):
+    """Delta sync of categories, items, areas and postcodes"""
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        tags=["Sync"],
+        manual_parameters=[
+            openapi.Parameter(
+                'since',
+                openapi.IN_QUERY,
+                description="Token from the previous sync; omit for a full (cold) sync",
+                type=openapi.TYPE_STRING
+            )
+        ],
+        responses={200: openapi.Response(
+            description="Rows created or updated since the token and ids deleted since then. "
+                        "When full is true, replace local data with the rows returned.",
+            examples={
+                'application/json': {
+                    'token': 'WyIyMDI2LTAxLTAxVDEyOjAwOjAwKzAwOjAwIl0',
+                    'full': False,
+                    'changes': {
+                        'categories': [],
+                        'items': [{'id': 7, 'category': 2, 'name': 'Silk shirt', 'description': None,
+                                   'washing_price': '3.50', 'drycleaning_price': '5.00', 'pieces': 1}],
+                        'areas': [],
+                        'postcodes': [{'id': 12, 'postcode': 'SW1A 1AA', 'area': 3}]
+                    },
+                    'deleted': {'categories': [], 'items': [4], 'areas': [], 'postcodes': []}
+                }
+            }
+        )}
+    )
+    def get(self, request):
+        """Get changes since a sync token"""
+        try:
+            delta = build_delta(request.query_params.get('since') or None)
+        except InvalidCursor:
+            return Response({
+                'error': 'Invalid sync token.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return StreamingHttpResponse(delta, content_type='application/json')
@@ -0,0 +1,201 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+from users.models import normalize_email
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'5/min' -> (capacity, tokens refilled per second); None means no limit"""
+    if rate is None:
+        return None
+    count, period = rate.split('/')
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+def take_token(state, capacity, refill, now):
+    """
+    One request against a token bucket.
+
+    `state` is (tokens, updated_at) or None for a full bucket. Returns
+    (allowed, seconds until a token is available, new state).
+    """
+    if state is None:
+        tokens = capacity
+    else:
+        tokens = min(capacity, state[0] + (now - state[1]) * refill)
+    if tokens >= 1:
+        return True, 0.0, (tokens - 1, now)
+    return False, (1 - tokens) / refill, (tokens, now)
+
+
+# ============= STORES =============
+
+class MemoryBucketStore:
+    """Buckets in this worker process; limits are per worker. Least recently used buckets are dropped past MAX_BUCKETS"""
+    MAX_BUCKETS = 100_000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, capacity, refill):
+        with self._lock:
+            allowed, wait, state = take_token(self._buckets.pop(key, None), capacity, refill, time.monotonic())
+            self._buckets[key] = state
+            if len(self._buckets) > self.MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+    def size(self):
+        return len(self._buckets)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in a Django cache shared by every worker (THROTTLE_CACHE_ALIAS).
+
+    The read-modify-write is not atomic, so workers racing on one key can
+    each spend the same token: a burst may exceed the capacity by the
+    number of concurrent workers, which is fine for abuse control. Entries
+    expire once the bucket would be full again.
+    """
+
+    def __init__(self):
+        self.alias = getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')
+
+    def take(self, key, capacity, refill):
+        cache = caches[self.alias]
+        allowed, wait, state = take_token(cache.get(key), capacity, refill, time.time())
+        cache.set(key, state, timeout=math.ceil(capacity / refill) + 1)
+        return allowed, wait
+
+    def size(self):
+        return None
+
+    def reset(self):
+        pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The configured bucket store (THROTTLE_STORE), built once per process"""
+    global _store
+    path = getattr(settings, 'THROTTLE_STORE', 'throttling.MemoryBucketStore')
+    with _store_lock:
+        if _store is None or _store[0] != path:
+            _store = (path, import_string(path)())
+        return _store[1]
+
+
+# ============= STATS =============
+
+class ThrottleStats:
+    """Per-process allowed/rejected counters, keyed by scope and bucket kind"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, scope, kind, allowed):
+        with self._lock:
+            counters = self._counters.setdefault(scope, {}).setdefault(kind, {'allowed': 0, 'rejected': 0})
+            counters['allowed' if allowed else 'rejected'] += 1
+
+    def snapshot(self):
+        store = get_store()
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'store': type(store).__name__,
+                'buckets': store.size(),
+                'scopes': {
+                    scope: {kind: dict(counters) for kind, counters in sorted(kinds.items())}
+                    for scope, kinds in sorted(self._counters.items())
+                }
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+
+
+throttle_stats = ThrottleStats()
+
+
+# ============= THROTTLES =============
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per (view scope, kind, identity).
+
+    Rates come from AUTH_THROTTLE_RATES[view.throttle_scope][kind], e.g.
+    {'login': {'ip': '30/min', 'email': '10/min'}}; a missing rate means no
+    limit. DRF runs throttles before the handler and, on rejection, sets
+    Retry-After from wait().
+    """
+    kind = None
+
+    def get_identity(self, request):
+        raise NotImplementedError('.get_identity() must be overridden')
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = getattr(view, 'throttle_scope', None)
+        rate = parse_rate(getattr(settings, 'AUTH_THROTTLE_RATES', {}).get(scope, {}).get(self.kind))
+        if rate is None:
+            return True
+        identity = self.get_identity(request)
+        if not identity:
+            return True
+
+        # Hash the identity so keys stay short and backend-safe
+        key = f'throttle:{scope}:{self.kind}:{hashlib.md5(identity.encode()).hexdigest()}'
+        allowed, wait = get_store().take(key, *rate)
+        throttle_stats.record(scope, self.kind, allowed)
+        if not allowed:
+            self.wait_seconds = wait
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(TokenBucketThrottle):
+    """Limit by client address (X-Forwarded-For aware through NUM_PROXIES)"""
+    kind = 'ip'
+
+    def get_identity(self, request):
+        return self.get_ident(request)
+
+
+class EmailThrottle(TokenBucketThrottle):
+    """Limit by the normalized email in the request body, before it is looked up"""
+    kind = 'email'
+
+    def get_identity(self, request):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        return normalize_email(email) if isinstance(email, str) else None
+
+
+# For unauthenticated endpoints; pair with authentication_classes = [] so an
+# Authorization header cannot trigger a user query before the throttles run
+AUTH_THROTTLES = [IPThrottle, EmailThrottle]
@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from caching import bump_on_commit, get_cache, get_version
+
+# Left deferred on cached users: secrets stay out of the cache and load on first access
+UNCACHED_FIELDS = {'password'}
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def bump_user_version_on_commit(*user_ids):
+    """Drop cached auth users; needed after update() on users, which skips post_save"""
+    bump_on_commit(*[user_scope(user_id) for user_id in user_ids])
+
+
+def _cached_attnames():
+    return [field.attname for field in get_user_model()._meta.concrete_fields if field.name not in UNCACHED_FIELDS]
+
+
+def get_cached_user(user_id):
+    """
+    User by id from the cache, or from one query on a miss.
+
+    Entries are keyed by the user's version, which the users.signals
+    handlers bump on every save or delete, so deactivation and profile
+    changes take effect on the next request. The returned instance has
+    the secret fields deferred; saving it only writes the loaded fields.
+    """
+    User = get_user_model()
+    attnames = _cached_attnames()
+    # Read the version first so a concurrent save can only orphan the entry
+    version = get_version(user_scope(user_id))
+    key = f'auth_user:{user_id}:{version}'
+    cache = get_cache()
+    values = cache.get(key)
+    if values is None:
+        values = User.objects.filter(pk=user_id).values_list(*attnames).first()
+        if values is None:
+            raise User.DoesNotExist
+        cache.set(key, values, timeout=getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 5 * 60))
+    return User.from_db(DEFAULT_DB_ALIAS, attnames, values)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that resolves the token's user through get_cached_user"""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        # Revoke-on-password-change compares the password hash, which is never cached
+        if api_settings.CHECK_REVOKE_TOKEN or api_settings.USER_ID_FIELD != 'id':
+            return super().get_user(validated_token)
+
+        try:
+            user = get_cached_user(user_id)
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
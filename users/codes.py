@@ -0,0 +1,103 @@
+import secrets
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import VerificationCode
+
+CODE_LENGTH = 4
+
+# check_code results
+OK = 'ok'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+TOO_MANY_ATTEMPTS = 'too_many_attempts'
+MISSING = 'missing'
+
+# Expired rows are also swept by prune_verification_codes; this keeps the
+# table small between runs at the cost of one DELETE per process per interval
+PRUNE_INTERVAL_SECONDS = 10 * 60
+_last_prune = 0.0
+_prune_lock = threading.Lock()
+
+
+def code_ttl():
+    return timedelta(seconds=getattr(settings, 'VERIFICATION_CODE_TTL_SECONDS', 15 * 60))
+
+
+def max_attempts():
+    return getattr(settings, 'VERIFICATION_CODE_MAX_ATTEMPTS', 5)
+
+
+def hash_code(user_id, purpose, code):
+    """HMAC of a code bound to its user and purpose, so a leaked row cannot be replayed elsewhere"""
+    return salted_hmac('users.codes', f'{user_id}:{purpose}:{code}', algorithm='sha256').hexdigest()
+
+
+def issue_code(user, purpose):
+    """
+    Issue a fresh code for (user, purpose) and return it in plain text.
+
+    One upsert on the (user, purpose) constraint: a new code replaces the
+    previous one and resets its attempts. The user row is not touched.
+    """
+    code = ''.join(str(secrets.randbelow(10)) for _ in range(CODE_LENGTH))
+    now = timezone.now()
+    VerificationCode.objects.bulk_create(
+        [VerificationCode(
+            user=user, purpose=purpose, code_hash=hash_code(user.pk, purpose, code),
+            attempts=0, expires_at=now + code_ttl(), created_at=now,
+        )],
+        update_conflicts=True,
+        unique_fields=['user', 'purpose'],
+        update_fields=['code_hash', 'attempts', 'expires_at', 'created_at'],
+    )
+    _maybe_prune()
+    return code
+
+
+def check_code(user, purpose, code):
+    """
+    Check a submitted code and consume it on success.
+
+    Every check first spends one attempt with a conditional UPDATE, so
+    concurrent guesses cannot exceed VERIFICATION_CODE_MAX_ATTEMPTS. The
+    row is deleted once used, expired or out of attempts. Returns one of
+    OK, INVALID, EXPIRED, TOO_MANY_ATTEMPTS or MISSING.
+    """
+    codes = VerificationCode.objects.filter(user=user, purpose=purpose)
+    spent = codes.filter(attempts__lt=max_attempts(), expires_at__gt=timezone.now()).update(attempts=F('attempts') + 1)
+    if not spent:
+        row = codes.values_list('expires_at', flat=True).first()
+        if row is None:
+            return MISSING
+        codes.delete()
+        return EXPIRED if row <= timezone.now() else TOO_MANY_ATTEMPTS
+
+    code_hash = codes.values_list('code_hash', flat=True).first()
+    if code_hash is None or not constant_time_compare(code_hash, hash_code(user.pk, purpose, str(code))):
+        return INVALID
+    # Exactly one of two concurrent correct submissions deletes the row
+    if not codes.filter(code_hash=code_hash).delete()[0]:
+        return INVALID
+    return OK
+
+
+def prune_expired_codes():
+    """Delete expired codes; returns the number deleted"""
+    return VerificationCode.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+
+def _maybe_prune():
+    global _last_prune
+    now = time.monotonic()
+    with _prune_lock:
+        if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        _last_prune = now
+    prune_expired_codes()
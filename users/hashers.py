@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher as DjangoPBKDF2PasswordHasher
+
+
+class PBKDF2PasswordHasher(DjangoPBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the work factor taken from PASSWORD_PBKDF2_ITERATIONS.
+
+    Keeps the stock algorithm name, so existing hashes verify unchanged.
+    must_update() compares a stored hash's iterations with this value, so
+    Django's check_password rehashes a user's password at the next
+    successful login after the setting changes, in either direction.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', DjangoPBKDF2PasswordHasher.iterations)
@@ -0,0 +1,90 @@
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+
+from users.models import normalize_email
+
+
+def _percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the login email lookup (iexact vs normalized) and password checks per second "
+        "under concurrency for several PBKDF2 costs. All rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20000, help='Number of users to generate')
+        parser.add_argument('--lookups', type=int, default=2000, help='Email lookups to time per variant')
+        parser.add_argument('--checks', type=int, default=64, help='Password checks per concurrency level')
+        parser.add_argument('--concurrency', default=f'1,{os.cpu_count() or 1}',
+                            help='Comma-separated worker thread counts')
+        parser.add_argument('--iterations', default=None,
+                            help='Comma-separated PBKDF2 iteration counts (default: PASSWORD_PBKDF2_ITERATIONS)')
+
+    def handle(self, *args, **options):
+        self._lookups(options['users'], options['lookups'])
+
+        concurrency = [int(value) for value in options['concurrency'].split(',')]
+        if options['iterations']:
+            costs = [int(value) for value in options['iterations'].split(',')]
+        else:
+            costs = [getattr(settings, 'PASSWORD_PBKDF2_ITERATIONS', 1_000_000)]
+        for iterations in costs:
+            with override_settings(PASSWORD_PBKDF2_ITERATIONS=iterations):
+                encoded = make_password('correct horse battery staple')
+                for workers in concurrency:
+                    self._checks(encoded, iterations, workers, options['checks'])
+
+    def _lookups(self, count, lookups):
+        User = get_user_model()
+        with transaction.atomic():
+            # Hashing once keeps setup fast; the lookup never reads the password
+            password = make_password(None)
+            User.objects.bulk_create([
+                User(username=f'__bench_login_{i}', email=f'__bench_login_{i}@example.com', password=password)
+                for i in range(count)
+            ], batch_size=2000)
+            probes = [f'__Bench_Login_{i * 7919 % count}@Example.com' for i in range(lookups)]
+
+            for label, lookup in (
+                ('email__iexact', lambda email: User.objects.filter(email__iexact=email).first()),
+                ('normalized email', lambda email: User.objects.filter(email=normalize_email(email)).first()),
+            ):
+                timings = []
+                for email in probes:
+                    start = time.perf_counter()
+                    user = lookup(email)
+                    timings.append(time.perf_counter() - start)
+                    assert user is not None
+                self.stdout.write(
+                    f"{label:>16}: p50 {statistics.median(timings) * 1000:.3f} ms, "
+                    f"p99 {_percentile(timings, 0.99) * 1000:.3f} ms over {count} users"
+                )
+            transaction.set_rollback(True)
+
+    def _checks(self, encoded, iterations, workers, checks):
+        def check(_):
+            start = time.perf_counter()
+            assert check_password('correct horse battery staple', encoded)
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            start = time.perf_counter()
+            timings = list(pool.map(check, range(checks)))
+            elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{iterations:>9} iterations, {workers:>2} thread(s): {checks / elapsed:7.1f} logins/s, "
+            f"p50 {statistics.median(timings) * 1000:.0f} ms, p99 {_percentile(timings, 0.99) * 1000:.0f} ms"
+        )
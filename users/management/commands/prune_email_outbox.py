@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.outbox import PRUNE_BATCH_SIZE, prune_outbox
+
+
+class Command(BaseCommand):
+    help = "Delete sent and failed EmailOutbox rows older than EMAIL_OUTBOX_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PRUNE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deleted = prune_outbox(options['batch_size'])
+        retention = getattr(settings, 'EMAIL_OUTBOX_RETENTION_DAYS', 7)
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} sent or failed email(s) older than {retention} day(s)."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.codes import prune_expired_codes
+
+
+class Command(BaseCommand):
+    help = "Delete expired email verification and password reset codes"
+
+    def handle(self, *args, **options):
+        deleted = prune_expired_codes()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired verification code(s)."))
@@ -0,0 +1,70 @@
+import logging
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from users.outbox import BATCH_SIZE, process_outbox
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the sleep between retries while the mail server or database is down
+MAX_BACKOFF_SECONDS = 300
+
+
+class Command(BaseCommand):
+    help = "Deliver queued EmailOutbox rows; safe to run several workers side by side"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--poll-interval', type=float, default=5.0,
+                            help="Seconds to sleep when no email is due")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the due emails and exit instead of polling")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        errors = 0
+        # One connection for the worker's lifetime instead of one per email
+        connection = get_connection()
+        try:
+            while True:
+                try:
+                    # Opens at start and after each idle sleep; a no-op while already open
+                    connection.open()
+                    sent, failed = process_outbox(options['batch_size'], connection)
+                except Exception:
+                    if options['once']:
+                        raise
+                    # An outage must not kill the worker: drop both connections and retry with back-off
+                    errors += 1
+                    delay = min(options['poll_interval'] * 2 ** errors, MAX_BACKOFF_SECONDS)
+                    logger.exception("Email worker failed (%d in a row); retrying in %.0fs", errors, delay)
+                    self._close(connection)
+                    close_old_connections()
+                    time.sleep(delay)
+                    continue
+                errors = 0
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}.")
+                    continue
+                if options['once']:
+                    break
+                # Close the idle connection so the server does not drop it under us
+                self._close(connection)
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._close(connection)
+
+        self.stdout.write(self.style.SUCCESS(f"Email worker stopped: {total_sent} sent, {total_failed} failed."))
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            logger.warning("Could not close the email connection", exc_info=True)
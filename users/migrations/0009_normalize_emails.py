@@ -0,0 +1,53 @@
+import users.models
+from django.db import migrations
+from django.db.models import F
+from django.db.models.functions import Lower, Trim
+
+
+def normalize_emails(apps, schema_editor):
+    """Store every email trimmed and lower-cased so login can match it exactly"""
+    User = apps.get_model('users', 'User')
+    pending = list(
+        User.objects.annotate(normalized=Lower(Trim('email'))).exclude(
+            email=F('normalized')
+        ).order_by('id').values_list('id', 'email', 'normalized')
+    )
+    if not pending:
+        return
+
+    # Accounts whose emails only differ by case would end up sharing an
+    # address: one could no longer log in and neither could be saved. Which
+    # one to keep is a support decision, so stop and list them.
+    normalized_emails = {normalized for _, _, normalized in pending}
+    accounts = {}
+    for pk, email in User.objects.annotate(normalized=Lower(Trim('email'))).filter(
+        normalized__in=normalized_emails
+    ).order_by('id').values_list('id', 'email'):
+        accounts.setdefault(email.strip().lower(), []).append((pk, email))
+    conflicts = [rows for rows in accounts.values() if len(rows) > 1]
+    if conflicts:
+        listing = '\n'.join(f'  id={pk} email={email!r}' for rows in conflicts for pk, email in rows)
+        raise RuntimeError(
+            'These accounts have emails that only differ by case. Merge them or change '
+            'the email of all but one, then run the migration again:\n' + listing
+        )
+
+    for pk, _, normalized in pending:
+        User.objects.filter(pk=pk).update(email=normalized)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', users.models.UserManager()),
+            ],
+        ),
+        migrations.RunPython(normalize_emails, migrations.RunPython.noop),
+    ]
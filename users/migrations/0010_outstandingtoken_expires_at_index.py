@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+# Lets prune_tokens find expired rows without a table scan. OutstandingToken
+# belongs to simplejwt's token_blacklist app, hence raw SQL rather than AddIndex.
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_normalize_emails'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS token_blacklist_outstandingtoken_expires_at_idx '
+            'ON token_blacklist_outstandingtoken (expires_at)',
+            'DROP INDEX IF EXISTS token_blacklist_outstandingtoken_expires_at_idx',
+        ),
+    ]
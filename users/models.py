@@ -1,6 +1,21 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager as DjangoUserManager
 from django.db import models
-import secrets
+from django.utils import timezone
+
+
+def normalize_email(email):
+    """Canonical stored form of an email: trimmed and lower-cased, so login is an exact index lookup"""
+    return (email or '').strip().lower()
+
+
+class UserManager(DjangoUserManager):
+    @classmethod
+    def normalize_email(cls, email):
+        return normalize_email(email)
+
+    def get_by_natural_key(self, username):
+        return self.get(**{self.model.USERNAME_FIELD: normalize_email(username)})
+
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -14,10 +29,6 @@ class User(AbstractUser):
     
     # Add these new fields for email verification
     is_email_verified = models.BooleanField(default=False)
-    email_verification_token = models.CharField(max_length=100, blank=True, null=True)
-
-    # Password reset field
-    password_reset_token = models.CharField(max_length=100, blank=True, null=True)
     
     # Address fields
     address_line_1 = models.CharField(max_length=255, blank=True, null=True)
@@ -28,15 +39,82 @@ class User(AbstractUser):
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['full_name', 'phone_number']
+
+    objects = UserManager()
+
+    def save(self, *args, **kwargs):
+        self.email = normalize_email(self.email)
+        super().save(*args, **kwargs)
     
     def generate_verification_token(self):
-        """Generate a 4-digit verification code"""
-        self.email_verification_token = ''.join([str(secrets.randbelow(10)) for _ in range(4)])
-        self.save()
-        return self.email_verification_token
+        """Issue a fresh email verification code (see users.codes); the user row is not written"""
+        from .codes import issue_code
+        return issue_code(self, VerificationCode.PURPOSE_VERIFY_EMAIL)
     
     def generate_password_reset_token(self):
-        """Generate a 4-digit verification code for password reset"""
-        self.password_reset_token = ''.join([str(secrets.randbelow(10)) for _ in range(4)])
-        self.save()
-        return self.password_reset_token
\ No newline at end of file
+        """Issue a fresh password reset code (see users.codes); the user row is not written"""
+        from .codes import issue_code
+        return issue_code(self, VerificationCode.PURPOSE_RESET_PASSWORD)
+
+
+class VerificationCode(models.Model):
+    """A short-lived one-time code; at most one live code per user and purpose"""
+    PURPOSE_VERIFY_EMAIL = 'verify_email'
+    PURPOSE_RESET_PASSWORD = 'reset_password'
+    PURPOSE_CHOICES = (
+        (PURPOSE_VERIFY_EMAIL, 'Verify email'),
+        (PURPOSE_RESET_PASSWORD, 'Reset password'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='verification_codes')
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES)
+    # HMAC of the code, never the code itself
+    code_hash = models.CharField(max_length=64)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'purpose'], name='users_verificationcode_user_purpose_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.purpose} (expires {self.expires_at})"
+
+
+class EmailOutbox(models.Model):
+    """Transactional email queued by the request path and sent by run_email_worker"""
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    to_email = models.EmailField(max_length=255)
+    from_email = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # Not claimable before this; moved forward on claim (lease) and on failure (backoff)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['available_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['available_at', 'id'],
+                condition=models.Q(status='pending'),
+                name='users_emailoutbox_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
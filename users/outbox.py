@@ -0,0 +1,138 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import EmailOutbox
+
+BATCH_SIZE = 50
+PRUNE_BATCH_SIZE = 5000
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(to_email, subject, body):
+    """Queue one email; a single INSERT that commits or rolls back with the caller's transaction"""
+    return EmailOutbox.objects.create(
+        to_email=to_email,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        subject=subject,
+        body=body,
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff after the given number of failed attempts, capped"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'EMAIL_OUTBOX_RETRY_MAX_SECONDS', 3600)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), cap))
+
+
+def claim_batch(batch_size=BATCH_SIZE):
+    """
+    Claim up to batch_size due emails for this worker.
+
+    Rows are locked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    workers take disjoint batches without waiting on each other, then
+    leased by pushing available_at forward. The lock is released at commit;
+    the lease keeps other workers off the rows while they are being sent,
+    and lets them retry the rows if this worker dies mid-batch.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', 300))
+    with transaction.atomic():
+        emails = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True).filter(
+                status=EmailOutbox.STATUS_PENDING, available_at__lte=now
+            ).order_by('available_at', 'id')[:batch_size]
+        )
+        if emails:
+            for email in emails:
+                email.attempts += 1
+            EmailOutbox.objects.filter(pk__in=[email.pk for email in emails]).update(
+                available_at=now + lease, attempts=F('attempts') + 1
+            )
+    return emails
+
+
+def _record_failure(email, error, max_attempts):
+    """Back off and retry, or give up after max_attempts; the body of a dead email is cleared too"""
+    if email.attempts >= max_attempts:
+        EmailOutbox.objects.filter(pk=email.pk).update(
+            status=EmailOutbox.STATUS_FAILED, last_error=error, body=''
+        )
+    else:
+        EmailOutbox.objects.filter(pk=email.pk).update(
+            available_at=timezone.now() + retry_delay(email.attempts), last_error=error
+        )
+
+
+def send_batch(emails, connection):
+    """
+    Send claimed emails over one open connection; returns (sent, failed) counts.
+
+    Bodies carry verification and reset codes in plain text, so they are
+    cleared once an email is sent or given up on.
+    """
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    sent = []
+    failed = 0
+    for i, email in enumerate(emails):
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, [email.to_email], connection=connection
+        )
+        try:
+            message.send()
+        except Exception as e:
+            failed += 1
+            _record_failure(email, str(e), max_attempts)
+            # The connection may be unusable after an SMTP error; reopen it for the next message
+            connection.close()
+            try:
+                connection.open()
+            except Exception as open_error:
+                logger.exception('Could not reopen the email connection')
+                # Every remaining send would fail the same way; back them off instead
+                for remaining in emails[i + 1:]:
+                    failed += 1
+                    _record_failure(remaining, f'Connection failed: {open_error}', max_attempts)
+                break
+        else:
+            sent.append(email.pk)
+
+    if sent:
+        EmailOutbox.objects.filter(pk__in=sent).update(status=EmailOutbox.STATUS_SENT, sent_at=timezone.now(), body='')
+    return len(sent), failed
+
+
+def process_outbox(batch_size=BATCH_SIZE, connection=None):
+    """Claim and send one batch; returns (sent, failed), (0, 0) when nothing is due"""
+    emails = claim_batch(batch_size)
+    if not emails:
+        return 0, 0
+    if connection is None:
+        with get_connection() as connection:
+            return send_batch(emails, connection)
+    return send_batch(emails, connection)
+
+
+def prune_outbox(batch_size=PRUNE_BATCH_SIZE):
+    """
+    Delete sent and failed emails older than EMAIL_OUTBOX_RETENTION_DAYS, in batches.
+
+    Pending emails are never pruned. Returns the number deleted.
+    """
+    cutoff = timezone.now() - timedelta(days=getattr(settings, 'EMAIL_OUTBOX_RETENTION_DAYS', 7))
+    done = EmailOutbox.objects.filter(
+        status__in=[EmailOutbox.STATUS_SENT, EmailOutbox.STATUS_FAILED], created_at__lt=cutoff
+    )
+    deleted = 0
+    while True:
+        ids = list(done.order_by().values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += EmailOutbox.objects.filter(id__in=ids).delete()[0]
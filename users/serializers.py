@@ -1,9 +1,21 @@
 from django.contrib.auth import get_user_model
+from django.db import models, transaction
 from rest_framework import serializers
 from utils import send_verification_email
+from .models import normalize_email
+
+class NormalizedEmailField(serializers.EmailField):
+    """EmailField returning the stored (normalized) form, so the unique check is an exact index lookup"""
+
+    def to_internal_value(self, data):
+        return normalize_email(super().to_internal_value(data))
 
 class RegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.EmailField: NormalizedEmailField,
+    }
 
     class Meta:
         model = get_user_model()  # Custom User model
@@ -41,8 +53,9 @@ class RegistrationSerializer(serializers.ModelSerializer):
         return value
 
 
+    @transaction.atomic
     def create(self, validated_data):
-        # Create a new user with the provided data
+        # Create a new user with the provided data; the queued email commits with it
         user = get_user_model().objects.create_user(
             username=validated_data.get('email'),
             full_name=validated_data['full_name'],
@@ -53,8 +66,8 @@ class RegistrationSerializer(serializers.ModelSerializer):
         )
         
         # Generate token and send email
-        user.generate_verification_token()
-        send_verification_email(user)
+        code = user.generate_verification_token()
+        send_verification_email(user, code)
         
         return user
 
@@ -0,0 +1,13 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import bump_user_version_on_commit
+
+
+# Saves cover deactivation, password changes (set_password + save) and
+# profile edits; the bump waits for commit like the model version bumps.
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    bump_user_version_on_commit(instance.pk)
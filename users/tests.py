@@ -1,3 +1,366 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from caching import get_cache
+from throttling import get_store, throttle_stats
+from . import codes
+from .authentication import bump_user_version_on_commit
+from .models import EmailOutbox, VerificationCode
+from .outbox import claim_batch, enqueue_email, process_outbox, prune_outbox, send_batch
+from .token_blacklist import prune_expired_tokens, recent_blacklist
+
+User = get_user_model()
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        # Ids are reused across rolled-back tests; start every test from an empty cache
+        get_cache().clear()
+        self.user = User.objects.create_user(
+            username='jwt@example.com', email='jwt@example.com', password='password123',
+            full_name='Jwt User', phone_number='+441234567890', is_email_verified=True
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def _user_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        return response, [query['sql'] for query in queries if 'users_user' in query['sql']]
+
+    def test_reads_need_no_auth_queries_once_cached(self):
+        self.client.get('/api/areas/')
+        for path in ('/api/areas/', '/api/categories/', '/api/items/', '/api/catalogue/'):
+            response, queries = self._user_queries(path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(queries, [], path)
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get('/api/areas/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get('/api/areas/').status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.assertEqual(self.client.get('/api/areas/').status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertEqual(self.client.get('/api/areas/').status_code, 401)
+
+    def test_password_change_reloads_user(self):
+        self.client.get('/api/areas/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('another-password')
+            self.user.save()
+        response, queries = self._user_queries('/api/areas/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+    def test_profile_change_is_visible_on_next_request(self):
+        self.assertEqual(self.client.get('/api/profile/').json()['user']['full_name'], 'Jwt User')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.full_name = 'Renamed User'
+            self.user.save()
+        self.assertEqual(self.client.get('/api/profile/').json()['user']['full_name'], 'Renamed User')
+
+    def test_saving_cached_user_keeps_uncached_fields(self):
+        self.client.get('/api/profile/')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/profile/update/', {'full_name': 'Patched User'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.full_name, 'Patched User')
+        self.assertTrue(self.user.check_password('password123'))
+
+    def test_bulk_update_needs_explicit_bump(self):
+        self.client.get('/api/areas/')
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            bump_user_version_on_commit(self.user.pk)
+        self.assertEqual(self.client.get('/api/areas/').status_code, 401)
+
+
+class RefreshTokenRotationTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        recent_blacklist.clear()
+        self.user = User.objects.create_user(
+            username='refresh@example.com', email='refresh@example.com', password='password123',
+            full_name='Refresh User', phone_number='+441234567890', is_email_verified=True
+        )
+        self.client = APIClient()
+
+    def _refresh(self, token):
+        return self.client.post('/api/token/refresh/', {'refresh': token}, format='json')
+
+    def test_rotation_returns_new_tokens_and_blacklists_old_one(self):
+        old = str(RefreshToken.for_user(self.user))
+        response = self._refresh(old)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.json()['refresh'], old)
+        self.assertTrue(BlacklistedToken.objects.filter(token__token=old).exists())
+        self.assertEqual(self._refresh(response.json()['refresh']).status_code, 200)
+
+    def test_replay_is_rejected_from_memory_without_queries(self):
+        old = str(RefreshToken.for_user(self.user))
+        self._refresh(old)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._refresh(old).status_code, 401)
+        self.assertEqual(len(queries), 0)
+
+    def test_replay_is_rejected_by_database_on_another_worker(self):
+        old = str(RefreshToken.for_user(self.user))
+        self._refresh(old)
+        # Another worker's memory never saw this token
+        recent_blacklist.clear()
+        self.assertEqual(self._refresh(old).status_code, 401)
+
+    def test_logged_out_token_cannot_refresh(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.post('/api/logout/', {'refresh': str(refresh)}, format='json').status_code, 200)
+        self.client.force_authenticate(None)
+        recent_blacklist.clear()
+        self.assertEqual(self._refresh(str(refresh)).status_code, 401)
+
+    def test_prune_deletes_only_expired_tokens(self):
+        expired = RefreshToken.for_user(self.user)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=expired['jti']))
+        OutstandingToken.objects.filter(jti=expired['jti']).update(expires_at=timezone.now() - timedelta(days=1))
+        live = RefreshToken.for_user(self.user)
+        self.assertEqual(prune_expired_tokens(batch_size=1), (1, 1))
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+
+
+class VerificationCodeTests(TestCase):
+    def setUp(self):
+        # These tests exercise the code limits, not the endpoint throttles
+        get_store().reset()
+        self.user = User.objects.create_user(
+            username='code@example.com', email='code@example.com', password='password123',
+            full_name='Code User', phone_number='+441234567890', is_active=False
+        )
+        self.client = APIClient()
+
+    def _verify(self, code):
+        return self.client.post('/api/verify-email/', {'email': 'code@example.com', 'code': code}, format='json')
+
+    def _wrong(self, code):
+        return '0000' if code != '0000' else '1111'
+
+    def test_verify_consumes_code_without_rewriting_user(self):
+        code = self.user.generate_verification_token()
+        self.assertNotIn(code, VerificationCode.objects.get().code_hash)
+        with CaptureQueriesContext(connection) as queries:
+            response = self._verify(code)
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_email_verified and self.user.is_active)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "users_user"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"password"', updates[0])
+        self.assertFalse(VerificationCode.objects.exists())
+
+    def test_new_code_replaces_previous_one(self):
+        old = self.user.generate_verification_token()
+        new = self.user.generate_verification_token()
+        self.assertEqual(VerificationCode.objects.count(), 1)
+        if old != new:
+            self.assertEqual(self._verify(old).status_code, 400)
+        self.assertEqual(self._verify(new).status_code, 200)
+
+    def test_expired_code_is_rejected_and_deleted(self):
+        code = self.user.generate_verification_token()
+        VerificationCode.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self._verify(code)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expired', response.json()['error'])
+        self.assertFalse(VerificationCode.objects.exists())
+
+    @override_settings(VERIFICATION_CODE_MAX_ATTEMPTS=3)
+    def test_attempts_are_limited(self):
+        code = self.user.generate_verification_token()
+        for _ in range(3):
+            self.assertEqual(self._verify(self._wrong(code)).json()['error'], 'Invalid verification code.')
+        response = self._verify(code)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Too many', response.json()['error'])
+        self.assertFalse(VerificationCode.objects.exists())
+
+    def test_password_reset(self):
+        User.objects.filter(pk=self.user.pk).update(is_email_verified=True, is_active=True)
+        self.user.refresh_from_db()
+        data = {'email': 'code@example.com', 'code': '0000', 'password': 'new-password-123', 'confirm_password': 'new-password-123'}
+        response = self.client.post('/api/reset-password/', data, format='json')
+        self.assertIn('No password reset request', response.json()['error'])
+
+        data['code'] = self.user.generate_password_reset_token()
+        self.assertEqual(self.client.post('/api/reset-password/', data, format='json').status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-password-123'))
+        self.assertEqual(codes.check_code(self.user, VerificationCode.PURPOSE_RESET_PASSWORD, data['code']), codes.MISSING)
+
+    def test_prune_deletes_only_expired_codes(self):
+        self.user.generate_verification_token()
+        self.user.generate_password_reset_token()
+        VerificationCode.objects.filter(purpose=VerificationCode.PURPOSE_VERIFY_EMAIL).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(codes.prune_expired_codes(), 1)
+        self.assertEqual(list(VerificationCode.objects.values_list('purpose', flat=True)), [VerificationCode.PURPOSE_RESET_PASSWORD])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AuthThrottleTests(TestCase):
+    def setUp(self):
+        get_store().reset()
+        throttle_stats.reset()
+        self.client = APIClient()
+
+    def _login(self, email='throttle@example.com', ip='10.0.0.1'):
+        return self.client.post('/api/login/', {'email': email, 'password': 'wrong'}, format='json', REMOTE_ADDR=ip)
+
+    def test_eleventh_login_for_an_email_is_rejected_before_any_query(self):
+        for _ in range(10):
+            self.assertEqual(self._login().status_code, 401)
+        with self.assertNumQueries(0):
+            response = self._login()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # Emails are normalized before they are bucketed
+        self.assertEqual(self._login('Throttle@Example.com ').status_code, 429)
+
+    def test_email_and_ip_buckets_are_independent(self):
+        for _ in range(10):
+            self._login()
+        self.assertEqual(self._login().status_code, 429)
+        # Same address, another email: only that email's bucket was spent
+        self.assertEqual(self._login('other@example.com').status_code, 401)
+
+    @override_settings(AUTH_THROTTLE_RATES={'login': {'ip': '3/min', 'email': '10/min'}})
+    def test_ip_bucket_spans_emails(self):
+        for n in range(3):
+            self.assertEqual(self._login(f'user{n}@example.com').status_code, 401)
+        self.assertEqual(self._login('fresh@example.com').status_code, 429)
+        self.assertEqual(self._login('fresh@example.com', ip='10.0.0.2').status_code, 401)
+
+    def test_stats_endpoint(self):
+        for _ in range(11):
+            self._login()
+        self.client.force_authenticate(User.objects.create_user(
+            username='customer@example.com', email='customer@example.com', password='password123',
+            full_name='Customer', phone_number='+441234567890'
+        ))
+        self.assertEqual(self.client.get('/api/throttle/stats/').status_code, 403)
+
+        self.client.force_authenticate(User.objects.create_user(
+            username='admin@example.com', email='admin@example.com', password='password123',
+            full_name='Admin', phone_number='+441234567890', is_staff=True
+        ))
+        response = self.client.get('/api/throttle/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['store'], 'MemoryBucketStore')
+        self.assertEqual(response.json()['scopes']['login'], {
+            'email': {'allowed': 10, 'rejected': 1},
+            'ip': {'allowed': 11, 'rejected': 0},
+        })
+
+
+class FailingConnection:
+    """Email connection whose sends fail, and whose reopen fails when open_fails is set"""
+
+    def __init__(self, open_fails=False):
+        self.open_fails = open_fails
+        self.sends = 0
+
+    def send_messages(self, messages):
+        self.sends += 1
+        raise OSError('Connection refused')
+
+    def open(self):
+        if self.open_fails:
+            raise OSError('Connection refused')
+
+    def close(self):
+        pass
+
+
+@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_BASE_SECONDS=30, EMAIL_OUTBOX_LEASE_SECONDS=300)
+class EmailOutboxTests(TestCase):
+    def _enqueue(self, count=1):
+        return [enqueue_email(f'to{i}@example.com', 'Your code', 'Your code is 1234') for i in range(count)]
+
+    def test_claim_leases_rows(self):
+        self._enqueue(3)
+        claimed = claim_batch(batch_size=2)
+        self.assertEqual([email.attempts for email in claimed], [1, 1])
+        self.assertEqual(len(claim_batch()), 1)
+        # Leased rows are not claimable again until the lease runs out
+        self.assertEqual(claim_batch(), [])
+        EmailOutbox.objects.update(available_at=timezone.now())
+        self.assertEqual(len(claim_batch()), 3)
+
+    def test_sent_emails_lose_their_body(self):
+        self._enqueue()
+        self.assertEqual(process_outbox(), (1, 0))
+        self.assertEqual(mail.outbox[0].body, 'Your code is 1234')
+        email = EmailOutbox.objects.get()
+        self.assertEqual((email.status, email.body), (EmailOutbox.STATUS_SENT, ''))
+
+    def test_failures_back_off_then_give_up(self):
+        self._enqueue()
+        self.assertEqual(process_outbox(connection=FailingConnection()), (0, 1))
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.status, EmailOutbox.STATUS_PENDING)
+        self.assertGreater(email.available_at, timezone.now() + timedelta(seconds=20))
+        self.assertEqual(email.last_error, 'Connection refused')
+
+        EmailOutbox.objects.update(available_at=timezone.now())
+        self.assertEqual(process_outbox(connection=FailingConnection()), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.body), (EmailOutbox.STATUS_FAILED, 2, ''))
+
+    def test_failed_reopen_backs_off_rest_of_batch(self):
+        self._enqueue(3)
+        connection = FailingConnection(open_fails=True)
+        with self.assertLogs('users.outbox', level='ERROR'):
+            self.assertEqual(send_batch(claim_batch(), connection), (0, 3))
+        self.assertEqual(connection.sends, 1)
+        self.assertEqual(EmailOutbox.objects.filter(status=EmailOutbox.STATUS_PENDING, available_at__gt=timezone.now()).count(), 3)
+        self.assertEqual(EmailOutbox.objects.filter(last_error__startswith='Connection failed').count(), 2)
+
+    def test_worker_backs_off_and_retries_after_a_failed_reopen(self):
+        self._enqueue()
+        connection = mock.Mock(wraps=mail.get_connection())
+        connection.open.side_effect = [OSError('Connection refused'), True, False]
+        worker = 'users.management.commands.run_email_worker'
+        stdout = StringIO()
+        with mock.patch(f'{worker}.get_connection', return_value=connection), \
+                mock.patch(f'{worker}.close_old_connections'), \
+                mock.patch(f'{worker}.time.sleep', side_effect=[None, KeyboardInterrupt]) as sleep, \
+                self.assertLogs(worker, level='ERROR') as logs:
+            call_command('run_email_worker', '--poll-interval=5', stdout=stdout)
+        self.assertIn('retrying in 10s', logs.output[0])
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [10, 5])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('1 sent, 0 failed', stdout.getvalue())
+
+    def test_prune_keeps_pending_and_recent_emails(self):
+        old_sent, old_pending, recent_sent = self._enqueue(3)
+        EmailOutbox.objects.filter(pk__in=[old_sent.pk, recent_sent.pk]).update(status=EmailOutbox.STATUS_SENT)
+        EmailOutbox.objects.filter(pk__in=[old_sent.pk, old_pending.pk]).update(created_at=timezone.now() - timedelta(days=8))
+        self.assertEqual(prune_outbox(batch_size=1), 1)
+        self.assertEqual(set(EmailOutbox.objects.values_list('pk', flat=True)), {old_pending.pk, recent_sent.pk})
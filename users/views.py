@@ -4,23 +4,44 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import make_password
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken, TokenError
 from rest_framework import serializers
+from django.db import transaction
 from drf_yasg.utils import swagger_auto_schema
+from throttling import AUTH_THROTTLES
 from utils import send_password_reset_email, send_verification_email
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
+from . import codes
+from .models import VerificationCode, normalize_email
 from .serializers import RegistrationSerializer
+from .token_blacklist import RotatingRefreshToken, RotatingTokenRefreshSerializer, claim_refresh_token
 
 User = get_user_model()
 
+CODE_ERRORS = {
+    codes.EXPIRED: 'Verification code has expired. Please request a new code.',
+    codes.TOO_MANY_ATTEMPTS: 'Too many incorrect attempts. Please request a new code.',
+}
+
+
+def code_error_response(result):
+    """400 response for a failed codes.check_code result"""
+    return Response({
+        'error': CODE_ERRORS.get(result, 'Invalid verification code.')
+    }, status=status.HTTP_400_BAD_REQUEST)
+
 class RegistrationView(generics.CreateAPIView):
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'register'
     serializer_class = RegistrationSerializer
     
     @swagger_auto_schema(request_body=RegistrationSerializer, tags=["Authentication"])
@@ -67,6 +88,9 @@ class UpdateProfileView(APIView):
 
 class VerifyEmailView(APIView):
     """Verify email with the code sent to user"""
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'verify_email'
     
     @swagger_auto_schema(request_body=VerifyEmailSerializer, tags=["Authentication"])
     def post(self, request):
@@ -79,7 +103,7 @@ class VerifyEmailView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get(email=normalize_email(email))
         except User.DoesNotExist:
             return Response({
                 'error': 'User not found.'
@@ -90,29 +114,30 @@ class VerifyEmailView(APIView):
                 'message': 'Email is already verified.'
             }, status=status.HTTP_200_OK)
         
-        if user.email_verification_token == code:
-            user.is_email_verified = True
-            user.is_active = True
-            user.email_verification_token = None
-            user.save()
-        
-                # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
-            access_token = refresh.access_token
+        result = codes.check_code(user, VerificationCode.PURPOSE_VERIFY_EMAIL, code)
+        if result != codes.OK:
+            return code_error_response(result)
 
-            return Response({
-                'message': 'Email verified successfully! You can now login.',
-                'refresh': str(refresh),
-                'access': str(access_token),
-                'user': UserSerializer(user).data,
-            }, status=status.HTTP_200_OK)
-        else:
-            return Response({
-                'error': 'Invalid verification code.'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        user.is_email_verified = True
+        user.is_active = True
+        user.save(update_fields=['is_email_verified', 'is_active'])
+
+        # Generate JWT tokens
+        refresh = RefreshToken.for_user(user)
+        access_token = refresh.access_token
+
+        return Response({
+            'message': 'Email verified successfully! You can now login.',
+            'refresh': str(refresh),
+            'access': str(access_token),
+            'user': UserSerializer(user).data,
+        }, status=status.HTTP_200_OK)
 
 class ResendVerificationCodeView(APIView):
     """Resend verification code to user's email"""
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'resend_verification'
     
     @swagger_auto_schema(request_body=ResendVerificationSerializer, tags=["Authentication"])
     def post(self, request):
@@ -124,7 +149,7 @@ class ResendVerificationCodeView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get(email=normalize_email(email))
         except User.DoesNotExist:
             return Response({
                 'error': 'User not found.'
@@ -135,14 +160,18 @@ class ResendVerificationCodeView(APIView):
                 'message': 'Email is already verified.'
             }, status=status.HTTP_200_OK)
         
-        user.generate_verification_token()
-        send_verification_email(user)
+        with transaction.atomic():
+            code = user.generate_verification_token()
+            send_verification_email(user, code)
         
         return Response({
             'message': 'Verification code resent successfully.'
         }, status=status.HTTP_200_OK)
 
 class LoginView(TokenObtainPairView):
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'login'
     permission_classes = [AllowAny]
 
     @swagger_auto_schema(tags=["Authentication"])
@@ -154,9 +183,14 @@ class LoginView(TokenObtainPairView):
         if not email or not password:
             return Response({'detail': 'Email and password are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Authenticate user by email and password
-        user = get_user_model().objects.filter(email__iexact=email).first()
-        if not user or not user.check_password(password):
+        # Emails are stored normalized, so this is an exact match on the unique index
+        user = get_user_model().objects.filter(email=normalize_email(email)).first()
+        if user is None:
+            # Hash anyway so an unknown email costs the same as a wrong password
+            make_password(password)
+            return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+        # check_password rehashes and saves the password when the hasher policy has changed
+        if not user.check_password(password):
             return Response({'detail': 'Invalid credentials'}, status=status.HTTP_401_UNAUTHORIZED)
         if not user.is_email_verified:
             return Response({'detail': 'Please verify your email before logging in.'}, status=status.HTTP_403_FORBIDDEN)
@@ -173,6 +207,8 @@ class LoginView(TokenObtainPairView):
         })
 
 class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = RotatingTokenRefreshSerializer
+
     @swagger_auto_schema(tags=["Authentication"])
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
@@ -182,6 +218,9 @@ class LogoutSerializer(serializers.Serializer):
 
 class ForgotPasswordView(APIView):
     """Request password reset code"""
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'forgot_password'
     permission_classes = [AllowAny]
     
     @swagger_auto_schema(request_body=ForgotPasswordSerializer, tags=["Password Reset"])
@@ -194,7 +233,7 @@ class ForgotPasswordView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get(email=normalize_email(email))
             
             # Only allow password reset for verified users
             if not user.is_email_verified:
@@ -203,8 +242,9 @@ class ForgotPasswordView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # Generate and send password reset token
-            user.generate_password_reset_token()
-            send_password_reset_email(user)
+            with transaction.atomic():
+                code = user.generate_password_reset_token()
+                send_password_reset_email(user, code)
             
             return Response({
                 'message': 'Password reset code sent to your email.'
@@ -218,6 +258,9 @@ class ForgotPasswordView(APIView):
 
 class ResetPasswordView(APIView):
     """Verify code and reset password"""
+    authentication_classes = []
+    throttle_classes = AUTH_THROTTLES
+    throttle_scope = 'reset_password'
     permission_classes = [AllowAny]
     
     @swagger_auto_schema(request_body=ResetPasswordSerializer, tags=["Password Reset"])
@@ -232,32 +275,26 @@ class ResetPasswordView(APIView):
         new_password = serializer.validated_data['password']
         
         try:
-            user = User.objects.get(email=email)
+            user = User.objects.get(email=normalize_email(email))
         except User.DoesNotExist:
             return Response({
                 'error': 'User not found.'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Check if password reset token is set
-        if not user.password_reset_token:
+        result = codes.check_code(user, VerificationCode.PURPOSE_RESET_PASSWORD, code)
+        if result == codes.MISSING:
             return Response({
                 'error': 'No password reset request found. Please request a new code.'
             }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Verify the code
-        if user.password_reset_token == code:
-            # Reset password
-            user.set_password(new_password)
-            user.password_reset_token = None  # Clear the token
-            user.save()
-            
-            return Response({
-                'message': 'Password reset successful! You can now login with your new password.'
-            }, status=status.HTTP_200_OK)
-        else:
-            return Response({
-                'error': 'Invalid verification code.'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        if result != codes.OK:
+            return code_error_response(result)
+
+        user.set_password(new_password)
+        user.save(update_fields=['password'])
+
+        return Response({
+            'message': 'Password reset successful! You can now login with your new password.'
+        }, status=status.HTTP_200_OK)
         
 class LogoutView(APIView):
     permission_classes = (IsAuthenticated,)
@@ -268,8 +305,8 @@ class LogoutView(APIView):
         serializer.is_valid(raise_exception=True)
         refresh_token = serializer.validated_data['refresh']
         try:
-            token = RefreshToken(refresh_token)
-            token.blacklist()
+            token = RotatingRefreshToken(refresh_token)
+            claim_refresh_token(token)
             return Response({'detail': 'Logout successful.'}, status=200)
         except TokenError:
             return Response({'detail': 'Invalid token.'}, status=400)
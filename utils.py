@@ -1,19 +1,19 @@
-from django.core.mail import send_mail
-from django.conf import settings
+from users.codes import code_ttl
+from users.outbox import enqueue_email
 
-def send_verification_email(user):
-    """Send verification code to user's email"""
+def send_verification_email(user, code):
+    """Queue the verification code email; run_email_worker delivers it"""
     subject = 'Verify Your Email Address'
     message = f'''
 Hello {user.full_name},
 
 Thank you for registering! Your verification code is:
 
-{user.email_verification_token}
+{code}
 
 Please enter this code to verify your email address.
 
-This code will expire in 15 minutes.
+This code will expire in {int(code_ttl().total_seconds()) // 60} minutes.
 
 If you didn't register for an account, please ignore this email.
 
@@ -21,28 +21,11 @@ Best regards,
 Laundry Server
     '''
     
-    try:
-        send_mail(
-            subject,
-            message,
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
-        return False
+    return enqueue_email(user.email, subject, message)
     
 
-def send_password_reset_email(user):
-    """Send password reset code"""
+def send_password_reset_email(user, code):
+    """Queue the password reset code email"""
     subject = 'Password Reset Code'
-    message = f'Your password reset code is: {user.password_reset_token}\n\nIf you did not request this, please ignore this email.'
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=False,
-    )
\ No newline at end of file
+    message = f'Your password reset code is: {code}\n\nIt expires in {int(code_ttl().total_seconds()) // 60} minutes. If you did not request this, please ignore this email.'
+    return enqueue_email(user.email, subject, message)
\ No newline at end of file